@@ -0,0 +1,54 @@
+"""
+Alembic environment.
+
+Migrations run against the connection handed over by app.migrations when
+invoked through `python -m app.cli migrate`, or against DATABASE_URL when
+the alembic command line tool is used directly.
+"""
+from logging.config import fileConfig
+from dotenv import load_dotenv
+from alembic import context
+
+# Load environment variables before the database module reads DATABASE_URL
+load_dotenv()
+
+from app.models.database import Base, create_db_engine, DATABASE_URL
+from app.models.participant import Participant
+from app.models.group import Group, GroupMember
+from app.models.expense import Expense
+from app.models.archive import GroupCheckpoint, ArchivedExpense
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+def run_migrations_offline():
+    """Emits the migration SQL to stdout instead of running it."""
+    context.configure(url=DATABASE_URL, target_metadata=target_metadata, literal_binds=True, render_as_batch=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_with_connection(connection)
+        return
+    engine = create_db_engine(DATABASE_URL)
+    try:
+        with engine.connect() as connection:
+            _run_with_connection(connection)
+    finally:
+        engine.dispose()
+
+def _run_with_connection(connection):
+    # Batch mode lets ALTER-style operations work on SQLite by copying the table
+    context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
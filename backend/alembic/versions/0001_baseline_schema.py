@@ -0,0 +1,99 @@
+"""baseline schema
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-17 16:14:39.959313
+
+The schema as it stood when migrations were introduced. Databases created
+earlier by create_all() are brought to this state and stamped by
+`python -m app.cli migrate` instead of running this revision.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('groups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('invite_code', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_groups_id'), 'groups', ['id'], unique=False)
+    op.create_index(op.f('ix_groups_invite_code'), 'groups', ['invite_code'], unique=True)
+    op.create_index(op.f('ix_groups_name'), 'groups', ['name'], unique=False)
+
+    op.create_table('participants',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('client_id', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_participants_client_id'), 'participants', ['client_id'], unique=True)
+    op.create_index(op.f('ix_participants_id'), 'participants', ['id'], unique=False)
+
+    op.create_table('group_members',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nickname', sa.String(), nullable=True),
+    sa.Column('group_id', sa.Integer(), nullable=True),
+    sa.Column('participant_id', sa.Integer(), nullable=True),
+    sa.Column('balance_cents', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.ForeignKeyConstraint(['participant_id'], ['participants.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('group_id', 'participant_id', name='_group_participant_uc')
+    )
+    op.create_index(op.f('ix_group_members_id'), 'group_members', ['id'], unique=False)
+
+    op.create_table('expenses',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('amount_cents', sa.Integer(), nullable=False),
+    sa.Column('date', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('group_id', sa.Integer(), nullable=True),
+    sa.Column('paid_by_member_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.ForeignKeyConstraint(['paid_by_member_id'], ['group_members.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_expenses_group_id_date', 'expenses', ['group_id', 'date'], unique=False)
+    op.create_index(op.f('ix_expenses_id'), 'expenses', ['id'], unique=False)
+
+    op.create_table('expense_participants',
+    sa.Column('expense_id', sa.Integer(), nullable=False),
+    sa.Column('member_id', sa.Integer(), nullable=False),
+    sa.Column('share_cents', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['expense_id'], ['expenses.id'], ),
+    sa.ForeignKeyConstraint(['member_id'], ['group_members.id'], ),
+    sa.PrimaryKeyConstraint('expense_id', 'member_id')
+    )
+    op.create_index(op.f('ix_expense_participants_member_id'), 'expense_participants', ['member_id'], unique=False)
+
+
+
+def downgrade():
+    op.drop_index(op.f('ix_expense_participants_member_id'), table_name='expense_participants')
+
+    op.drop_table('expense_participants')
+    op.drop_index(op.f('ix_expenses_id'), table_name='expenses')
+    op.drop_index('ix_expenses_group_id_date', table_name='expenses')
+
+    op.drop_table('expenses')
+    op.drop_index(op.f('ix_group_members_id'), table_name='group_members')
+
+    op.drop_table('group_members')
+    op.drop_index(op.f('ix_participants_id'), table_name='participants')
+    op.drop_index(op.f('ix_participants_client_id'), table_name='participants')
+
+    op.drop_table('participants')
+    op.drop_index(op.f('ix_groups_name'), table_name='groups')
+    op.drop_index(op.f('ix_groups_invite_code'), table_name='groups')
+    op.drop_index(op.f('ix_groups_id'), table_name='groups')
+
+    op.drop_table('groups')
@@ -0,0 +1,52 @@
+"""group change log
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 18:02:11.482913
+
+Adds the per-group change sequence and the change log read by
+`GET /groups/{id}/changes`. Existing expenses and members are recorded as
+inserted under sequence 1, so a client syncing from version 0 receives them.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('groups', sa.Column('change_seq', sa.Integer(), server_default='0', nullable=False))
+
+    op.create_table('group_changes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('deleted', sa.Boolean(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_group_changes_group_id_seq', 'group_changes', ['group_id', 'seq'], unique=False)
+
+    op.execute(
+        "INSERT INTO group_changes (group_id, seq, entity, entity_id, deleted) "
+        "SELECT group_id, 1, 'member', id, false FROM group_members WHERE group_id IS NOT NULL"
+    )
+    op.execute(
+        "INSERT INTO group_changes (group_id, seq, entity, entity_id, deleted) "
+        "SELECT group_id, 1, 'expense', id, false FROM expenses WHERE group_id IS NOT NULL"
+    )
+    op.execute("UPDATE groups SET change_seq = 1 WHERE id IN (SELECT group_id FROM group_changes)")
+
+
+def downgrade():
+    op.drop_index('ix_group_changes_group_id_seq', table_name='group_changes')
+
+    op.drop_table('group_changes')
+    with op.batch_alter_table('groups') as batch_op:
+        batch_op.drop_column('change_seq')
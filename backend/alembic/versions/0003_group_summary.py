@@ -0,0 +1,40 @@
+"""group summary
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 19:11:52.604127
+
+Adds the materialized totals read by `GET /groups?summary=true` and fills
+them from the existing expenses. The last activity of a group with
+expenses is set to its latest expense date.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite cannot add a column with a non-constant default in place, so the table is rebuilt
+    with op.batch_alter_table('groups', recreate='always') as batch_op:
+        batch_op.add_column(sa.Column('total_spent_cents', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('expense_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('last_activity_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True))
+
+    op.execute(
+        "UPDATE groups SET "
+        "total_spent_cents = (SELECT COALESCE(SUM(amount_cents), 0) FROM expenses WHERE expenses.group_id = groups.id), "
+        "expense_count = (SELECT COUNT(*) FROM expenses WHERE expenses.group_id = groups.id), "
+        "last_activity_at = COALESCE((SELECT MAX(date) FROM expenses WHERE expenses.group_id = groups.id), last_activity_at)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('groups') as batch_op:
+        batch_op.drop_column('last_activity_at')
+        batch_op.drop_column('expense_count')
+        batch_op.drop_column('total_spent_cents')
@@ -0,0 +1,26 @@
+"""expense split type
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 20:25:37.118402
+
+Records how each expense was split. Existing expenses were all split
+equally, which is the column's default.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('expenses', sa.Column('split_type', sa.String(), server_default='equal', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('expenses') as batch_op:
+        batch_op.drop_column('split_type')
@@ -0,0 +1,79 @@
+"""settle-up checkpoints
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 21:02:45.730216
+
+Adds settle-up checkpoints with their member balances, and the archive
+tables that expenses and their participant rows are moved into when a group
+settles up. Archived expenses keep their IDs, so on SQLite the expenses
+table is rebuilt with AUTOINCREMENT to stop those IDs from being reused.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('group_checkpoints',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('expense_count', sa.Integer(), nullable=False),
+    sa.Column('total_cents', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_group_checkpoints_group_id'), 'group_checkpoints', ['group_id'], unique=False)
+    op.create_table('checkpoint_balances',
+    sa.Column('checkpoint_id', sa.Integer(), nullable=False),
+    sa.Column('member_id', sa.Integer(), nullable=False),
+    sa.Column('balance_cents', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['checkpoint_id'], ['group_checkpoints.id'], ),
+    sa.ForeignKeyConstraint(['member_id'], ['group_members.id'], ),
+    sa.PrimaryKeyConstraint('checkpoint_id', 'member_id')
+    )
+    op.create_table('archived_expenses',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('amount_cents', sa.Integer(), nullable=False),
+    sa.Column('split_type', sa.String(), nullable=False),
+    sa.Column('date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('group_id', sa.Integer(), nullable=True),
+    sa.Column('paid_by_member_id', sa.Integer(), nullable=True),
+    sa.Column('checkpoint_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['checkpoint_id'], ['group_checkpoints.id'], ),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.ForeignKeyConstraint(['paid_by_member_id'], ['group_members.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_archived_expenses_group_id_date', 'archived_expenses', ['group_id', 'date'], unique=False)
+    op.create_table('archived_expense_participants',
+    sa.Column('expense_id', sa.Integer(), nullable=False),
+    sa.Column('member_id', sa.Integer(), nullable=False),
+    sa.Column('share_cents', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['expense_id'], ['archived_expenses.id'], ),
+    sa.ForeignKeyConstraint(['member_id'], ['group_members.id'], ),
+    sa.PrimaryKeyConstraint('expense_id', 'member_id')
+    )
+
+    # Other databases never reuse IDs from a sequence; the option only affects SQLite
+    with op.batch_alter_table('expenses', recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+        pass
+
+
+def downgrade():
+    with op.batch_alter_table('expenses', recreate='always'):
+        pass
+
+    op.drop_table('archived_expense_participants')
+    op.drop_index('ix_archived_expenses_group_id_date', table_name='archived_expenses')
+    op.drop_table('archived_expenses')
+    op.drop_table('checkpoint_balances')
+    op.drop_index(op.f('ix_group_checkpoints_group_id'), table_name='group_checkpoints')
+    op.drop_table('group_checkpoints')
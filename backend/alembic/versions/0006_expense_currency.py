@@ -0,0 +1,44 @@
+"""expense currency
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 21:48:19.205637
+
+Adds a currency to groups and records the currency and original amount of
+every live and archived expense. Existing groups get the default currency (DEFAULT_CURRENCY)
+and their expenses are recorded as paid in it, so no amounts change.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.fx import DEFAULT_CURRENCY
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('groups', sa.Column('currency', sa.String(length=3), server_default=DEFAULT_CURRENCY, nullable=False))
+
+    for table, table_kwargs in (('expenses', {'sqlite_autoincrement': True}), ('archived_expenses', {})):
+        op.add_column(table, sa.Column('currency', sa.String(length=3), nullable=True))
+        op.add_column(table, sa.Column('original_amount_cents', sa.Integer(), nullable=True))
+        op.execute(sa.text(
+            f"UPDATE {table} SET original_amount_cents = amount_cents, "
+            f"currency = COALESCE((SELECT currency FROM groups WHERE groups.id = {table}.group_id), :default_currency)"
+        ).bindparams(default_currency=DEFAULT_CURRENCY))
+        with op.batch_alter_table(table, table_kwargs=table_kwargs) as batch_op:
+            batch_op.alter_column('currency', existing_type=sa.String(length=3), nullable=False)
+            batch_op.alter_column('original_amount_cents', existing_type=sa.Integer(), nullable=False)
+
+
+def downgrade():
+    for table, table_kwargs in (('archived_expenses', {}), ('expenses', {'sqlite_autoincrement': True})):
+        with op.batch_alter_table(table, table_kwargs=table_kwargs) as batch_op:
+            batch_op.drop_column('original_amount_cents')
+            batch_op.drop_column('currency')
+    with op.batch_alter_table('groups') as batch_op:
+        batch_op.drop_column('currency')
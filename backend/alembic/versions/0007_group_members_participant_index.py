@@ -0,0 +1,25 @@
+"""group members participant index
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 22:31:07.553914
+
+Indexes group memberships by participant for `GET /groups` and
+`GET /me/summary`. The unique (group_id, participant_id) constraint leads
+with group_id, so it cannot serve lookups by participant.
+"""
+from alembic import op
+
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_group_members_participant_id'), 'group_members', ['participant_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_group_members_participant_id'), table_name='group_members')
@@ -0,0 +1,36 @@
+"""expense date fractional seconds
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 23:40:12.318406
+
+Expenses created without a date used to get the text of the server default,
+CURRENT_TIMESTAMP, which has no fractional seconds. SQLite compares dates as
+text, so these did not compare equal to the same date bound from Python and
+keyset pagination returned them again on every page; settle-up copied them
+into the archive unchanged. Appends the fraction SQLAlchemy writes to live and
+archived expenses, so every stored date has one format. Other databases store
+real timestamps and need no change.
+"""
+from alembic import op
+
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+# Length of 'YYYY-MM-DD HH:MM:SS'
+SECONDS_LENGTH = 19
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table in ('expenses', 'archived_expenses'):
+        op.execute(f"UPDATE {table} SET date = date || '.000000' WHERE length(date) = {SECONDS_LENGTH}")
+
+
+def downgrade():
+    # The normalized dates are equal to the original ones
+    pass
@@ -0,0 +1,60 @@
+"""
+HTTP glue between the group read endpoints and the in-process response cache.
+
+Responses carry an ETag derived from their content. A client that sends
+`If-None-Match` with the ETag of a live cache entry gets a 304 before any
+database work is done; once the entry is outdated or expired the response is
+rebuilt first, and a 304 is only sent if the content is still the same.
+"""
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from app.models.database import Database
+from app.services.cache import group_cache
+
+@lru_cache(maxsize=None)
+def _adapter(response_type) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # Weak comparison, as required for If-None-Match
+    return "*" in candidates or etag in (candidate[2:] if candidate.startswith("W/") else candidate for candidate in candidates)
+
+def _build_body(session: Session, build, response_type, serialize) -> Tuple[bytes, Dict[str, str]]:
+    # Serialization happens inside the session so that relationships can still load
+    payload, headers = build(session)
+    if serialize is not None:
+        return serialize(payload), headers
+    adapter = _adapter(response_type)
+    return adapter.dump_json(adapter.validate_python(payload, from_attributes=True)), headers
+
+async def cached_json_response(request: Request, db: Database, key: Tuple[Hashable, ...], response_type: Any, build: Callable[[Session], Tuple[Any, Dict[str, str]]], serialize: Optional[Callable[[Any], bytes]] = None) -> Response:
+    """
+    Serves a group read from the cache. `key` must start with the group ID.
+    On a miss, `build(session)` is run through `db` to load the data and
+    returns the payload together with any extra response headers; the
+    payload is validated against `response_type`, serialized once and cached.
+    If `serialize` is given, the payload is trusted to match `response_type`
+    already and is encoded by it without validation.
+    Hits, including revalidations answered with 304, never touch the
+    database or the threadpool.
+    """
+    version = group_cache.version(key[0])
+    entry = group_cache.get(key, version)
+    if entry is None:
+        body, headers = await db.run(_build_body, build, response_type, serialize)
+        entry = group_cache.set(key, version, body, headers)
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        group_cache.record_not_modified()
+        return Response(status_code=304, headers={"ETag": entry.etag, "Cache-Control": "no-cache"})
+    return Response(
+        content=entry.body,
+        media_type="application/json",
+        headers={**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache"},
+    )
@@ -0,0 +1,104 @@
+"""
+Server-Sent Events stream of a group's changes.
+
+`GET /groups/{group_id}/events` keeps a connection open and pushes an event
+whenever an expense is created, deleted or imported, or a member joins. Each
+event carries the group's updated balances, so clients no longer need to
+poll `/balances` to notice other members' changes.
+"""
+import os
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.crud import crud_change, crud_group
+from app.schemas import balance as balance_schemas
+from app.schemas import event as event_schemas
+from app.models.database import Database, get_db
+from app.services import events
+from app.services.money import from_cents
+from app.services.settlement import SettlementMode, settle
+
+router = APIRouter()
+
+# Idle streams send a comment this often so that proxies keep them open
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+# Delay before a browser's EventSource reconnects after the stream ended
+EVENTS_RETRY_MS = 3000
+
+def build_balance_report(members, settlement: SettlementMode = SettlementMode.greedy) -> balance_schemas.BalanceReport:
+    """Builds the balances and settlement of a group from its members' ledger balances."""
+    net_balances = {member.id: member.balance_cents for member in members}
+    balances_list = [
+        balance_schemas.Balance(member_id=member.id, nickname=member.nickname, balance=from_cents(net_balances[member.id]))
+        for member in members
+    ]
+    transactions = [
+        balance_schemas.Transaction(from_member_id=from_member_id, to_member_id=to_member_id, amount=from_cents(amount))
+        for from_member_id, to_member_id, amount in settle(net_balances, settlement)
+    ]
+    return balance_schemas.BalanceReport(balances=balances_list, transactions=transactions)
+
+def _load_event_state(db: Session, group_id: int):
+    """The group's change sequence and balance report, read in one session."""
+    return crud_change.get_change_seq(db, group_id=group_id), build_balance_report(crud_group.get_group_members(db, group_id=group_id))
+
+async def publish_group_event(db: Database, group_id: int, event_type: str, data: dict):
+    """
+    Publishes an event with the group's updated balances to the group's
+    subscribers. Call it after the change was committed.
+    Nothing is loaded when the group has no subscribers.
+    """
+    broker = events.get_broker()
+    if not broker.has_subscribers(group_id):
+        return
+    version, balances = await db.run(_load_event_state, group_id)
+    event = event_schemas.GroupEvent(
+        type=event_type,
+        group_id=group_id,
+        version=version,
+        data=data,
+        balances=balances,
+    )
+    # Serialized once here; the broker hands the same frame to every subscriber
+    await broker.publish(group_id, f"id: {version}\nevent: {event_type}\ndata: {event.model_dump_json()}\n\n")
+
+async def _event_stream(group_id: int):
+    broker = events.get_broker()
+    # Subscribing inside the generator ties the unsubscribe to the stream's lifetime
+    subscription = broker.subscribe(group_id)
+    try:
+        yield f"retry: {EVENTS_RETRY_MS}\n\n"
+        while True:
+            try:
+                message = await subscription.get(timeout=EVENTS_KEEPALIVE_SECONDS)
+            except events.SubscriberLagging:
+                # Events were dropped; the client reconnects and reloads the group
+                yield "event: lagging\ndata: {}\n\n"
+                return
+            yield message if message is not None else ": keepalive\n\n"
+    finally:
+        broker.unsubscribe(subscription)
+
+@router.get("/groups/{group_id}/events")
+async def stream_group_events(group_id: int, db: Database = Depends(get_db)):
+    """
+    Streams the group's changes as Server-Sent Events. Event types are
+    expense-created, expense-deleted, expenses-imported, member-joined and
+    settled-up; the `id` of each event is the group version after the change,
+    which `/groups/{group_id}/changes` accepts as `since`.
+    """
+    if await db.run(crud_group.get_group, group_id=group_id) is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+    # Return the connection to the pool; the stream itself never needs the database
+    await db.close()
+    return StreamingResponse(
+        _event_stream(group_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/events/stats")
+def read_event_stats():
+    """Subscriber and delivery counters of the event broker."""
+    return events.get_broker().stats()
@@ -1,43 +1,274 @@
 """
 API endpoints for expense-related operations.
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+import binascii
+import csv
+import datetime
+import io
+import json
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
-from app.crud import crud_expense, crud_group
+from app.crud import crud_checkpoint, crud_expense, crud_group
 from app.schemas import expense as expense_schemas
-from app.models.database import get_db
+from app.models.database import Database, get_db, SessionLocal
+from app.api.caching import cached_json_response
+from app.api.events import publish_group_event
+from app.services.cache import group_cache
+from app.services import fx, serialization
 
 router = APIRouter()
 
+# Upper bound for a single page of expenses
+MAX_PAGE_SIZE = 500
+# Upper bound for the number of rows in a single bulk import
+MAX_IMPORT_ROWS = 10000
+# Columns of a CSV import; `date`, `split_type`, `split_values` and `currency` are optional
+CSV_IMPORT_COLUMNS = ("description", "amount", "paid_by_member_id", "participant_member_ids")
+
+def encode_cursor(date: datetime.datetime, expense_id: int) -> str:
+    """
+    Encodes the (date, id) sort key of the last expense of a page into an
+    opaque pagination cursor. The key is carried by the cursor itself, so a
+    page can be continued after that expense was deleted or archived.
+    """
+    return base64.urlsafe_b64encode(json.dumps([date.isoformat(), expense_id]).encode()).decode()
+
+def decode_cursor(cursor: str) -> crud_expense.ExpenseKey:
+    """Decodes a pagination cursor back into the (date, id) sort key it holds."""
+    try:
+        date, expense_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.datetime.fromisoformat(date), int(expense_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def stream_expenses_ndjson(group_id: int):
+    """
+    Yields a group's expenses as newline-delimited JSON while they come off the
+    database cursor. The generator owns its session because it keeps running
+    after the request handler has returned.
+    """
+    db = SessionLocal()
+    try:
+        for db_expense in crud_expense.iter_expenses_for_group(db, group_id=group_id):
+            yield expense_schemas.Expense.model_validate(db_expense).model_dump_json() + "\n"
+    finally:
+        db.close()
+
 @router.post("/expenses", response_model=expense_schemas.Expense)
-def create_expense(expense: expense_schemas.ExpenseCreate, db: Session = Depends(get_db)):
+async def create_expense(expense: expense_schemas.ExpenseCreate, db: Database = Depends(get_db)):
     """Creates a new expense and links it to participants."""
     # Verify the payer and participants are members of the group
-    payer_member = crud_group.get_member(db, expense.paid_by_member_id)
-    if not payer_member or payer_member.group_id != expense.group_id:
+    member_ids = await db.run(crud_group.get_member_ids_for_group, expense.group_id)
+    if expense.paid_by_member_id not in member_ids:
         raise HTTPException(status_code=400, detail="Payer is not a valid member of this group.")
     
     for member_id in expense.participant_member_ids:
-        p_member = crud_group.get_member(db, member_id)
-        if not p_member or p_member.group_id != expense.group_id:
+        if member_id not in member_ids:
             raise HTTPException(status_code=400, detail=f"Participant with member ID {member_id} is not in this group.")
 
-    return crud_expense.create_expense(db=db, expense=expense)
+    try:
+        db_expense = await db.run(crud_expense.create_expense, expense=expense)
+    except fx.MissingRateError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await db.commit()
+    group_cache.bump(expense.group_id)
+    await publish_group_event(db, expense.group_id, "expense-created", expense_schemas.Expense.model_validate(db_expense).model_dump(mode="json"))
+    return db_expense
+
+def _format_validation_error(error: ValidationError) -> str:
+    """Condenses a Pydantic validation error into a single line."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" if err["loc"] else err["msg"]
+        for err in error.errors()
+    )
+
+def _parse_csv_rows(body: bytes) -> List[dict]:
+    """Parses a CSV import into raw rows; participant IDs are separated by ';'."""
+    try:
+        reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV body must be UTF-8 encoded.")
+    missing = [column for column in CSV_IMPORT_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"CSV is missing required columns: {', '.join(missing)}")
+
+    rows = []
+    for record in reader:
+        row = {column: record[column] for column in CSV_IMPORT_COLUMNS}
+        row["participant_member_ids"] = [
+            member_id.strip() for member_id in (record["participant_member_ids"] or "").split(";") if member_id.strip()
+        ]
+        if record.get("date"):
+            row["date"] = record["date"]
+        if record.get("split_type"):
+            row["split_type"] = record["split_type"]
+        if record.get("split_values"):
+            row["split_values"] = [value.strip() for value in record["split_values"].split(";") if value.strip()]
+        if record.get("currency"):
+            row["currency"] = record["currency"]
+        rows.append(row)
+    return rows
+
+def _import_expenses(db: Session, group_id: int, rows: list) -> expense_schemas.ExpenseImportResult:
+    """
+    Validates every row against the group's members and inserts them all, or
+    none if any row has errors. The caller commits.
+    """
+    group_currency = crud_expense.get_group_currency(db, group_id=group_id)
+    if group_currency is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+    member_ids = crud_group.get_member_ids_for_group(db, group_id)
+    rates = fx.get_rates()
+
+    expenses, errors = [], []
+    for row_number, row in enumerate(rows, start=1):
+        if isinstance(row, dict):
+            row = {"group_id": group_id, **row}
+        try:
+            expense = expense_schemas.ExpenseCreate.model_validate(row)
+        except ValidationError as e:
+            errors.append(expense_schemas.ExpenseImportError(row=row_number, error=_format_validation_error(e)))
+            continue
+        if expense.group_id != group_id:
+            error = "Expense belongs to a different group."
+        elif expense.paid_by_member_id not in member_ids:
+            error = "Payer is not a valid member of this group."
+        else:
+            unknown = [member_id for member_id in expense.participant_member_ids if member_id not in member_ids]
+            error = f"Participants with member IDs {unknown} are not in this group." if unknown else None
+        if not error and expense.currency is not None:
+            try:
+                rates.factor(expense.currency, group_currency, crud_expense.rate_day(expense))
+            except fx.MissingRateError as e:
+                error = f"{e}."
+        if error:
+            errors.append(expense_schemas.ExpenseImportError(row=row_number, error=error))
+        else:
+            expenses.append(expense)
+
+    if errors:
+        return expense_schemas.ExpenseImportResult(created=0, errors=errors)
+
+    expense_ids = crud_expense.create_expenses_bulk(db, group_id=group_id, expenses=expenses) if expenses else []
+    return expense_schemas.ExpenseImportResult(created=len(expense_ids), expense_ids=expense_ids)
+
+@router.post("/groups/{group_id}/expenses/bulk", response_model=expense_schemas.ExpenseImportResult)
+async def import_expenses(group_id: int, request: Request, db: Database = Depends(get_db)):
+    """
+    Imports many expenses into a group in one transaction.
+
+    Accepts either a JSON array of expenses (`group_id` may be omitted) or a
+    `text/csv` body with the columns description, amount, paid_by_member_id,
+    participant_member_ids (separated by ';') and the optional columns date,
+    split_type, split_values (separated by ';') and currency. If any row is
+    invalid, nothing is imported and the per-row errors (1-based) are
+    returned with status 422.
+    """
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith("text/csv"):
+        rows = _parse_csv_rows(body)
+    else:
+        try:
+            rows = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or CSV.")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or CSV.")
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_IMPORT_ROWS} rows can be imported at once.")
+
+    result = await db.run(_import_expenses, group_id, rows)
+    if result.errors:
+        return JSONResponse(status_code=422, content=result.model_dump())
+    await db.commit()
+    group_cache.bump(group_id)
+    await publish_group_event(db, group_id, "expenses-imported", {"expense_ids": result.expense_ids})
+    return JSONResponse(content=result.model_dump())
 
 @router.get("/groups/{group_id}/expenses", response_model=List[expense_schemas.Expense])
-def read_expenses_for_group(group_id: int, db: Session = Depends(get_db)):
-    """Fetches all expenses for a given group."""
-    expenses = crud_expense.get_expenses_for_group(db, group_id=group_id)
-    return expenses
+async def read_expenses_for_group(
+    group_id: int,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    db: Database = Depends(get_db),
+):
+    """
+    Fetches the expenses for a given group, newest first.
+
+    Without `limit` the whole history is returned. With `limit`, one page is
+    returned and the cursor for the next page is sent in the `X-Next-Cursor`
+    header (absent on the last page). With `stream=true` the whole history is
+    streamed as NDJSON instead of being built into a single response.
+    """
+    if stream:
+        return StreamingResponse(stream_expenses_ndjson(group_id), media_type="application/x-ndjson")
+
+    after = decode_cursor(cursor) if cursor else None
+
+    # The lean path builds plain dicts from row tuples instead of ORM objects
+    # and skips their validation; both produce the same fields
+    fast = serialization.FAST_SERIALIZATION
+    get_expenses = crud_expense.get_expense_rows_for_group if fast else crud_expense.get_expenses_for_group
+
+    def build(session: Session):
+        # Fetch one extra row to find out whether another page follows
+        expenses = get_expenses(session, group_id=group_id, limit=limit + 1 if limit else None, after=after)
+        headers = {}
+        if limit and len(expenses) > limit:
+            expenses = expenses[:limit]
+            last = expenses[-1]
+            headers["X-Next-Cursor"] = encode_cursor(last["date"], last["id"]) if fast else encode_cursor(last.date, last.id)
+        return expenses, headers
+
+    return await cached_json_response(
+        request, db, (group_id, "expenses", limit, after), List[expense_schemas.Expense], build,
+        serialize=serialization.dumps if fast else None,
+    )
+
+@router.get("/groups/{group_id}/archive", response_model=List[expense_schemas.Expense])
+async def read_archived_expenses_for_group(
+    group_id: int,
+    request: Request,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: Database = Depends(get_db),
+):
+    """
+    Fetches the expenses archived by the group's settle-up checkpoints,
+    newest first, one page at a time. The cursor for the next page is sent
+    in the `X-Next-Cursor` header, as for the live listing.
+    """
+    after = decode_cursor(cursor) if cursor else None
+
+    def build(session: Session):
+        expenses = crud_checkpoint.get_archived_expenses_for_group(session, group_id=group_id, limit=limit + 1, after=after)
+        headers = {}
+        if len(expenses) > limit:
+            expenses = expenses[:limit]
+            headers["X-Next-Cursor"] = encode_cursor(expenses[-1].date, expenses[-1].id)
+        return expenses, headers
+
+    return await cached_json_response(
+        request, db, (group_id, "archive", limit, after), List[expense_schemas.Expense], build
+    )
 
 @router.delete("/expenses/{expense_id}", status_code=204)
-def delete_expense(expense_id: int, db: Session = Depends(get_db)):
+async def delete_expense(expense_id: int, db: Database = Depends(get_db)):
     """Deletes an expense by its ID."""
-    db_expense = crud_expense.get_expense(db, expense_id)
+    db_expense = await db.run(crud_expense.get_expense, expense_id)
     if not db_expense:
         raise HTTPException(status_code=404, detail="Expense not found")
-    crud_expense.delete_expense(db, expense_id=expense_id)
+    group_id = db_expense.group_id
+    await db.run(crud_expense.delete_expense, expense_id=expense_id)
+    await db.commit()
+    group_cache.bump(group_id)
+    await publish_group_event(db, group_id, "expense-deleted", {"id": expense_id})
     return None
 
@@ -0,0 +1,79 @@
+"""
+API endpoint for exporting group statements.
+
+XLSX exports are built by `build_statement_xlsx` in the processes of the
+export pool, which import this module on their own.
+"""
+import asyncio
+import os
+import tempfile
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
+
+from app.models.database import Database, get_db, SessionLocal
+from app.crud import crud_expense, crud_group
+from app.services import statement
+
+router = APIRouter()
+
+def _open_statement(db: Session, group_id: int):
+    """Returns the header and the lazily computed lines of a group's statement."""
+    members = sorted(crud_group.get_group_members(db, group_id=group_id), key=lambda member: member.id)
+    lines = statement.statement_lines(
+        statement.group_expenses(crud_expense.iter_history_rows(db, group_id=group_id)),
+        [member.id for member in members],
+        {member.id: member.nickname for member in members},
+    )
+    return statement.header([member.nickname for member in members], crud_expense.get_group_currency(db, group_id)), lines
+
+def stream_statement_csv(group_id: int):
+    """
+    Yields a group's statement as CSV chunks while the rows come off the
+    database cursor. The generator owns its session because it keeps running
+    after the request handler has returned.
+    """
+    db = SessionLocal()
+    try:
+        yield from statement.iter_csv(*_open_statement(db, group_id))
+    finally:
+        db.close()
+
+def build_statement_xlsx(group_id: int, path: str) -> int:
+    """Writes a group's statement to an XLSX file; runs in a process of the export pool."""
+    db = SessionLocal()
+    try:
+        return statement.write_xlsx(*_open_statement(db, group_id), path)
+    finally:
+        db.close()
+
+@router.get("/groups/{group_id}/export")
+async def export_group_statement(group_id: int, format: statement.ExportFormat = statement.ExportFormat.csv, db: Database = Depends(get_db)):
+    """
+    Exports the group's whole history, including archived expenses, oldest
+    first, with every member's share of each expense and their running
+    balances. `format=csv` (the default) is streamed as it is generated;
+    `format=xlsx` is built by the export worker processes and then sent.
+    """
+    if await db.run(crud_group.get_group, group_id=group_id) is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+    # The export reads through its own session, so return this connection to the pool
+    await db.close()
+    filename = f"group-{group_id}-statement.{format.value}"
+    if format == statement.ExportFormat.csv:
+        return StreamingResponse(
+            stream_statement_csv(group_id), media_type=statement.MEDIA_TYPES[format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+    if statement.openpyxl is None:
+        raise HTTPException(status_code=501, detail="XLSX export requires openpyxl to be installed.")
+    descriptor, path = tempfile.mkstemp(prefix="splitshare-export-", suffix=".xlsx")
+    os.close(descriptor)
+    try:
+        await asyncio.get_running_loop().run_in_executor(statement.get_export_pool(), build_statement_xlsx, group_id, path)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return FileResponse(path, media_type=statement.MEDIA_TYPES[format], filename=filename, background=BackgroundTask(os.unlink, path))
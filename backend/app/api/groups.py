@@ -1,129 +1,197 @@
 """
 API endpoints for group-related operations.
 """
-from typing import List, Dict
-from fastapi import APIRouter, Depends, HTTPException, Header
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request
 from sqlalchemy.orm import Session
 
-from app.crud import crud_group, crud_participant, crud_expense
+from app.crud import crud_change, crud_checkpoint, crud_expense, crud_group, crud_participant, crud_summary
 from app.schemas import group as group_schemas
 from app.schemas import balance as balance_schemas
-from app.models.database import get_db
+from app.schemas import change as change_schemas
+from app.schemas import checkpoint as checkpoint_schemas
+from app.models.database import Database, get_db
+from app.api.caching import cached_json_response
+from app.api.events import build_balance_report, publish_group_event
+from app.services.cache import group_cache, participant_cache
+from app.services.money import from_cents
+from app.services.settlement import SettlementMode
 
 router = APIRouter()
 
-def get_or_create_participant(client_id: str, db: Session):
+async def get_participant_id(client_id: str, db: Database) -> int:
     """
-    Retrieves a participant by client_id or creates a new one if not found.
-    A common dependency for endpoints requiring a participant context.
+    Resolves the Client-ID header to a participant ID, creating the participant
+    on first use. A common dependency for endpoints requiring a participant context.
+    Client IDs never change owner, so resolved IDs are cached and a hit costs no query.
     """
     if not client_id:
         raise HTTPException(status_code=400, detail="Client-ID header is required")
-    return crud_participant.get_or_create_participant(db, client_id=client_id)
+    participant_id = participant_cache.get(client_id)
+    if participant_id is None:
+        participant_id = await db.run(crud_participant.upsert_participant_id, client_id=client_id)
+        # Committed on its own so that only IDs that exist are cached; this
+        # happens once per browser and is idempotent if the request fails later
+        await db.commit()
+        participant_cache.set(client_id, participant_id)
+    return participant_id
 
 
 @router.post("/groups", response_model=group_schemas.Group)
-def create_group(group: group_schemas.GroupCreate, client_id: str = Header(None), db: Session = Depends(get_db)):
+async def create_group(group: group_schemas.GroupCreate, client_id: str = Header(None), db: Database = Depends(get_db)):
     """Creates a new group and adds the creator as the first member."""
-    participant = get_or_create_participant(client_id, db)
-    return crud_group.create_group_with_member(db=db, group=group, participant=participant, nickname=group.creator_nickname)
+    participant_id = await get_participant_id(client_id, db)
+    db_group = await db.run(crud_group.create_group_with_member, group=group, participant_id=participant_id, nickname=group.creator_nickname)
+    await db.commit()
+    return db_group
+
+def _groups_with_summary(db: Session, participant_id: int) -> List[group_schemas.GroupListItem]:
+    return [
+        group_schemas.GroupListItem(
+            **group_schemas.Group.model_validate(db_group).model_dump(),
+            summary=group_schemas.GroupSummary(
+                total_spent=from_cents(db_group.total_spent_cents),
+                expense_count=db_group.expense_count,
+                last_activity_at=db_group.last_activity_at,
+                my_balance=from_cents(balance_cents),
+            ),
+        )
+        for db_group, balance_cents in crud_summary.get_groups_with_summary_for_participant(db, participant_id=participant_id)
+    ]
 
-@router.get("/groups", response_model=List[group_schemas.Group])
-def read_groups_for_participant(client_id: str = Header(None), db: Session = Depends(get_db)):
-    """Fetches all groups that the participant is a member of."""
-    participant = get_or_create_participant(client_id, db)
-    return crud_group.get_groups_for_participant(db=db, participant_id=participant.id)
+@router.get("/groups", response_model=List[group_schemas.GroupListItem], response_model_exclude_none=True)
+async def read_groups_for_participant(summary: bool = False, client_id: str = Header(None), db: Database = Depends(get_db)):
+    """
+    Fetches all groups that the participant is a member of. With
+    `summary=true` every group includes its total spend, expense count, last
+    activity and the participant's own balance, read from the materialized
+    summary in the same query.
+    """
+    participant_id = await get_participant_id(client_id, db)
+    if summary:
+        return await db.run(_groups_with_summary, participant_id)
+    return await db.run(crud_group.get_groups_for_participant, participant_id=participant_id)
+
+async def _cached_group_response(request: Request, group_id: int, db: Database):
+    """Serves a group's details from the response cache, loading them on a miss."""
+    def build(session: Session):
+        db_group = crud_group.get_group(session, group_id=group_id)
+        if db_group is None:
+            raise HTTPException(status_code=404, detail="Group not found")
+        return db_group, {}
+    return await cached_json_response(request, db, (group_id, "group"), group_schemas.Group, build)
 
 @router.get("/groups/join/{invite_code}", response_model=group_schemas.Group)
-def get_group_by_invite_code(invite_code: str, db: Session = Depends(get_db)):
+async def get_group_by_invite_code(invite_code: str, request: Request, db: Database = Depends(get_db)):
     """Retrieves group details using an invite code."""
-    db_group = crud_group.get_group_by_invite_code(db, invite_code=invite_code)
-    if db_group is None:
-        raise HTTPException(status_code=404, detail="Group not found")
-    return db_group
+    # Invite codes never change, so the group they point at is remembered
+    group_id = group_cache.get_alias(("invite", invite_code))
+    if group_id is None:
+        db_group = await db.run(crud_group.get_group_by_invite_code, invite_code=invite_code)
+        if db_group is None:
+            raise HTTPException(status_code=404, detail="Group not found")
+        group_id = db_group.id
+        group_cache.set_alias(("invite", invite_code), group_id)
+    return await _cached_group_response(request, group_id, db)
 
 @router.post("/groups/{group_id}/join", response_model=group_schemas.GroupMember)
-def join_group(group_id: int, member_join: group_schemas.GroupMemberJoin, client_id: str = Header(None), db: Session = Depends(get_db)):
+async def join_group(group_id: int, member_join: group_schemas.GroupMemberJoin, client_id: str = Header(None), db: Database = Depends(get_db)):
     """Adds a participant to a specific group."""
-    participant = get_or_create_participant(client_id, db)
-    db_group = crud_group.get_group(db, group_id=group_id)
+    participant_id = await get_participant_id(client_id, db)
+    db_group = await db.run(crud_group.get_group, group_id=group_id)
     if db_group is None:
         raise HTTPException(status_code=404, detail="Group not found")
 
-    existing_member = crud_group.get_member_by_participant_id(db, group_id=group_id, participant_id=participant.id)
+    existing_member = await db.run(crud_group.get_member_by_participant_id, group_id=group_id, participant_id=participant_id)
     if existing_member:
         raise HTTPException(status_code=400, detail="User is already a member of this group")
 
-    return crud_group.add_member_to_group(db=db, group_id=group_id, participant_id=participant.id, nickname=member_join.nickname)
+    db_member = await db.run(crud_group.add_member_to_group, group_id=group_id, participant_id=participant_id, nickname=member_join.nickname)
+    await db.commit()
+    group_cache.bump(group_id)
+    await publish_group_event(db, group_id, "member-joined", group_schemas.GroupMember.model_validate(db_member).model_dump(mode="json"))
+    return db_member
 
 @router.get("/groups/{group_id}", response_model=group_schemas.Group)
-def read_group(group_id: int, db: Session = Depends(get_db)):
+async def read_group(group_id: int, request: Request, db: Database = Depends(get_db)):
     """Fetches details for a single group."""
-    db_group = crud_group.get_group(db, group_id=group_id)
-    if db_group is None:
-        raise HTTPException(status_code=404, detail="Group not found")
-    return db_group
+    return await _cached_group_response(request, group_id, db)
 
 @router.get("/groups/{group_id}/balances", response_model=balance_schemas.BalanceReport)
-def get_group_balances(group_id: int, db: Session = Depends(get_db)):
+async def get_group_balances(group_id: int, request: Request, settlement: SettlementMode = SettlementMode.greedy, db: Database = Depends(get_db)):
     """
-    Calculates and returns the current balances for all members of a group.
-    This is the core settlement logic.
+    Returns the current balances for all members of a group, read from the
+    balance ledger, together with the settlement transactions.
+
+    `settlement=greedy` (the default) pairs the largest debts with the largest
+    credits. `settlement=minimal` searches for the fewest possible transactions
+    and falls back to greedy for groups with many open balances.
     """
-    members = crud_group.get_group_members(db, group_id=group_id)
-    if not members:
-        return balance_schemas.BalanceReport(balances={}, transactions=[])
-
-    expenses = crud_expense.get_expenses_for_group(db, group_id=group_id)
-    
-    # Initialize balances for all members to zero
-    net_balances = {member.id: 0.0 for member in members}
-
-    # Process each expense to calculate net balances
-    for expense in expenses:
-        if not expense.participants:
-            continue
-        
-        share = expense.amount / len(expense.participants)
-        
-        # The payer gets credited the full amount
-        net_balances[expense.paid_by_member_id] += expense.amount
-        
-        # Each participant gets debited their share
-        for participant_member in expense.participants:
-            net_balances[participant_member.id] -= share
-    
-    # Create simplified balance list for the response
-    balances_list = [
-        balance_schemas.Balance(member_id=member.id, nickname=member.nickname, balance=round(net_balances[member.id], 2))
-        for member in members
-    ]
-    
-    # Calculate settlement transactions
-    debtors = {mid: bal for mid, bal in net_balances.items() if bal < -0.01}
-    creditors = {mid: bal for mid, bal in net_balances.items() if bal > 0.01}
-    transactions = []
-
-    # Match debtors to creditors
-    while debtors and creditors:
-        debtor_id, debt = max(debtors.items(), key=lambda item: item[1])
-        creditor_id, credit = max(creditors.items(), key=lambda item: item[1])
-        
-        amount = min(abs(debt), credit)
-        
-        transactions.append(balance_schemas.Transaction(
-            from_member_id=debtor_id,
-            to_member_id=creditor_id,
-            amount=round(amount, 2)
-        ))
-
-        debtors[debtor_id] += amount
-        creditors[creditor_id] -= amount
-
-        if abs(debtors[debtor_id]) < 0.01:
-            del debtors[debtor_id]
-        if abs(creditors[creditor_id]) < 0.01:
-            del creditors[creditor_id]
-            
-    return balance_schemas.BalanceReport(balances=balances_list, transactions=transactions)
+    def build(session: Session):
+        members = crud_group.get_group_members(session, group_id=group_id)
+        if not members:
+            return balance_schemas.BalanceReport(balances=[], transactions=[]), {}
+
+        # Net balances in cents are kept up to date by the expense write paths,
+        # so no expense history has to be loaded here
+        return build_balance_report(members, settlement), {}
 
+    return await cached_json_response(request, db, (group_id, "balances", settlement.value), balance_schemas.BalanceReport, build)
+
+@router.get("/groups/{group_id}/changes", response_model=change_schemas.GroupChanges)
+async def read_group_changes(group_id: int, request: Request, since: int = Query(0, ge=0), db: Database = Depends(get_db)):
+    """
+    Returns the expenses and members inserted or deleted after change
+    sequence `since`, with tombstone IDs for deletes. Pass the returned
+    `version` as `since` on the next call; `since=0` returns the whole group.
+    """
+    def build(session: Session):
+        version = crud_change.get_change_seq(session, group_id=group_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="Group not found")
+        if since > version:
+            raise HTTPException(status_code=400, detail="Version is ahead of the group's latest change")
+
+        changes = crud_change.get_changes_since(session, group_id=group_id, since=since)
+        inserted = {crud_change.EXPENSE: [], crud_change.MEMBER: []}
+        deleted = {crud_change.EXPENSE: [], crud_change.MEMBER: []}
+        for (entity, entity_id), is_deleted in changes.items():
+            (deleted if is_deleted else inserted)[entity].append(entity_id)
+
+        # Only the rows that changed are loaded, so a short delta costs two small queries
+        expense_ids, member_ids = inserted[crud_change.EXPENSE], inserted[crud_change.MEMBER]
+        return {
+            "version": version,
+            "expenses": crud_expense.get_expenses_by_ids(session, group_id=group_id, expense_ids=expense_ids) if expense_ids else [],
+            "members": crud_group.get_members_by_ids(session, group_id=group_id, member_ids=member_ids) if member_ids else [],
+            "deleted_expense_ids": deleted[crud_change.EXPENSE],
+            "deleted_member_ids": deleted[crud_change.MEMBER],
+        }, {}
+
+    return await cached_json_response(request, db, (group_id, "changes", since), change_schemas.GroupChanges, build)
+
+@router.post("/groups/{group_id}/settle-up", response_model=checkpoint_schemas.Checkpoint)
+async def settle_up_group(group_id: int, db: Database = Depends(get_db)):
+    """
+    Settles up a group: records every member's current balance in a
+    checkpoint and moves the group's expenses into the archive, so the live
+    expense tables only hold what happened since. Balances are unchanged.
+    """
+    db_group = await db.run(crud_group.get_group, group_id=group_id)
+    if db_group is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+    db_checkpoint = await db.run(crud_checkpoint.create_checkpoint, group_id=group_id)
+    await db.commit()
+    group_cache.bump(group_id)
+    await publish_group_event(db, group_id, "settled-up", checkpoint_schemas.Checkpoint.model_validate(db_checkpoint).model_dump(mode="json"))
+    return db_checkpoint
+
+@router.get("/groups/{group_id}/checkpoints", response_model=List[checkpoint_schemas.Checkpoint])
+async def read_group_checkpoints(group_id: int, request: Request, db: Database = Depends(get_db)):
+    """Lists a group's settle-up checkpoints, newest first."""
+    def build(session: Session):
+        if crud_group.get_group(session, group_id=group_id) is None:
+            raise HTTPException(status_code=404, detail="Group not found")
+        return crud_checkpoint.get_checkpoints_for_group(session, group_id=group_id), {}
+
+    return await cached_json_response(request, db, (group_id, "checkpoints"), List[checkpoint_schemas.Checkpoint], build)
@@ -0,0 +1,42 @@
+"""
+API endpoints for the requesting participant's own data.
+"""
+from fastapi import APIRouter, Depends, Header
+from sqlalchemy.orm import Session
+
+from app.crud import crud_summary
+from app.schemas import participant as participant_schemas
+from app.models.database import Database, get_db
+from app.api.groups import get_participant_id
+from app.services.money import from_cents
+
+router = APIRouter()
+
+def _participant_summary(db: Session, participant_id: int) -> participant_schemas.ParticipantSummary:
+    groups, totals = [], {}
+    for group_id, group_name, currency, member_id, balance_cents in crud_summary.get_positions_for_participant(db, participant_id=participant_id):
+        groups.append(participant_schemas.GroupPosition(
+            group_id=group_id, group_name=group_name, member_id=member_id, currency=currency, balance=from_cents(balance_cents)
+        ))
+        # [owed to the participant, owed by the participant] in cents
+        total = totals.setdefault(currency, [0, 0])
+        total[0 if balance_cents > 0 else 1] += balance_cents
+    return participant_schemas.ParticipantSummary(
+        groups=groups,
+        totals=[
+            participant_schemas.CurrencyPosition(
+                currency=currency, balance=from_cents(owed + owing), owed_to_you=from_cents(owed), you_owe=from_cents(-owing)
+            )
+            for currency, (owed, owing) in sorted(totals.items())
+        ],
+    )
+
+@router.get("/me/summary", response_model=participant_schemas.ParticipantSummary)
+async def read_participant_summary(client_id: str = Header(None), db: Database = Depends(get_db)):
+    """
+    Returns the participant's net balance in every group they belong to and
+    the totals over all of them per currency. The balances are read from the
+    ledger with one query, whatever the number of groups.
+    """
+    participant_id = await get_participant_id(client_id, db)
+    return await db.run(_participant_summary, participant_id)
@@ -0,0 +1,84 @@
+"""
+Command line maintenance tasks for the backend.
+
+Usage:
+    python -m app.cli reconcile [--group-id ID] [--dry-run]
+    python -m app.cli migrate
+"""
+import argparse
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables before the database module reads DATABASE_URL
+load_dotenv()
+
+from app.models.database import SessionLocal, engine
+from app.models.group import Group
+from app.crud import crud_balance, crud_summary
+from app import migrations
+from app.services.money import from_cents
+
+def reconcile(args):
+    """Rebuilds the balance ledger and group summaries from the expense history and reports drift."""
+    db = SessionLocal()
+    try:
+        if args.group_id is not None:
+            group_ids = [args.group_id]
+        else:
+            group_ids = [group_id for (group_id,) in db.query(Group.id).order_by(Group.id).all()]
+
+        total_drift = 0
+        for group_id in group_ids:
+            drift = crud_balance.reconcile_group(db, group_id, fix=not args.dry_run)
+            for entry in drift:
+                print(
+                    f"group {entry['group_id']} member {entry['member_id']}: "
+                    f"stored {from_cents(entry['stored_cents']):.2f}, expected {from_cents(entry['expected_cents']):.2f}"
+                )
+            total_drift += len(drift)
+            summary_drift = crud_summary.reconcile_summary(db, group_id, fix=not args.dry_run)
+            if summary_drift:
+                print(
+                    f"group {group_id} summary: stored {from_cents(summary_drift['stored_cents']):.2f} "
+                    f"in {summary_drift['stored_count']} expense(s), expected {from_cents(summary_drift['expected_cents']):.2f} "
+                    f"in {summary_drift['expected_count']} expense(s)"
+                )
+                total_drift += 1
+        if not args.dry_run:
+            db.commit()
+    finally:
+        db.close()
+
+    action = "found" if args.dry_run else "fixed"
+    print(f"Checked {len(group_ids)} group(s), {action} {total_drift} drifting balance(s) or summaries.")
+    # A non-zero exit code lets a dry run be used as a health check
+    return 1 if total_drift and args.dry_run else 0
+
+def migrate(args):
+    """Upgrades the database schema to the latest migration."""
+    result = migrations.migrate(engine)
+    if result["adopted"]:
+        print("Upgraded a database created without migrations to the baseline schema.")
+    if result["from"] == result["to"]:
+        print(f"Database schema is up to date at revision {result['to']}.")
+    else:
+        print(f"Upgraded database schema from revision {result['from'] or 'none'} to {result['to']}.")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reconcile_parser = subparsers.add_parser("reconcile", help="Rebuild the balance ledger and group summaries from the expense history.")
+    reconcile_parser.add_argument("--group-id", type=int, help="Only reconcile this group.")
+    reconcile_parser.add_argument("--dry-run", action="store_true", help="Report drift without fixing it.")
+    reconcile_parser.set_defaults(func=reconcile)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Upgrade the database schema to the latest migration.")
+    migrate_parser.set_defaults(func=migrate)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
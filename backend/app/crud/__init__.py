@@ -1,2 +1,3 @@
-# This file is intentionally left empty.
-
+# Some CRUD modules build loader options at import time, which configures the
+# mappers, so every model must be imported before any of them
+from app.models import archive, expense, group, participant  # noqa: F401
@@ -0,0 +1,107 @@
+"""
+CRUD operations for the per-member balance ledger.
+
+Each GroupMember carries a running net balance that the expense write paths
+adjust in the same transaction as the expense itself, so reading a group's
+balances costs one query over its members instead of a replay of its history.
+All amounts are integer cents, so the ledger is exact.
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models import group as group_model
+from app.models import expense as expense_model
+from app.crud import crud_checkpoint
+
+def split_deltas(amount_cents: int, paid_by_member_id: int, shares: Dict[int, int], into: Optional[Dict[int, int]] = None) -> Dict[int, int]:
+    """
+    Returns the balance change each member receives from a single expense,
+    given the share in cents owed by each participant.
+    Pass a defaultdict(int) as `into` to accumulate several expenses.
+    """
+    deltas = into if into is not None else defaultdict(int)
+    if not shares:
+        return deltas
+    # The payer gets credited the full amount
+    deltas[paid_by_member_id] += amount_cents
+    # Each participant gets debited their share
+    for member_id, share_cents in shares.items():
+        deltas[member_id] -= share_cents
+    return deltas
+
+def get_expense_shares(db: Session, expense_id: int) -> Dict[int, int]:
+    """Retrieves the stored share of each participant of an expense."""
+    table = expense_model.expense_participants_table
+    rows = db.query(table.c.member_id, table.c.share_cents).filter(table.c.expense_id == expense_id)
+    return {member_id: share_cents for member_id, share_cents in rows}
+
+def apply_deltas(db: Session, deltas: Dict[int, int], sign: int = 1):
+    """Adds the signed deltas to the stored member balances without committing."""
+    for member_id, delta in deltas.items():
+        if not delta:
+            continue
+        db.query(group_model.GroupMember).filter(group_model.GroupMember.id == member_id).update(
+            {group_model.GroupMember.balance_cents: group_model.GroupMember.balance_cents + sign * delta},
+            synchronize_session=False
+        )
+
+def revert_expense(db: Session, expense: expense_model.Expense):
+    """Removes an expense from the ledger using its stored shares. The caller commits."""
+    shares = get_expense_shares(db, expense.id)
+    apply_deltas(db, split_deltas(expense.amount_cents, expense.paid_by_member_id, shares), sign=-1)
+
+def compute_balances_from_history(db: Session, group_id: int) -> Dict[int, int]:
+    """
+    Rebuilds every member's net balance from the group's latest checkpoint
+    plus its live expenses, with two aggregate queries over the latter.
+    """
+    Expense = expense_model.Expense
+    table = expense_model.expense_participants_table
+    members = db.query(group_model.GroupMember.id).filter(group_model.GroupMember.group_id == group_id)
+    balances = {member_id: 0 for (member_id,) in members}
+    balances.update(crud_checkpoint.get_latest_balances(db, group_id))
+
+    # Expenses without participants do not affect any balance
+    has_participants = db.query(table.c.expense_id).filter(table.c.expense_id == Expense.id).exists()
+    paid = (
+        db.query(Expense.paid_by_member_id, func.sum(Expense.amount_cents))
+        .filter(Expense.group_id == group_id, has_participants)
+        .group_by(Expense.paid_by_member_id)
+    )
+    for member_id, total in paid:
+        balances[member_id] = balances.get(member_id, 0) + total
+
+    owed = (
+        db.query(table.c.member_id, func.sum(table.c.share_cents))
+        .join(Expense, Expense.id == table.c.expense_id)
+        .filter(Expense.group_id == group_id)
+        .group_by(table.c.member_id)
+    )
+    for member_id, total in owed:
+        balances[member_id] = balances.get(member_id, 0) - total
+    return balances
+
+def reconcile_group(db: Session, group_id: int, fix: bool = True) -> List[dict]:
+    """
+    Compares the stored ledger of a group against its expense history.
+    Returns one entry per drifting member and, if `fix` is set, overwrites
+    the stored balances with the rebuilt ones. The caller commits.
+    """
+    expected = compute_balances_from_history(db, group_id)
+    members = db.query(group_model.GroupMember).filter(group_model.GroupMember.group_id == group_id).all()
+    drift = []
+    for member in members:
+        stored = member.balance_cents or 0
+        if stored != expected[member.id]:
+            drift.append({
+                "group_id": group_id,
+                "member_id": member.id,
+                "stored_cents": stored,
+                "expected_cents": expected[member.id],
+            })
+        if fix:
+            member.balance_cents = expected[member.id]
+    if fix:
+        db.flush()
+    return drift
@@ -0,0 +1,61 @@
+"""
+CRUD operations for the per-group change log.
+
+The expense and member write paths record what they inserted or deleted in
+the same transaction as the change itself, so `get_changes_since` can tell a
+client exactly which rows to fetch or drop since the sequence number it last
+saw. Write functions only flush; the caller commits the unit of work.
+"""
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+from app.models import group as group_model
+
+EXPENSE = "expense"
+MEMBER = "member"
+
+def next_change_seq(db: Session, group_id: int) -> int:
+    """
+    Increments the group's change sequence and returns the new value. The
+    UPDATE locks the group row until the caller commits, so concurrent writes
+    to the same group get distinct, increasing sequence numbers.
+    """
+    Group = group_model.Group
+    return db.execute(
+        update(Group).where(Group.id == group_id).values(change_seq=Group.change_seq + 1).returning(Group.change_seq)
+    ).scalar_one()
+
+def record_changes(db: Session, group_id: int, entity: str, entity_ids: Iterable[int], deleted: bool = False, seq: Optional[int] = None) -> int:
+    """
+    Records that the given expenses or members of a group were inserted (or
+    deleted) under a single new sequence number, which is returned. Pass
+    `seq` to record them under one already taken with `next_change_seq`.
+    """
+    if seq is None:
+        seq = next_change_seq(db, group_id)
+    rows = [
+        {"group_id": group_id, "seq": seq, "entity": entity, "entity_id": entity_id, "deleted": deleted}
+        for entity_id in entity_ids
+    ]
+    if rows:
+        db.execute(insert(group_model.GroupChange), rows)
+    return seq
+
+def get_change_seq(db: Session, group_id: int) -> Optional[int]:
+    """Returns the group's current change sequence, or None if the group does not exist."""
+    return db.execute(select(group_model.Group.change_seq).where(group_model.Group.id == group_id)).scalar()
+
+def get_changes_since(db: Session, group_id: int, since: int) -> Dict[Tuple[str, int], bool]:
+    """
+    Returns the entities changed after sequence number `since`, mapping
+    (entity, entity_id) to whether the latest change deleted it. An entity
+    inserted and deleted within the window is reported as deleted.
+    """
+    GroupChange = group_model.GroupChange
+    rows = db.execute(
+        select(GroupChange.entity, GroupChange.entity_id, GroupChange.deleted)
+        .where(GroupChange.group_id == group_id, GroupChange.seq > since)
+        .order_by(GroupChange.seq, GroupChange.id)
+    )
+    # Later entries overwrite earlier ones, leaving each entity's latest state
+    return {(entity, entity_id): deleted for entity, entity_id, deleted in rows}
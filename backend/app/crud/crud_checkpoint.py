@@ -0,0 +1,110 @@
+"""
+CRUD operations for settle-up checkpoints and the expense archive.
+
+Write functions only flush; the caller commits the unit of work.
+"""
+import datetime
+from typing import Dict, Optional, Tuple
+from sqlalchemy import and_, delete, func, insert, literal, or_, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from app.models import archive as archive_model
+from app.models import expense as expense_model
+from app.models import group as group_model
+from app.crud import crud_change
+
+ARCHIVED_EXPENSE_LOAD_OPTIONS = (
+    joinedload(archive_model.ArchivedExpense.payer),
+    selectinload(archive_model.ArchivedExpense.participants),
+    selectinload(archive_model.ArchivedExpense.shares),
+)
+
+def create_checkpoint(db: Session, group_id: int) -> archive_model.GroupCheckpoint:
+    """
+    Settles up a group without committing: stores every member's current
+    ledger balance in a new checkpoint and moves all of the group's live
+    expenses and their participant rows into the archive tables. The ledger
+    itself is unchanged, since it already equals the checkpoint plus the
+    (now empty) live history. Archived expenses are recorded as deleted in
+    the change log, as they leave the live listing.
+    """
+    Expense = expense_model.Expense
+    participants = expense_model.expense_participants_table
+    # Taking the sequence number first locks the group row, which every
+    # expense write also updates, so no expense can be added or removed
+    # between reading the balances and moving the history
+    seq = crud_change.next_change_seq(db, group_id)
+    expense_ids = db.execute(select(Expense.id).where(Expense.group_id == group_id).order_by(Expense.id)).scalars().all()
+    covered = select(Expense.id).where(Expense.group_id == group_id)
+    total_cents = db.execute(select(func.coalesce(func.sum(Expense.amount_cents), 0)).where(Expense.id.in_(covered))).scalar_one()
+
+    checkpoint = archive_model.GroupCheckpoint(group_id=group_id, expense_count=len(expense_ids), total_cents=total_cents)
+    db.add(checkpoint)
+    db.flush()
+
+    GroupMember = group_model.GroupMember
+    db.execute(insert(archive_model.CheckpointBalance).from_select(
+        ["checkpoint_id", "member_id", "balance_cents"],
+        select(literal(checkpoint.id), GroupMember.id, GroupMember.balance_cents).where(GroupMember.group_id == group_id),
+    ))
+
+    if expense_ids:
+        columns = ["id", "description", "amount_cents", "currency", "original_amount_cents", "split_type", "date", "group_id", "paid_by_member_id"]
+        db.execute(insert(archive_model.ArchivedExpense).from_select(
+            columns + ["checkpoint_id"],
+            select(*(getattr(Expense, column) for column in columns), literal(checkpoint.id)).where(Expense.id.in_(covered)),
+        ))
+        db.execute(insert(archive_model.archived_expense_participants_table).from_select(
+            ["expense_id", "member_id", "share_cents"],
+            select(participants.c.expense_id, participants.c.member_id, participants.c.share_cents).where(participants.c.expense_id.in_(covered)),
+        ))
+        db.execute(delete(participants).where(participants.c.expense_id.in_(covered)))
+        db.execute(delete(Expense).where(Expense.id.in_(covered)).execution_options(synchronize_session=False))
+        crud_change.record_changes(db, group_id, crud_change.EXPENSE, expense_ids, deleted=True, seq=seq)
+    db.flush()
+    return get_checkpoint(db, checkpoint.id)
+
+def get_checkpoint(db: Session, checkpoint_id: int):
+    """Retrieves a checkpoint with its member balances."""
+    Checkpoint = archive_model.GroupCheckpoint
+    return db.query(Checkpoint).options(selectinload(Checkpoint.balances)).filter(Checkpoint.id == checkpoint_id).first()
+
+def get_checkpoints_for_group(db: Session, group_id: int):
+    """Retrieves a group's checkpoints with their member balances, newest first."""
+    Checkpoint = archive_model.GroupCheckpoint
+    return (
+        db.query(Checkpoint).options(selectinload(Checkpoint.balances))
+        .filter(Checkpoint.group_id == group_id)
+        .order_by(Checkpoint.id.desc())
+        .all()
+    )
+
+def get_latest_balances(db: Session, group_id: int) -> Dict[int, int]:
+    """Returns the member balances in cents of the group's latest checkpoint, or {} if there is none."""
+    Checkpoint = archive_model.GroupCheckpoint
+    latest = select(func.max(Checkpoint.id)).where(Checkpoint.group_id == group_id).scalar_subquery()
+    Balance = archive_model.CheckpointBalance
+    return dict(db.execute(select(Balance.member_id, Balance.balance_cents).where(Balance.checkpoint_id == latest)).all())
+
+def get_archived_totals(db: Session, group_id: int):
+    """Returns the total amount in cents and the number of the group's archived expenses."""
+    ArchivedExpense = archive_model.ArchivedExpense
+    return db.query(func.coalesce(func.sum(ArchivedExpense.amount_cents), 0), func.count(ArchivedExpense.id)).filter(ArchivedExpense.group_id == group_id).one()
+
+def get_archived_expenses_for_group(db: Session, group_id: int, limit: Optional[int] = None, after: Optional[Tuple[datetime.datetime, int]] = None):
+    """
+    Retrieves a group's archived expenses newest first, ordered on (date, id)
+    like the live listing. Use `limit` and `after`, the (date, id) of the
+    last expense of the previous page, to page.
+    """
+    ArchivedExpense = archive_model.ArchivedExpense
+    query = db.query(ArchivedExpense).options(*ARCHIVED_EXPENSE_LOAD_OPTIONS).filter(ArchivedExpense.group_id == group_id)
+    if after is not None:
+        after_date, after_id = after
+        query = query.filter(or_(
+            ArchivedExpense.date < after_date,
+            and_(ArchivedExpense.date == after_date, ArchivedExpense.id < after_id),
+        ))
+    query = query.order_by(ArchivedExpense.date.desc(), ArchivedExpense.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
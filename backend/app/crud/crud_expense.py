@@ -1,46 +1,302 @@
 """
 CRUD operations for the Expense model.
+
+Write functions only flush; the caller commits the unit of work.
 """
-from sqlalchemy.orm import Session
+import datetime
+import heapq
+from typing import Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import and_, or_, select, insert
+from sqlalchemy.orm import Session, joinedload, selectinload
+from app.models import archive as archive_model
 from app.models import expense as expense_model
+from app.models import group as group_model
 from app.schemas import expense as expense_schema
-from app.crud import crud_group
+from app.crud import crud_balance, crud_change, crud_summary
+from app.services.money import from_cents, to_cents
+from app.services import fx, splits
+
+# Loader options matching what the Expense response schema reads. The payer is
+# joined into the main query and all participant lists arrive in one extra
+# SELECT, so loading N expenses costs two statements instead of 2N + 1.
+EXPENSE_LOAD_OPTIONS = (
+    joinedload(expense_model.Expense.payer),
+    selectinload(expense_model.Expense.participants),
+    selectinload(expense_model.Expense.shares),
+)
+# Upper bound for the number of IDs in a single IN clause
+ID_CHUNK_SIZE = 500
+
+# The (date, id) sort key of an expense in the newest-first listings
+ExpenseKey = Tuple[datetime.datetime, int]
 
 def get_expense(db: Session, expense_id: int):
     """Retrieves a single expense by its ID."""
-    return db.query(expense_model.Expense).filter(expense_model.Expense.id == expense_id).first()
+    return db.query(expense_model.Expense).options(*EXPENSE_LOAD_OPTIONS).filter(expense_model.Expense.id == expense_id).first()
+
+def get_expenses_by_ids(db: Session, group_id: int, expense_ids: Iterable[int]):
+    """Retrieves the given expenses of a group, newest first."""
+    Expense = expense_model.Expense
+    return (
+        db.query(Expense).options(*EXPENSE_LOAD_OPTIONS)
+        .filter(Expense.group_id == group_id, Expense.id.in_(list(expense_ids)))
+        .order_by(Expense.date.desc(), Expense.id.desc())
+        .all()
+    )
+
+def _group_expenses_query(db: Session, group_id: int, after: Optional[ExpenseKey] = None, columns: Optional[tuple] = None):
+    """
+    Builds the newest-first query over a group's expenses, ordered on (date, id).
+    If `after` is given, only expenses whose key sorts after it are included;
+    the expense it was taken from does not need to exist anymore.
+    With `columns`, those columns are selected instead of Expense objects.
+    """
+    Expense = expense_model.Expense
+    if columns is None:
+        query = db.query(Expense).options(*EXPENSE_LOAD_OPTIONS)
+    else:
+        query = db.query(*columns).select_from(Expense)
+    query = query.filter(Expense.group_id == group_id)
+    if after is not None:
+        after_date, after_id = after
+        query = query.filter(or_(
+            Expense.date < after_date,
+            and_(Expense.date == after_date, Expense.id < after_id),
+        ))
+    return query.order_by(Expense.date.desc(), Expense.id.desc())
+
+def get_expenses_for_group(db: Session, group_id: int, limit: Optional[int] = None, after: Optional[ExpenseKey] = None):
+    """
+    Retrieves the expenses associated with a specific group, newest first.
+    Use `limit` and `after`, the (date, id) of the last expense of the
+    previous page, to page through the history.
+    """
+    query = _group_expenses_query(db, group_id, after=after)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def _member_dict(member_id, nickname, group_id, participant_id) -> dict:
+    return {"nickname": nickname, "id": member_id, "group_id": group_id, "participant_id": participant_id}
 
-def get_expenses_for_group(db: Session, group_id: int):
-    """Retrieves all expenses associated with a specific group."""
-    return db.query(expense_model.Expense).filter(expense_model.Expense.group_id == group_id).order_by(expense_model.Expense.date.desc()).all()
+def get_expense_rows_for_group(db: Session, group_id: int, limit: Optional[int] = None, after: Optional[ExpenseKey] = None) -> List[dict]:
+    """
+    Lean variant of get_expenses_for_group that returns plain dicts shaped like
+    the Expense response schema, built straight from row tuples. Expenses with
+    their payer come from one query and all participant lists from a second
+    one; no ORM objects are created.
+    """
+    Expense = expense_model.Expense
+    Member = group_model.GroupMember
+    query = _group_expenses_query(db, group_id, after=after, columns=(
+        Expense.id, Expense.description, Expense.amount_cents, Expense.date, Expense.group_id, Expense.paid_by_member_id,
+        Expense.split_type, Expense.currency, Expense.original_amount_cents, Member.nickname, Member.group_id, Member.participant_id,
+    )).outerjoin(Member, Member.id == Expense.paid_by_member_id)
+    if limit is not None:
+        query = query.limit(limit)
+
+    expenses, by_id = [], {}
+    for (expense_id, description, amount_cents, date, expense_group_id, payer_id, split_type, currency, original_amount_cents,
+         payer_nickname, payer_group_id, payer_participant_id) in query:
+        expense = {
+            "description": description,
+            "amount": from_cents(amount_cents),
+            "id": expense_id,
+            "date": date,
+            "group_id": expense_group_id,
+            "paid_by_member_id": payer_id,
+            "payer": _member_dict(payer_id, payer_nickname, payer_group_id, payer_participant_id),
+            "participants": [],
+            "split_type": split_type,
+            "shares": [],
+            "currency": currency,
+            "original_amount": from_cents(original_amount_cents),
+        }
+        expenses.append(expense)
+        by_id[expense_id] = expense
+
+    table = expense_model.expense_participants_table
+    participants = (
+        db.query(table.c.expense_id, table.c.share_cents, Member.id, Member.nickname, Member.group_id, Member.participant_id)
+        .join(Member, Member.id == table.c.member_id)
+        .order_by(table.c.expense_id, table.c.member_id)
+    )
+    if limit is None and after is None:
+        # The whole history: filter on the group instead of listing every ID
+        participants = participants.join(Expense, Expense.id == table.c.expense_id).filter(Expense.group_id == group_id)
+        rows = participants.all()
+    else:
+        rows = [
+            row
+            for chunk_start in range(0, len(expenses), ID_CHUNK_SIZE)
+            for row in participants.filter(table.c.expense_id.in_([expense["id"] for expense in expenses[chunk_start:chunk_start + ID_CHUNK_SIZE]]))
+        ]
+    for expense_id, share_cents, *member in rows:
+        by_id[expense_id]["participants"].append(_member_dict(*member))
+        by_id[expense_id]["shares"].append({"member_id": member[0], "amount": from_cents(share_cents)})
+    return expenses
+
+def iter_expenses_for_group(db: Session, group_id: int, batch_size: int = 500):
+    """
+    Yields a group's expenses newest first, fetching them from the database
+    cursor in batches so that only one batch is held in memory at a time.
+    """
+    return _group_expenses_query(db, group_id).yield_per(batch_size)
+
+def _history_query(expense, participants, group_id: int):
+    """Oldest-first (expense, participant share) rows of one expense table; expenses without participants get one row."""
+    return (
+        select(
+            expense.date, expense.id, expense.description, expense.paid_by_member_id, expense.split_type,
+            expense.currency, expense.original_amount_cents, expense.amount_cents,
+            participants.c.member_id, participants.c.share_cents,
+        )
+        .outerjoin(participants, participants.c.expense_id == expense.id)
+        .where(expense.group_id == group_id)
+        .order_by(expense.date, expense.id, participants.c.member_id)
+    )
+
+def iter_history_rows(db: Session, group_id: int, batch_size: int = 1000) -> Iterator[tuple]:
+    """
+    Yields one row per (expense, participant) over a group's whole history,
+    archived and live, oldest first as ordered on (date, id): date, id,
+    description, paid_by_member_id, split_type, currency,
+    original_amount_cents, amount_cents, member_id and share_cents. Both
+    tables are read from streaming cursors in batches and merged on the fly,
+    so memory use does not depend on the size of the history.
+    """
+    live = db.execute(
+        _history_query(expense_model.Expense, expense_model.expense_participants_table, group_id),
+        execution_options={"yield_per": batch_size},
+    )
+    archived = db.execute(
+        _history_query(archive_model.ArchivedExpense, archive_model.archived_expense_participants_table, group_id),
+        execution_options={"yield_per": batch_size},
+    )
+    # An expense is in exactly one of the tables, so its rows stay together
+    return heapq.merge(archived, live, key=lambda row: (row[0], row[1]))
+
+def _insert_participant_links(db: Session, expense_shares: List[tuple]):
+    """Writes the (expense_id, {member_id: share_cents}) links with one executemany."""
+    links = [
+        {"expense_id": expense_id, "member_id": member_id, "share_cents": share_cents}
+        for expense_id, shares in expense_shares
+        for member_id, share_cents in shares.items()
+    ]
+    if links:
+        db.execute(insert(expense_model.expense_participants_table), links)
+
+def _split(amount_cents: int, expense: expense_schema.ExpenseCreate, converted: bool) -> splits.Split:
+    split_type = expense.split_type
+    if converted and split_type == splits.SplitType.exact:
+        # Exact amounts in another currency would not sum to the converted
+        # amount after rounding, so they are allocated as weights instead
+        split_type = splits.SplitType.weights
+    return splits.Split(amount_cents, split_type, expense.participant_member_ids, expense.split_values)
+
+def expense_date(expense: expense_schema.ExpenseCreate, now: datetime.datetime) -> datetime.datetime:
+    """
+    The date an expense is stored with; undated expenses get `now`. It is
+    always set from Python rather than by the column's server default, whose
+    text has no fractional seconds and would not compare equal to the dates
+    bound from pagination cursors.
+    """
+    return expense.date or now
+
+def rate_day(expense: expense_schema.ExpenseCreate) -> datetime.date:
+    """The day whose exchange rate converts the expense; undated expenses use today's."""
+    return (expense.date or datetime.datetime.now(datetime.timezone.utc)).date()
+
+def get_group_currency(db: Session, group_id: int) -> Optional[str]:
+    """Returns the group's currency, or None if the group does not exist."""
+    return db.execute(select(group_model.Group.currency).where(group_model.Group.id == group_id)).scalar()
+
+def convert_amounts(db: Session, group_id: int, expenses: List[expense_schema.ExpenseCreate]):
+    """
+    Returns the group's currency, each expense's currency and its amount in
+    cents both as paid and in the group's currency. The rates are resolved
+    once per (currency, day) for the whole batch; raises fx.MissingRateError.
+    """
+    group_currency = get_group_currency(db, group_id)
+    currencies = [expense.currency or group_currency for expense in expenses]
+    original_cents = [to_cents(expense.amount) for expense in expenses]
+    amounts_cents = fx.get_rates().convert_batch(original_cents, currencies, [rate_day(expense) for expense in expenses], group_currency)
+    return group_currency, currencies, original_cents, amounts_cents
 
 def create_expense(db: Session, expense: expense_schema.ExpenseCreate):
-    """Creates a new expense record."""
+    """
+    Creates a new expense record, converted into the group's currency, and
+    books it into the balance ledger without committing.
+    """
+    group_currency, (currency,), (original_cents,), (amount_cents,) = convert_amounts(db, expense.group_id, [expense])
     db_expense = expense_model.Expense(
         description=expense.description,
-        amount=expense.amount,
+        amount_cents=amount_cents,
+        currency=currency,
+        original_amount_cents=original_cents,
         group_id=expense.group_id,
-        paid_by_member_id=expense.paid_by_member_id
+        paid_by_member_id=expense.paid_by_member_id,
+        split_type=expense.split_type.value,
+        date=expense_date(expense, datetime.datetime.now(datetime.timezone.utc)),
     )
     db.add(db_expense)
-    db.commit()
-    db.refresh(db_expense)
-
-    # Link participants to the expense
-    for member_id in expense.participant_member_ids:
-        member = crud_group.get_member(db, member_id=member_id)
-        if member:
-            db_expense.participants.append(member)
-    
-    db.commit()
-    db.refresh(db_expense)
-    return db_expense
+    db.flush()
+
+    # Link participants to the expense with their exact shares
+    shares = splits.compute_shares([_split(amount_cents, expense, currency != group_currency)])[0]
+    _insert_participant_links(db, [(db_expense.id, shares)])
+
+    crud_balance.apply_deltas(db, crud_balance.split_deltas(amount_cents, expense.paid_by_member_id, shares))
+    crud_summary.apply_expenses(db, expense.group_id, amount_cents, 1)
+    crud_change.record_changes(db, expense.group_id, crud_change.EXPENSE, [db_expense.id])
+    return get_expense(db, db_expense.id)
+
+def create_expenses_bulk(db: Session, group_id: int, expenses: List[expense_schema.ExpenseCreate]) -> List[int]:
+    """
+    Inserts many already validated expenses of one group without committing.
+    Expenses and participant links are written with executemany and the ledger
+    is updated once per affected member. Amounts are converted into the
+    group's currency in one batch. Returns the new IDs in input order.
+    """
+    Expense = expense_model.Expense
+    group_currency, currencies, original_cents, amounts_cents = convert_amounts(db, group_id, expenses)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    rows = [
+        {
+            "description": expense.description,
+            "amount_cents": amount_cents,
+            "currency": currency,
+            "original_amount_cents": original_amount_cents,
+            "date": expense_date(expense, now),
+            "group_id": group_id,
+            "paid_by_member_id": expense.paid_by_member_id,
+            "split_type": expense.split_type.value,
+        }
+        for expense, amount_cents, currency, original_amount_cents in zip(expenses, amounts_cents, currencies, original_cents)
+    ]
+    expense_ids = list(db.execute(insert(Expense).returning(Expense.id, sort_by_parameter_order=True), rows).scalars())
+
+    # Shares and ledger deltas of the whole batch are computed in one pass each
+    all_shares = splits.compute_shares([
+        _split(amount_cents, expense, currency != group_currency)
+        for amount_cents, currency, expense in zip(amounts_cents, currencies, expenses)
+    ])
+    _insert_participant_links(db, list(zip(expense_ids, all_shares)))
+
+    deltas = splits.net_deltas(amounts_cents, [expense.paid_by_member_id for expense in expenses], all_shares)
+    crud_balance.apply_deltas(db, deltas)
+    crud_summary.apply_expenses(db, group_id, sum(amounts_cents), len(expense_ids))
+    crud_change.record_changes(db, group_id, crud_change.EXPENSE, expense_ids)
+    return expense_ids
 
 def delete_expense(db: Session, expense_id: int):
-    """Deletes an expense from the database."""
-    db_expense = db.query(expense_model.Expense).filter(expense_model.Expense.id == expense_id).first()
+    """Deletes an expense from the database and reverts its ledger entries without committing."""
+    db_expense = get_expense(db, expense_id)
     if db_expense:
+        crud_balance.revert_expense(db, db_expense)
+        crud_summary.apply_expenses(db, db_expense.group_id, -db_expense.amount_cents, -1)
+        crud_change.record_changes(db, db_expense.group_id, crud_change.EXPENSE, [expense_id], deleted=True)
         db.delete(db_expense)
-        db.commit()
+        db.flush()
     return db_expense
 
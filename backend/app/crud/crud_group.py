@@ -1,60 +1,73 @@
 """
 CRUD operations for Group and GroupMember models.
+
+Write functions only flush; the caller commits the unit of work.
 """
 import uuid
-from sqlalchemy.orm import Session
+from typing import Iterable, Set
+from sqlalchemy.orm import Session, selectinload
 from app.models import group as group_model
-from app.models import participant as participant_model
 from app.schemas import group as group_schema
+from app.crud import crud_change
+
+# The Group response schema lists the members, so load them alongside the group
+GROUP_LOAD_OPTIONS = (selectinload(group_model.Group.members),)
 
 def get_group(db: Session, group_id: int):
     """Retrieves a single group by its ID."""
-    return db.query(group_model.Group).filter(group_model.Group.id == group_id).first()
+    return db.query(group_model.Group).options(*GROUP_LOAD_OPTIONS).filter(group_model.Group.id == group_id).first()
 
 def get_group_by_invite_code(db: Session, invite_code: str):
     """Retrieves a single group by its unique invite code."""
-    return db.query(group_model.Group).filter(group_model.Group.invite_code == invite_code).first()
+    return db.query(group_model.Group).options(*GROUP_LOAD_OPTIONS).filter(group_model.Group.invite_code == invite_code).first()
 
 def get_groups_for_participant(db: Session, participant_id: int):
     """Retrieves all groups a participant is a member of."""
-    return db.query(group_model.Group).join(group_model.GroupMember).filter(group_model.GroupMember.participant_id == participant_id).all()
+    return db.query(group_model.Group).options(*GROUP_LOAD_OPTIONS).join(group_model.GroupMember).filter(group_model.GroupMember.participant_id == participant_id).all()
 
-def create_group_with_member(db: Session, group: group_schema.GroupCreate, participant: participant_model.Participant, nickname: str):
-    """Creates a new group and adds the first member."""
+def create_group_with_member(db: Session, group: group_schema.GroupCreate, participant_id: int, nickname: str):
+    """Creates a new group and adds the first member without committing."""
     # Create the group
     db_group = group_model.Group(
         name=group.name,
+        currency=group.currency,
         invite_code=str(uuid.uuid4())
     )
     db.add(db_group)
-    db.commit()
-    db.refresh(db_group)
+    db.flush()
 
     # Add the creator as a member
-    add_member_to_group(db, group_id=db_group.id, participant_id=participant.id, nickname=nickname)
-    db.refresh(db_group)
-    return db_group
+    add_member_to_group(db, group_id=db_group.id, participant_id=participant_id, nickname=nickname)
+    return get_group(db, db_group.id)
 
 def add_member_to_group(db: Session, group_id: int, participant_id: int, nickname: str):
-    """Adds a participant to a group."""
+    """Adds a participant to a group without committing."""
     db_member = group_model.GroupMember(
         group_id=group_id,
         participant_id=participant_id,
         nickname=nickname
     )
     db.add(db_member)
-    db.commit()
-    db.refresh(db_member)
+    db.flush()
+    crud_change.record_changes(db, group_id, crud_change.MEMBER, [db_member.id])
     return db_member
 
 def get_group_members(db: Session, group_id: int):
     """Retrieves all members of a specific group."""
     return db.query(group_model.GroupMember).filter(group_model.GroupMember.group_id == group_id).all()
 
+def get_members_by_ids(db: Session, group_id: int, member_ids: Iterable[int]):
+    """Retrieves the given members of a group."""
+    return db.query(group_model.GroupMember).filter(group_model.GroupMember.group_id == group_id, group_model.GroupMember.id.in_(list(member_ids))).all()
+
 def get_member(db: Session, member_id: int):
     """Retrieves a group member by their unique member ID."""
     return db.query(group_model.GroupMember).filter(group_model.GroupMember.id == member_id).first()
 
+def get_member_ids_for_group(db: Session, group_id: int) -> Set[int]:
+    """Retrieves the IDs of all members of a group in a single query."""
+    return {member_id for (member_id,) in db.query(group_model.GroupMember.id).filter(group_model.GroupMember.group_id == group_id)}
+
 def get_member_by_participant_id(db: Session, group_id: int, participant_id: int):
     """Retrieves a group member by group and participant ID."""
     return db.query(group_model.GroupMember).filter(group_model.GroupMember.group_id == group_id, group_model.GroupMember.participant_id == participant_id).first()
@@ -1,9 +1,19 @@
 """
 CRUD operations for the Participant model.
+
+Write functions only flush; the caller commits the unit of work.
 """
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 from app.models import participant as participant_model
 
+# INSERT constructs of the dialects that support ON CONFLICT DO NOTHING RETURNING
+UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
 def get_participant_by_client_id(db: Session, client_id: str):
     """Retrieves a participant by their client_id (UUID from browser)."""
     return db.query(participant_model.Participant).filter(participant_model.Participant.client_id == client_id).first()
@@ -12,8 +22,7 @@ def create_participant(db: Session, client_id: str):
     """Creates a new participant record."""
     db_participant = participant_model.Participant(client_id=client_id)
     db.add(db_participant)
-    db.commit()
-    db.refresh(db_participant)
+    db.flush()
     return db_participant
 
 def get_or_create_participant(db: Session, client_id: str):
@@ -26,3 +35,26 @@ def get_or_create_participant(db: Session, client_id: str):
         db_participant = create_participant(db, client_id)
     return db_participant
 
+def upsert_participant_id(db: Session, client_id: str) -> int:
+    """
+    Returns the ID of the participant with `client_id`, creating it if needed.
+
+    Creation is a single INSERT ... ON CONFLICT DO NOTHING RETURNING, so two
+    concurrent first requests from the same browser cannot both insert and
+    hit the unique constraint. Only when the participant already existed is
+    its ID read with a second statement.
+    """
+    insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if insert is None:
+        return get_or_create_participant(db, client_id).id
+
+    table = participant_model.Participant.__table__
+    participant_id = db.execute(
+        insert(table)
+        .values(client_id=client_id)
+        .on_conflict_do_nothing(index_elements=[table.c.client_id])
+        .returning(table.c.id)
+    ).scalar()
+    if participant_id is None:
+        participant_id = db.execute(select(table.c.id).where(table.c.client_id == client_id)).scalar_one()
+    return participant_id
@@ -0,0 +1,87 @@
+"""
+CRUD operations for the materialized per-group summary.
+
+Each Group carries its total spend, expense count and last activity time,
+which the expense write paths adjust in the same transaction as the
+expenses themselves. Listing a participant's groups with their summaries
+therefore costs one query instead of a balance computation per group.
+Write functions only flush; the caller commits the unit of work.
+"""
+from typing import List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models import group as group_model
+from app.models import expense as expense_model
+from app.crud.crud_group import GROUP_LOAD_OPTIONS
+from app.crud import crud_checkpoint
+
+def apply_expenses(db: Session, group_id: int, amount_cents: int, count: int):
+    """
+    Adds `count` expenses totalling `amount_cents` to the group's summary and
+    marks it as active now. Pass negative values when expenses are deleted.
+    """
+    Group = group_model.Group
+    db.query(Group).filter(Group.id == group_id).update(
+        {
+            Group.total_spent_cents: Group.total_spent_cents + amount_cents,
+            Group.expense_count: Group.expense_count + count,
+            Group.last_activity_at: func.now(),
+        },
+        synchronize_session=False
+    )
+
+def get_groups_with_summary_for_participant(db: Session, participant_id: int) -> List[tuple]:
+    """
+    Retrieves all groups a participant is a member of together with that
+    participant's net balance in cents, as (group, balance_cents) pairs.
+    """
+    GroupMember = group_model.GroupMember
+    return (
+        db.query(group_model.Group, GroupMember.balance_cents)
+        .options(*GROUP_LOAD_OPTIONS)
+        .join(GroupMember)
+        .filter(GroupMember.participant_id == participant_id)
+        .all()
+    )
+
+def get_positions_for_participant(db: Session, participant_id: int) -> List[tuple]:
+    """
+    Returns the participant's net position in every group they belong to as
+    (group_id, group_name, currency, member_id, balance_cents) rows, from a
+    single query over the ledger however many groups there are.
+    """
+    Group, GroupMember = group_model.Group, group_model.GroupMember
+    return (
+        db.query(Group.id, Group.name, Group.currency, GroupMember.id, GroupMember.balance_cents)
+        .join(GroupMember, GroupMember.group_id == Group.id)
+        .filter(GroupMember.participant_id == participant_id)
+        .order_by(Group.id)
+        .all()
+    )
+
+def reconcile_summary(db: Session, group_id: int, fix: bool = True) -> Optional[dict]:
+    """
+    Compares the stored summary of a group against its expenses, including
+    those archived by checkpoints. Returns the stored and expected totals if
+    they differ and, if `fix` is set, overwrites the stored ones. The caller
+    commits.
+    """
+    Expense = expense_model.Expense
+    total, count = db.query(func.coalesce(func.sum(Expense.amount_cents), 0), func.count(Expense.id)).filter(Expense.group_id == group_id).one()
+    archived_total, archived_count = crud_checkpoint.get_archived_totals(db, group_id)
+    total, count = total + archived_total, count + archived_count
+    group = db.get(group_model.Group, group_id)
+    if group is None or (group.total_spent_cents, group.expense_count) == (total, count):
+        return None
+    drift = {
+        "group_id": group_id,
+        "stored_cents": group.total_spent_cents,
+        "expected_cents": total,
+        "stored_count": group.expense_count,
+        "expected_count": count,
+    }
+    if fix:
+        group.total_spent_cents = total
+        group.expense_count = count
+        db.flush()
+    return drift
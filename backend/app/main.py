@@ -1,37 +1,48 @@
 """
 Main application file for the FastAPI backend.
 Initializes the FastAPI app, includes routers, sets up CORS,
-and defines the startup event to create database tables.
+and defines the startup event that checks the database schema.
 """
 import os
 from dotenv import load_dotenv
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # Load environment variables
 load_dotenv()
 
 # Ensure all models are imported before initializing the database
-# This is crucial for Base.metadata.create_all() to work correctly
-from app.models.database import engine, Base
+from app.models.database import engine, async_engine
 from app.models.participant import Participant
 from app.models.group import Group, GroupMember
 from app.models.expense import Expense
+from app.models.archive import GroupCheckpoint, ArchivedExpense
 
-from app.api import groups, expenses
+from app.api import groups, expenses, events, exports, participants
+from app.services.cache import group_cache, participant_cache
+from app.migrations import verify_schema
+from app.services.serialization import FAST_SERIALIZATION, FastJSONResponse
+from app.services import admission, metrics, statement
 
-# Create all database tables on startup
-def create_tables():
-    """Creates all database tables defined in the models."""
-    Base.metadata.create_all(bind=engine)
-
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse if FAST_SERIALIZATION else JSONResponse)
 
 # Event handler for application startup
 @app.on_event("startup")
 def on_startup():
     """Function to run on application startup."""
-    create_tables()
+    # Tables are created by `python -m app.cli migrate`; this only checks the revision
+    verify_schema(engine)
+
+@app.on_event("shutdown")
+def on_shutdown():
+    """Stops the export worker processes."""
+    statement.shutdown_export_pool()
+
+# Per-client rate limits and load shedding; added before CORS so that
+# rejections carry the CORS headers as well
+if admission.RATE_LIMIT_ENABLED:
+    app.add_middleware(admission.AdmissionMiddleware)
 
 # Configure CORS (Cross-Origin Resource Sharing)
 app.add_middleware(
@@ -40,13 +51,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Content-Disposition", "Retry-After"],
 )
 
+# Request and SQL instrumentation, only installed when enabled
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.instrument_engine(engine)
+    if async_engine is not None:
+        metrics.instrument_engine(async_engine.sync_engine)
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def read_metrics():
+        """Request latency, SQL statement, slow query and rejection metrics in the Prometheus text format."""
+        return PlainTextResponse(metrics.render_prometheus() + admission.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 # Include API routers
 app.include_router(groups.router)
 app.include_router(expenses.router)
+app.include_router(events.router)
+app.include_router(participants.router)
+app.include_router(exports.router)
 
 @app.get("/")
 def read_root():
     """Root endpoint for the API."""
     return {"message": "Welcome to the SplitShare API"}
+
+@app.get("/cache/stats")
+def read_cache_stats():
+    """Hit/miss counters of the group response cache and the participant ID cache."""
+    return {"groups": group_cache.stats(), "participants": participant_cache.stats()}
+
+@app.get("/admission/stats")
+def read_admission_stats():
+    """Requests rejected by the rate limits and the load shedding, and the limiter's state."""
+    return admission.stats()
@@ -0,0 +1,183 @@
+"""
+Schema migrations.
+
+The schema is managed by Alembic (see backend/alembic). `migrate` brings a
+database to the latest revision and is run explicitly through
+`python -m app.cli migrate`; the app itself only checks the revision on
+startup with `verify_schema`.
+
+Databases created before migrations were introduced were built with
+`Base.metadata.create_all()`. They are upgraded to the baseline revision with
+the idempotent helpers at the bottom of this module and then stamped.
+"""
+import os
+from functools import lru_cache
+from typing import List, Optional
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.models.database import Base
+from app.services.money import to_cents, split_evenly
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+# The revision describing the schema of databases created by create_all()
+BASELINE_REVISION = "0001"
+# Indexes that were added to create_all() databases before the baseline revision
+BASELINE_INDEXES = ("ix_expenses_group_id_date", "ix_expense_participants_member_id")
+
+class SchemaVersionError(RuntimeError):
+    """Raised when the database is not at the revision the code expects."""
+
+def _alembic_config(connection=None) -> Config:
+    config = Config(ALEMBIC_INI)
+    config.attributes["connection"] = connection
+    config.attributes["configure_logger"] = False
+    return config
+
+@lru_cache(maxsize=None)
+def get_head_revision() -> str:
+    """Returns the latest revision of the migration scripts."""
+    return ScriptDirectory.from_config(_alembic_config()).get_current_head()
+
+def get_current_revision(connection) -> Optional[str]:
+    """Returns the revision the database is stamped with, or None."""
+    return MigrationContext.configure(connection).get_current_revision()
+
+def verify_schema(engine: Engine):
+    """Checks in a single query that the database is at the latest revision."""
+    with engine.connect() as connection:
+        current = get_current_revision(connection)
+    head = get_head_revision()
+    if current != head:
+        raise SchemaVersionError(
+            f"Database schema is at revision {current or 'none'}, expected {head}. "
+            f"Run `python -m app.cli migrate` to upgrade it."
+        )
+
+def migrate(engine: Engine) -> dict:
+    """
+    Upgrades the database to the latest revision. A database created by
+    create_all() is first brought to the baseline schema and stamped.
+    Returns the revisions before and after, and whether it was adopted.
+    """
+    with engine.connect() as connection:
+        current = get_current_revision(connection)
+        adopt = current is None and inspect(connection).has_table("groups")
+
+    if adopt:
+        convert_amounts_to_cents(engine)
+        create_missing_indexes(engine, names=BASELINE_INDEXES)
+        with engine.begin() as connection:
+            command.stamp(_alembic_config(connection), BASELINE_REVISION)
+
+    with engine.begin() as connection:
+        command.upgrade(_alembic_config(connection), "head")
+        head = get_current_revision(connection)
+    return {"from": current, "to": head, "adopted": adopt}
+
+def _columns(connection, table_name: str) -> set:
+    return {column["name"] for column in inspect(connection).get_columns(table_name)}
+
+def convert_amounts_to_cents(engine: Engine) -> dict:
+    """
+    Converts float amounts and balances to integer cents.
+
+    Copies `expenses.amount` into `expenses.amount_cents`, stores every
+    participant's exact share in `expense_participants.share_cents`, rebuilds
+    `group_members.balance_cents` from the history and drops the old float
+    columns. Runs in a single transaction. Returns counts of converted rows.
+    """
+    summary = {"expenses": 0, "shares": 0, "groups": 0}
+    with engine.begin() as connection:
+        expense_columns = _columns(connection, "expenses")
+        if "amount_cents" not in expense_columns:
+            connection.execute(text("ALTER TABLE expenses ADD COLUMN amount_cents INTEGER"))
+        if "amount" in expense_columns:
+            rows = connection.execute(text("SELECT id, amount FROM expenses WHERE amount_cents IS NULL")).all()
+            if rows:
+                connection.execute(
+                    text("UPDATE expenses SET amount_cents = :amount_cents WHERE id = :id"),
+                    [{"id": expense_id, "amount_cents": to_cents(amount or 0)} for expense_id, amount in rows],
+                )
+            summary["expenses"] = len(rows)
+
+        if "share_cents" not in _columns(connection, "expense_participants"):
+            connection.execute(text("ALTER TABLE expense_participants ADD COLUMN share_cents INTEGER NOT NULL DEFAULT 0"))
+            # Re-split every expense between its participants with the exact allocation
+            participants = {}
+            for expense_id, member_id in connection.execute(text("SELECT expense_id, member_id FROM expense_participants")):
+                participants.setdefault(expense_id, []).append(member_id)
+            amounts = dict(connection.execute(text("SELECT id, amount_cents FROM expenses")).all())
+            updates = [
+                {"expense_id": expense_id, "member_id": member_id, "share_cents": share_cents}
+                for expense_id, member_ids in participants.items()
+                for member_id, share_cents in split_evenly(amounts.get(expense_id) or 0, member_ids).items()
+            ]
+            if updates:
+                connection.execute(
+                    text("UPDATE expense_participants SET share_cents = :share_cents WHERE expense_id = :expense_id AND member_id = :member_id"),
+                    updates,
+                )
+            summary["shares"] = len(updates)
+
+        member_columns = _columns(connection, "group_members")
+        if "balance_cents" not in member_columns:
+            connection.execute(text("ALTER TABLE group_members ADD COLUMN balance_cents INTEGER NOT NULL DEFAULT 0"))
+            # The float ledger cannot be converted exactly, so rebuild it from the history
+            balances = _legacy_balances_from_history(connection)
+            if balances:
+                connection.execute(
+                    text("UPDATE group_members SET balance_cents = :balance_cents WHERE id = :id"),
+                    [{"id": member_id, "balance_cents": balance_cents} for member_id, balance_cents in balances.items()],
+                )
+            summary["groups"] = connection.execute(text("SELECT COUNT(*) FROM groups")).scalar()
+
+        if "amount" in expense_columns:
+            connection.execute(text("ALTER TABLE expenses DROP COLUMN amount"))
+        if "balance" in member_columns:
+            connection.execute(text("ALTER TABLE group_members DROP COLUMN balance"))
+    return summary
+
+def _legacy_balances_from_history(connection) -> dict:
+    """
+    Net balance in cents of every member of a create_all() database, from
+    its expense history. Unlike `crud_balance.compute_balances_from_history`
+    it only reads the tables of the baseline schema, which has no
+    checkpoints yet.
+    """
+    balances = {}
+    # Expenses without participants do not affect any balance
+    paid = connection.execute(text(
+        "SELECT paid_by_member_id, SUM(amount_cents) FROM expenses "
+        "WHERE EXISTS (SELECT 1 FROM expense_participants WHERE expense_participants.expense_id = expenses.id) "
+        "GROUP BY paid_by_member_id"
+    ))
+    for member_id, total in paid:
+        if member_id is not None:
+            balances[member_id] = balances.get(member_id, 0) + (total or 0)
+    owed = connection.execute(text("SELECT member_id, SUM(share_cents) FROM expense_participants GROUP BY member_id"))
+    for member_id, total in owed:
+        balances[member_id] = balances.get(member_id, 0) - (total or 0)
+    return balances
+
+def create_missing_indexes(engine: Engine, names=None) -> List[str]:
+    """
+    Creates the indexes declared on the models that the database lacks,
+    limited to `names` if given. Returns the names of the created indexes.
+    """
+    created = []
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name not in existing and (names is None or index.name in names):
+                    index.create(connection)
+                    created.append(index.name)
+    return created
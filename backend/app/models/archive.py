@@ -0,0 +1,86 @@
+"""
+Database models for settle-up checkpoints and the archived expense history.
+
+A checkpoint stores every member's balance at the time a group settled up
+and moves the group's expenses up to that point out of `expenses` and
+`expense_participants` into the archive tables below, which have the same
+columns. Balances are then the latest checkpoint plus the live expenses.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.models.database import Base
+from app.services.money import from_cents
+
+class GroupCheckpoint(Base):
+    """A settle-up of a group, covering all expenses archived with it."""
+    __tablename__ = "group_checkpoints"
+
+    id = Column(Integer, primary_key=True)
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expense_count = Column(Integer, nullable=False, default=0)
+    total_cents = Column(Integer, nullable=False, default=0)
+
+    balances = relationship("CheckpointBalance", order_by="CheckpointBalance.member_id")
+
+    @property
+    def total(self) -> float:
+        return from_cents(self.total_cents)
+
+class CheckpointBalance(Base):
+    """A member's net balance in cents at a checkpoint."""
+    __tablename__ = "checkpoint_balances"
+
+    checkpoint_id = Column(Integer, ForeignKey("group_checkpoints.id"), primary_key=True)
+    member_id = Column(Integer, ForeignKey("group_members.id"), primary_key=True)
+    balance_cents = Column(Integer, nullable=False)
+
+    @property
+    def balance(self) -> float:
+        return from_cents(self.balance_cents)
+
+# Rows moved out of expense_participants; expense_id refers to archived_expenses
+archived_expense_participants_table = Table('archived_expense_participants', Base.metadata,
+    Column('expense_id', Integer, ForeignKey('archived_expenses.id'), primary_key=True),
+    Column('member_id', Integer, ForeignKey('group_members.id'), primary_key=True),
+    Column('share_cents', Integer, nullable=False, default=0)
+)
+
+class ArchivedExpense(Base):
+    """An expense moved out of the live tables by a checkpoint; keeps its original ID."""
+    __tablename__ = "archived_expenses"
+
+    id = Column(Integer, primary_key=True)
+    description = Column(String)
+    amount_cents = Column(Integer, nullable=False)
+    currency = Column(String(3), nullable=False)
+    original_amount_cents = Column(Integer, nullable=False)
+    split_type = Column(String, nullable=False, default="equal")
+    date = Column(DateTime(timezone=True))
+    group_id = Column(Integer, ForeignKey("groups.id"))
+    paid_by_member_id = Column(Integer, ForeignKey("group_members.id"))
+    checkpoint_id = Column(Integer, ForeignKey("group_checkpoints.id"), nullable=False)
+
+    payer = relationship("GroupMember", foreign_keys=[paid_by_member_id], viewonly=True)
+    participants = relationship("GroupMember", secondary=archived_expense_participants_table, viewonly=True)
+    shares = relationship("ArchivedExpenseShare", viewonly=True, order_by="ArchivedExpenseShare.member_id")
+
+    # Serves the paginated archive listing, like ix_expenses_group_id_date does for live expenses
+    __table_args__ = (Index('ix_archived_expenses_group_id_date', 'group_id', 'date'),)
+
+    @property
+    def amount(self) -> float:
+        return from_cents(self.amount_cents)
+
+    @property
+    def original_amount(self) -> float:
+        return from_cents(self.original_amount_cents)
+
+class ArchivedExpenseShare(Base):
+    """Read-only view of one participant's share of an archived expense."""
+    __table__ = archived_expense_participants_table
+
+    @property
+    def amount(self) -> float:
+        return from_cents(self.share_cents)
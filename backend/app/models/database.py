@@ -1,26 +1,162 @@
 """
 Database setup using SQLAlchemy.
 Defines the database engine, session, and a base class for declarative models.
+
+Requests reach the database through the `Database` handle yielded by `get_db`.
+Each request is one unit of work: CRUD functions only flush, and the endpoint
+commits once with `Database.commit` after all its writes.
+With DATABASE_ASYNC enabled it wraps an AsyncSession on an async driver
+(aiosqlite / asyncpg); otherwise it wraps a regular Session whose work is
+moved to the threadpool. The sync engine is always available for the CLI,
+migrations and streaming responses.
 """
 import os
-from sqlalchemy import create_engine
+from typing import Dict, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "false").lower() in ("1", "true", "yes")
+
+# Async drivers used when DATABASE_ASYNC is on and ASYNC_DATABASE_URL is not set
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# SQLite connection settings, applied to every new connection. WAL lets
+# readers proceed while a write is in progress, synchronous=NORMAL only
+# fsyncs at checkpoints (safe in WAL mode), and busy_timeout makes writers
+# wait for the lock instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    # Negative values are in KiB, so this is a 64 MiB page cache per connection
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+# Connection pool sizes per backend. SQLite serializes writers anyway, so a
+# small pool suffices; server databases get a larger one with pre-ping so
+# connections dropped by the server are replaced transparently.
+POOL_DEFAULTS = {
+    "sqlite": {"pool_size": 5, "max_overflow": 10},
+    "postgresql": {"pool_size": 10, "max_overflow": 20, "pool_pre_ping": True, "pool_recycle": 1800},
+}
+
+def _set_sqlite_pragmas(pragmas: Dict[str, object]):
+    """Returns a connect event listener applying the given PRAGMAs."""
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return on_connect
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def engine_options(database_url: str) -> dict:
+    """Returns the create_engine keyword arguments suited to the database backend."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    options = {}
+    if backend == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        # In-memory databases live in a single connection and cannot be pooled
+        if url.database in (None, "", ":memory:"):
+            return options
+    pool = dict(POOL_DEFAULTS.get(backend, {}))
+    for option, variable in (("pool_size", "DB_POOL_SIZE"), ("max_overflow", "DB_MAX_OVERFLOW")):
+        if os.getenv(variable):
+            pool[option] = int(os.getenv(variable))
+    options.update(pool)
+    return options
+
+def configure_engine(engine: Engine, sqlite_pragmas: Optional[Dict[str, object]] = None) -> Engine:
+    """Registers the per-connection setup of `engine`, which may be the sync_engine of an async engine."""
+    if engine.dialect.name == "sqlite":
+        pragmas = SQLITE_PRAGMAS if sqlite_pragmas is None else sqlite_pragmas
+        if engine.url.database in (None, "", ":memory:"):
+            # WAL and mmap do not apply to in-memory databases
+            pragmas = {name: value for name, value in pragmas.items() if name not in ("journal_mode", "mmap_size")}
+        event.listen(engine, "connect", _set_sqlite_pragmas(pragmas))
+    return engine
+
+def create_db_engine(database_url: str, sqlite_pragmas: Optional[Dict[str, object]] = None, **overrides) -> Engine:
+    """
+    Creates a sync engine with pool settings and, for SQLite, connection
+    PRAGMAs suited to the backend. Pass `sqlite_pragmas={}` to keep SQLite's
+    own defaults, and keyword arguments to override create_engine options.
+    """
+    return configure_engine(
+        create_engine(database_url, **{**engine_options(database_url), **overrides}), sqlite_pragmas
+    )
+
+engine = create_db_engine(DATABASE_URL)
+# Objects must stay readable after the request commits, without reloading them
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 Base = declarative_base()
 
-def get_db():
-    """Dependency to get a DB session for each request."""
-    db = SessionLocal()
+def get_async_database_url(database_url: str) -> str:
+    """Derives the async driver URL from a sync DATABASE_URL."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' databases; set ASYNC_DATABASE_URL.")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+async_engine = None
+AsyncSessionLocal = None
+if DATABASE_ASYNC:
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or get_async_database_url(DATABASE_URL)
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+    configure_engine(async_engine.sync_engine)
+    # Objects must stay readable after commit, since lazy loads cannot run outside run_sync
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+class Database:
+    """
+    Request-scoped database handle that works the same with either engine.
+
+    CRUD functions are plain functions taking a Session as their first
+    argument. `run` executes one inside AsyncSession.run_sync on the async
+    engine, or in the threadpool on the sync engine, so the event loop is
+    never blocked and the CRUD layer has a single implementation. Results
+    must be fully loaded before they leave `run`.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.is_async = isinstance(session, AsyncSession)
+
+    async def run(self, fn, *args, **kwargs):
+        """Calls `fn(session, *args, **kwargs)` and returns its result."""
+        if self.is_async:
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+    async def commit(self):
+        """Commits the request's unit of work."""
+        if self.is_async:
+            await self.session.commit()
+        else:
+            await run_in_threadpool(self.session.commit)
+
+    async def close(self):
+        if self.is_async:
+            await self.session.close()
+        else:
+            await run_in_threadpool(self.session.close)
+
+async def get_db():
+    """Dependency to get a DB handle for each request."""
+    db = Database(AsyncSessionLocal() if DATABASE_ASYNC else SessionLocal())
     try:
         yield db
     finally:
-        db.close()
-
+        await db.close()
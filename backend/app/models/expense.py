@@ -1,15 +1,19 @@
 """
 Database models for Expense and its participants.
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.database import Base
+from app.services.money import from_cents
 
-# Association table for the many-to-many relationship between Expense and GroupMember
+# Association table for the many-to-many relationship between Expense and GroupMember.
+# share_cents is the part of the expense amount owed by that participant.
 expense_participants_table = Table('expense_participants', Base.metadata,
     Column('expense_id', Integer, ForeignKey('expenses.id'), primary_key=True),
-    Column('member_id', Integer, ForeignKey('group_members.id'), primary_key=True)
+    # Indexed on its own for lookups by member; the primary key only covers lookups by expense
+    Column('member_id', Integer, ForeignKey('group_members.id'), primary_key=True, index=True),
+    Column('share_cents', Integer, nullable=False, default=0)
 )
 
 class Expense(Base):
@@ -18,7 +22,13 @@ class Expense(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     description = Column(String)
-    amount = Column(Float)
+    # Stored in integer cents of the group's currency; see app.services.money
+    amount_cents = Column(Integer, nullable=False)
+    # The amount as paid, in cents of the expense's own currency
+    currency = Column(String(3), nullable=False)
+    original_amount_cents = Column(Integer, nullable=False)
+    # How the amount was split between the participants; see app.services.splits
+    split_type = Column(String, nullable=False, default="equal", server_default="equal")
     date = Column(DateTime(timezone=True), server_default=func.now())
     
     group_id = Column(Integer, ForeignKey("groups.id"))
@@ -28,4 +38,28 @@ class Expense(Base):
     payer = relationship("GroupMember", back_populates="paid_expenses", foreign_keys=[paid_by_member_id])
 
     participants = relationship("GroupMember", secondary=expense_participants_table)
+    # The same association rows with their shares; written through expense_participants_table
+    shares = relationship("ExpenseShare", viewonly=True, order_by="ExpenseShare.member_id")
 
+    # Serves the per-group listing, which filters on group_id and sorts by date
+    # AUTOINCREMENT stops SQLite from reusing the IDs of expenses moved to the archive
+    __table_args__ = (Index('ix_expenses_group_id_date', 'group_id', 'date'), {'sqlite_autoincrement': True})
+
+    @property
+    def amount(self) -> float:
+        """The expense amount in currency units, as exposed by the API."""
+        return from_cents(self.amount_cents)
+
+    @property
+    def original_amount(self) -> float:
+        """The amount as paid, in units of the expense's currency."""
+        return from_cents(self.original_amount_cents)
+
+class ExpenseShare(Base):
+    """Read-only view of one participant's share of an expense."""
+    __table__ = expense_participants_table
+
+    @property
+    def amount(self) -> float:
+        """The share in currency units, as exposed by the API."""
+        return from_cents(self.share_cents)
@@ -1,9 +1,11 @@
 """
 Database models for Group and GroupMember.
 """
-from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy import Boolean, Column, DateTime, Integer, String, ForeignKey, UniqueConstraint, Index
+from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.models.database import Base
+from app.services.fx import DEFAULT_CURRENCY
 
 class Group(Base):
     """Represents a group of participants."""
@@ -12,6 +14,14 @@ class Group(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     invite_code = Column(String, unique=True, index=True)
+    # Currency that balances and expense amounts are kept in; see app.services.fx
+    currency = Column(String(3), nullable=False, default=DEFAULT_CURRENCY, server_default=DEFAULT_CURRENCY)
+    # Sequence number of the group's latest change, see GroupChange
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0")
+    # Running totals over the group's expenses, maintained by the expense write paths (see crud_summary)
+    total_spent_cents = Column(Integer, nullable=False, default=0, server_default="0")
+    expense_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_activity_at = Column(DateTime(timezone=True), server_default=func.now())
 
     members = relationship("GroupMember", back_populates="group", cascade="all, delete-orphan")
     expenses = relationship("Expense", back_populates="group", cascade="all, delete-orphan")
@@ -23,7 +33,10 @@ class GroupMember(Base):
     id = Column(Integer, primary_key=True, index=True)
     nickname = Column(String)
     group_id = Column(Integer, ForeignKey("groups.id"))
-    participant_id = Column(Integer, ForeignKey("participants.id"))
+    # Indexed for the per-participant listings; the unique constraint leads with group_id
+    participant_id = Column(Integer, ForeignKey("participants.id"), index=True)
+    # Running net balance in cents, maintained by the expense write paths (see crud_balance)
+    balance_cents = Column(Integer, nullable=False, default=0, server_default="0")
 
     group = relationship("Group", back_populates="members")
     participant = relationship("Participant", back_populates="memberships")
@@ -32,3 +45,22 @@ class GroupMember(Base):
 
     __table_args__ = (UniqueConstraint('group_id', 'participant_id', name='_group_participant_uc'),)
 
+class GroupChange(Base):
+    """
+    One entry of a group's change log. Every write to a group takes the next
+    value of Group.change_seq and records the expenses and members it inserted
+    or deleted under it, so clients can fetch only what changed since the
+    sequence number they last saw.
+    """
+    __tablename__ = "group_changes"
+
+    id = Column(Integer, primary_key=True)
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    # "expense" or "member"; entity_id has no foreign key so that deletes keep their entry
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False, server_default="0")
+
+    # Serves the delta query, which reads a group's entries after a sequence number
+    __table_args__ = (Index('ix_group_changes_group_id_seq', 'group_id', 'seq'),)
@@ -0,0 +1,17 @@
+"""
+Pydantic schemas for a group's delta sync response.
+"""
+from typing import List
+from pydantic import BaseModel
+from app.schemas.expense import Expense
+from app.schemas.group import GroupMember
+
+class GroupChanges(BaseModel):
+    # The group's change sequence to pass as `since` on the next sync
+    version: int
+    # Expenses and members inserted since the requested version
+    expenses: List[Expense] = []
+    members: List[GroupMember] = []
+    # Tombstones of the expenses and members deleted since then
+    deleted_expense_ids: List[int] = []
+    deleted_member_ids: List[int] = []
@@ -0,0 +1,26 @@
+"""
+Pydantic schemas for settle-up checkpoints.
+"""
+import datetime
+from typing import List
+from pydantic import BaseModel
+
+class CheckpointBalance(BaseModel):
+    member_id: int
+    # The member's net balance when the group settled up
+    balance: float
+
+    class Config:
+        from_attributes = True
+
+class Checkpoint(BaseModel):
+    id: int
+    group_id: int
+    created_at: datetime.datetime
+    # Number and total amount of the expenses archived by this checkpoint
+    expense_count: int
+    total: float
+    balances: List[CheckpointBalance] = []
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,17 @@
+"""
+Pydantic schemas for the events pushed to a group's event stream.
+"""
+from typing import Any, Dict
+from pydantic import BaseModel
+from app.schemas.balance import BalanceReport
+
+class GroupEvent(BaseModel):
+    # expense-created, expense-deleted, expenses-imported, member-joined or settled-up
+    type: str
+    group_id: int
+    # The group's change sequence after the change; pass it as `since` to
+    # /groups/{id}/changes to fetch what later events may have been missed
+    version: int
+    data: Dict[str, Any]
+    # The group's balances and settlement after the change
+    balances: BalanceReport
@@ -2,26 +2,89 @@
 Pydantic schemas for Expense data validation.
 """
 import datetime
-from typing import List
-from pydantic import BaseModel
+from typing import Annotated, List, Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
 from app.schemas.group import GroupMember
+from app.services.fx import normalize_currency
+from app.services.money import MAX_AMOUNT, to_cents
+from app.services.splits import SplitType
+
+# Finite and bounded, so that converting them to cents cannot fail or overflow
+Amount = Annotated[float, Field(gt=0, le=MAX_AMOUNT, allow_inf_nan=False)]
+SplitValue = Annotated[float, Field(ge=0, le=MAX_AMOUNT, allow_inf_nan=False)]
 
 class ExpenseBase(BaseModel):
     description: str
     amount: float
 
 class ExpenseCreate(ExpenseBase):
+    amount: Amount
     group_id: int
     paid_by_member_id: int
     participant_member_ids: List[int]
+    # Defaults to the time of insertion; set when importing past expenses
+    date: Optional[datetime.datetime] = None
+    split_type: SplitType = SplitType.equal
+    # One value per entry of participant_member_ids: a weight, a percentage
+    # or an exact amount, depending on split_type. Unused for equal splits.
+    split_values: Optional[List[SplitValue]] = None
+    # Currency of `amount` and of exact split_values; defaults to the group's
+    currency: Optional[str] = None
+
+    @field_validator("currency")
+    @classmethod
+    def check_currency(cls, value: Optional[str]) -> Optional[str]:
+        return normalize_currency(value) if value is not None else None
+
+    @model_validator(mode="after")
+    def check_split(self):
+        if self.split_type == SplitType.equal:
+            if self.split_values is not None:
+                raise ValueError("split_values must not be set for equal splits")
+            return self
+        if self.split_values is None or len(self.split_values) != len(self.participant_member_ids):
+            raise ValueError("split_values must have one value per participant")
+        if len(set(self.participant_member_ids)) != len(self.participant_member_ids):
+            raise ValueError("participant_member_ids must not repeat for unequal splits")
+        total = sum(to_cents(value) for value in self.split_values)
+        if self.split_type == SplitType.weights and total <= 0:
+            raise ValueError("split_values must sum to a positive weight")
+        if self.split_type == SplitType.percentage and total != to_cents(100):
+            raise ValueError("split_values must sum to 100 percent")
+        if self.split_type == SplitType.exact and total != to_cents(self.amount):
+            raise ValueError("split_values must sum to the expense amount")
+        return self
+
+class ExpenseShare(BaseModel):
+    member_id: int
+    amount: float
+
+    class Config:
+        from_attributes = True
 
 class Expense(ExpenseBase):
+    # `amount` and the shares are in the group's currency
     id: int
     date: datetime.datetime
     group_id: int
     paid_by_member_id: int
     payer: GroupMember
     participants: List[GroupMember] = []
+    split_type: SplitType = SplitType.equal
+    # What each participant owes
+    shares: List[ExpenseShare] = []
+    # The amount as paid, before conversion into the group's currency
+    currency: str
+    original_amount: float
     
     class Config:
         from_attributes = True
+
+class ExpenseImportError(BaseModel):
+    row: int
+    error: str
+
+class ExpenseImportResult(BaseModel):
+    created: int
+    expense_ids: List[int] = []
+    errors: List[ExpenseImportError] = []
@@ -1,8 +1,10 @@
 """
 Pydantic schemas for Group and GroupMember data validation.
 """
+import datetime
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
+from app.services.fx import DEFAULT_CURRENCY, normalize_currency
 
 class GroupMemberBase(BaseModel):
     nickname: str
@@ -23,14 +25,33 @@ class GroupBase(BaseModel):
 
 class GroupCreate(GroupBase):
     creator_nickname: str
+    # Balances are kept in this currency; expenses in others are converted
+    currency: str = DEFAULT_CURRENCY
+
+    @field_validator("currency")
+    @classmethod
+    def check_currency(cls, value: str) -> str:
+        return normalize_currency(value)
 
 class Group(GroupBase):
     id: int
     invite_code: str
+    currency: str
     members: List[GroupMember] = []
 
     class Config:
         from_attributes = True
 
+class GroupSummary(BaseModel):
+    total_spent: float
+    expense_count: int
+    last_activity_at: Optional[datetime.datetime] = None
+    # The requesting participant's own net balance in the group
+    my_balance: float
+
+class GroupListItem(Group):
+    # Only included when the listing is requested with summary=true
+    summary: Optional[GroupSummary] = None
+
 class GroupMemberJoin(BaseModel):
     nickname: str
@@ -2,6 +2,7 @@
 Pydantic schemas for Participant data validation.
 """
 import datetime
+from typing import List
 from pydantic import BaseModel
 
 class ParticipantBase(BaseModel):
@@ -15,4 +16,25 @@ class Participant(ParticipantBase):
     created_at: datetime.datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class GroupPosition(BaseModel):
+    group_id: int
+    group_name: str
+    member_id: int
+    currency: str
+    # Positive if the group owes the participant, negative if they owe the group
+    balance: float
+
+class CurrencyPosition(BaseModel):
+    currency: str
+    # Net balance over all groups in this currency
+    balance: float
+    # Sums of the positive and negative group balances
+    owed_to_you: float
+    you_owe: float
+
+class ParticipantSummary(BaseModel):
+    groups: List[GroupPosition] = []
+    # One entry per currency, since balances in different currencies are not added up
+    totals: List[CurrencyPosition] = []
@@ -0,0 +1,292 @@
+"""
+Per-client rate limiting and load shedding.
+
+`AdmissionMiddleware` checks every API request before it reaches its
+endpoint. Each client gets a token bucket per route template (e.g.
+GET /groups/{group_id}/balances), keyed by its Client-ID header or, without
+one, by its address. A request takes one token and buckets refill at a
+steady rate up to their burst size; a request finding its bucket empty is
+rejected with 429 and a Retry-After header telling when the next token is
+due. Expensive routes get a smaller bucket and most of them also count
+against a process-wide cap on their requests in flight, above which they
+are shed with 503 instead of queueing behind each other. A request holds its
+slot until its response headers are sent, so a long streamed body does not
+keep other requests out.
+
+Buckets are held in memory, at most RATE_LIMIT_MAX_BUCKETS of them; the
+least recently used are evicted first, which only hands an idle client a
+full bucket again. Each worker process limits on its own. Rejections are
+counted per route and reason, see `stats` and `render_prometheus`.
+
+The middleware is only installed with RATE_LIMIT_ENABLED=true.
+"""
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, NamedTuple, Optional, Tuple
+from starlette.routing import Match
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "false").lower() in ("1", "true", "yes")
+# Requests per second and burst size of a client on one route
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "20"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "40"))
+# The same for the routes in EXPENSIVE_ROUTES
+RATE_LIMIT_EXPENSIVE_PER_SECOND = float(os.getenv("RATE_LIMIT_EXPENSIVE_PER_SECOND", "2"))
+RATE_LIMIT_EXPENSIVE_BURST = int(os.getenv("RATE_LIMIT_EXPENSIVE_BURST", "10"))
+# Upper bound for the number of buckets kept in memory
+RATE_LIMIT_MAX_BUCKETS = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", "10000"))
+# Expensive requests in flight per process before further ones are shed
+EXPENSIVE_CONCURRENCY = int(os.getenv("EXPENSIVE_CONCURRENCY", "8"))
+# Retry-After sent with shed requests
+SHED_RETRY_AFTER_SECONDS = int(os.getenv("SHED_RETRY_AFTER_SECONDS", "1"))
+
+# Routes whose requests load or rebuild a whole group, or many groups
+EXPENSIVE_ROUTES = {
+    ("GET", "/groups"),
+    ("GET", "/groups/{group_id}/balances"),
+    ("GET", "/groups/{group_id}/changes"),
+    ("GET", "/groups/{group_id}/expenses"),
+    ("GET", "/groups/{group_id}/archive"),
+    ("GET", "/groups/{group_id}/export"),
+    ("POST", "/groups/{group_id}/expenses/bulk"),
+    ("POST", "/groups/{group_id}/settle-up"),
+    ("GET", "/me/summary"),
+}
+# Expensive routes that do not count against EXPENSIVE_CONCURRENCY. Exports
+# are built by the export pool, which bounds them already, and can take far
+# longer than the reads the cap is meant to protect.
+UNCAPPED_ROUTES = {
+    ("GET", "/groups/{group_id}/export"),
+}
+# Routes that are never limited
+EXEMPT_ROUTES = {
+    ("GET", "/"),
+    ("GET", "/cache/stats"),
+    ("GET", "/admission/stats"),
+    ("GET", "/metrics"),
+}
+
+class Limit(NamedTuple):
+    per_second: float
+    burst: int
+
+class TokenBucketLimiter:
+    """Thread-safe token buckets with LRU eviction, keyed by any hashable key."""
+
+    def __init__(self, max_buckets: int = 10000):
+        self.max_buckets = max_buckets
+        # Per key, the tokens left and the time they were counted at
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def acquire(self, key: Hashable, limit: Limit, now: Optional[float] = None) -> float:
+        """
+        Takes a token from the bucket of `key`. Returns 0 if one was
+        available, otherwise the seconds until the next token is due.
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            tokens, counted_at = self._buckets.get(key, (limit.burst, now))
+            tokens = min(limit.burst, tokens + (now - counted_at) * limit.per_second)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / limit.per_second
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+            return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self.evictions = 0
+
+class ConcurrencyLimiter:
+    """Counts requests in flight and refuses new ones above a cap."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+buckets = TokenBucketLimiter(RATE_LIMIT_MAX_BUCKETS)
+expensive = ConcurrencyLimiter(EXPENSIVE_CONCURRENCY)
+
+_rejections: Dict[Tuple[str, str, str], int] = {}
+_rejections_lock = threading.Lock()
+
+def _reject(method: str, route: str, reason: str):
+    with _rejections_lock:
+        _rejections[(method, route, reason)] = _rejections.get((method, route, reason), 0) + 1
+
+def limit_for(method: str, route: str) -> Optional[Limit]:
+    """Returns the per-client limit of a route, or None if it is not limited."""
+    if (method, route) in EXEMPT_ROUTES:
+        return None
+    if (method, route) in EXPENSIVE_ROUTES:
+        return Limit(RATE_LIMIT_EXPENSIVE_PER_SECOND, RATE_LIMIT_EXPENSIVE_BURST)
+    return Limit(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+
+def client_key(scope) -> str:
+    """The Client-ID header of a request, or its address for requests without one."""
+    for name, value in scope["headers"]:
+        if name == b"client-id" and value:
+            return "id:" + value.decode("latin-1")
+    client = scope.get("client")
+    return "addr:" + (client[0] if client else "unknown")
+
+def _leaf_routes(routes) -> list:
+    """The endpoint routes of a route list, with those of included routers and mounts flattened in."""
+    leaves = []
+    for route in routes:
+        if hasattr(route, "path_regex") and not hasattr(route, "routes"):
+            leaves.append(route)
+            continue
+        children = getattr(route, "routes", None) or getattr(getattr(route, "original_router", None), "routes", None)
+        leaves += _leaf_routes(children or ())
+    return leaves
+
+async def _send_error(send, status: int, detail: str, retry_after: int):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying the per-client rate limits and the concurrency
+    cap of expensive routes. Requests for unknown paths pass through, so
+    they get their usual 404 or 405.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = None
+
+    def match_route(self, scope):
+        """The route a request will be dispatched to, found the way the router does it."""
+        if self._routes is None:
+            # Routes are complete once the app serves requests
+            self._routes = _leaf_routes(scope["app"].router.routes)
+        for route in self._routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route = self.match_route(scope)
+        path = getattr(route, "path", None)
+        method = scope["method"]
+        limit = limit_for(method, path) if path is not None else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        wait = buckets.acquire((client_key(scope), method, path), limit)
+        if wait > 0:
+            _reject(method, path, "rate_limited")
+            # Labels the rejection with its route in the request metrics
+            scope["route"] = route
+            await _send_error(send, 429, "Too many requests", math.ceil(wait))
+            return
+
+        if (method, path) not in EXPENSIVE_ROUTES or (method, path) in UNCAPPED_ROUTES:
+            await self.app(scope, receive, send)
+            return
+        if not expensive.try_acquire():
+            _reject(method, path, "overloaded")
+            scope["route"] = route
+            await _send_error(send, 503, "Server is busy", SHED_RETRY_AFTER_SECONDS)
+            return
+
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                expensive.release()
+
+        async def send_releasing(message):
+            # A streamed body takes as long as the client takes to read it, so
+            # the slot only covers the work up to the headers
+            if message["type"] == "http.response.start":
+                release()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_releasing)
+        finally:
+            release()
+
+def stats() -> dict:
+    """Returns the rejection counters, the bucket count and the expensive requests in flight."""
+    with _rejections_lock:
+        rejections = [
+            {"method": method, "route": route, "reason": reason, "count": count}
+            for (method, route, reason), count in sorted(_rejections.items())
+        ]
+    return {
+        "enabled": RATE_LIMIT_ENABLED,
+        "rejections": rejections,
+        "buckets": len(buckets),
+        "bucket_evictions": buckets.evictions,
+        "expensive_in_flight": expensive.in_flight,
+        "expensive_capacity": expensive.capacity,
+    }
+
+def render_prometheus() -> str:
+    """Returns the rejection counters in the Prometheus text exposition format."""
+    lines = [
+        "# HELP http_requests_rejected_total Requests refused by the admission middleware by route and reason.",
+        "# TYPE http_requests_rejected_total counter",
+    ]
+    with _rejections_lock:
+        for (method, route, reason), count in sorted(_rejections.items()):
+            lines.append(f'http_requests_rejected_total{{method="{method}",route="{route}",reason="{reason}"}} {count}')
+    lines += [
+        "# HELP http_expensive_requests_in_flight Expensive requests currently being served.",
+        "# TYPE http_expensive_requests_in_flight gauge",
+        f"http_expensive_requests_in_flight {expensive.in_flight}",
+    ]
+    return "\n".join(lines) + "\n"
+
+def clear():
+    """Drops all buckets and resets the counters."""
+    buckets.clear()
+    with _rejections_lock:
+        _rejections.clear()
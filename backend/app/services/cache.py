@@ -0,0 +1,184 @@
+"""
+In-process caches for serialized group read responses and participant IDs.
+
+Every group has a version counter that the write paths bump after they
+commit. Cached responses remember the version they were built at and are
+ignored once it has moved on, so invalidation never has to find the
+individual entries. Entries are additionally evicted LRU-first and expire
+after a TTL, which also bounds staleness for writes made by other processes
+(e.g. other workers or the maintenance CLI).
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, NamedTuple, Optional
+
+class CachedResponse(NamedTuple):
+    version: int
+    expires_at: float
+    etag: str
+    body: bytes
+    headers: Dict[str, str]
+
+class GroupCache:
+    """Thread-safe LRU/TTL cache keyed by tuples that start with a group ID."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._aliases: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def version(self, group_id: int) -> int:
+        """Returns the current version of a group's data."""
+        return self._versions.get(group_id, 0)
+
+    def bump(self, group_id: int):
+        """Marks every cached response of a group as outdated."""
+        with self._lock:
+            self._versions[group_id] = self._versions.get(group_id, 0) + 1
+
+    @staticmethod
+    def etag(body: bytes, headers: Dict[str, str]) -> str:
+        """
+        Builds the ETag of a response from its content, so that it changes
+        whenever the response does, also for writes made by other processes.
+        """
+        digest = hashlib.blake2s(body, digest_size=16)
+        for name, value in sorted(headers.items()):
+            digest.update(f"\n{name}: {value}".encode())
+        return f'"{digest.hexdigest()}"'
+
+    def get(self, key: Hashable, version: int) -> Optional[CachedResponse]:
+        """Returns the cached response for `key` if it was built at `version` and has not expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version or entry.expires_at < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: Hashable, version: int, body: bytes, headers: Dict[str, str]) -> CachedResponse:
+        """Stores a response built at `version` and evicts the least recently used entries."""
+        entry = CachedResponse(version, time.monotonic() + self.ttl_seconds, self.etag(body, headers), body, headers)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def get_alias(self, alias: Hashable) -> Optional[int]:
+        """Returns the group ID remembered for an immutable alias such as an invite code."""
+        with self._lock:
+            group_id = self._aliases.get(alias)
+            if group_id is not None:
+                self._aliases.move_to_end(alias)
+            return group_id
+
+    def set_alias(self, alias: Hashable, group_id: int):
+        """Remembers which group an immutable alias refers to."""
+        with self._lock:
+            self._aliases[alias] = group_id
+            self._aliases.move_to_end(alias)
+            while len(self._aliases) > self.max_entries:
+                self._aliases.popitem(last=False)
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def stats(self) -> dict:
+        """Returns the hit/miss counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        """Drops all entries and versions and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._aliases.clear()
+            self._versions.clear()
+            self.hits = self.misses = self.not_modified = self.evictions = 0
+
+class IdentityCache:
+    """
+    Thread-safe LRU of immutable mappings, such as a browser's client_id to
+    its participant ID. Entries never go stale, so there is no TTL.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[int]:
+        """Returns the ID remembered for `key`, or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: int):
+        """Remembers the ID for `key` and evicts the least recently used entries."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """Returns the hit/miss counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        """Drops all entries and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+group_cache = GroupCache(
+    max_entries=int(os.getenv("GROUP_CACHE_MAX_ENTRIES", "1024")),
+    ttl_seconds=float(os.getenv("GROUP_CACHE_TTL_SECONDS", "60")),
+)
+
+participant_cache = IdentityCache(
+    max_entries=int(os.getenv("PARTICIPANT_CACHE_MAX_ENTRIES", "10000")),
+)
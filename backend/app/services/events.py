@@ -0,0 +1,124 @@
+"""
+Publish/subscribe broker for group events.
+
+The write endpoints publish an event after they commit, and every open
+`/groups/{id}/events` stream of that group receives it. `EventBroker`
+defines the interface; the default `InMemoryEventBroker` fans out within
+this process only. With several workers, replace it at startup with
+`set_broker()` by one backed by a shared channel (e.g. Redis pub/sub or
+PostgreSQL LISTEN/NOTIFY).
+"""
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Set
+
+class SubscriberLagging(Exception):
+    """Raised to a subscriber that fell so far behind that events were dropped."""
+
+class Subscription:
+    """A single subscriber's bounded queue of serialized events."""
+
+    def __init__(self, group_id: int, max_queue: int):
+        self.group_id = group_id
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=max_queue)
+        self.lagging = False
+
+    def put(self, message: str):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.lagging = True
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Waits for the next event and returns it, or None after `timeout` seconds.
+        Raises SubscriberLagging once an event could not be queued; the client
+        should then reconnect and reload the group.
+        """
+        if self.lagging:
+            raise SubscriberLagging()
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class EventBroker(ABC):
+    """Interface of the pub/sub backend used by the event streams."""
+
+    @abstractmethod
+    def subscribe(self, group_id: int) -> Subscription:
+        ...
+
+    @abstractmethod
+    def unsubscribe(self, subscription: Subscription):
+        ...
+
+    @abstractmethod
+    async def publish(self, group_id: int, message: str):
+        ...
+
+    def has_subscribers(self, group_id: int) -> bool:
+        """Lets publishers skip building events nobody listens to. Defaults to True."""
+        return True
+
+    def stats(self) -> dict:
+        return {}
+
+class InMemoryEventBroker(EventBroker):
+    """
+    Fans events out to the subscribers in this process. Messages are
+    serialized once by the publisher and the same string is queued for every
+    subscriber, so an idle subscription costs one small queue.
+    """
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, group_id: int) -> Subscription:
+        subscription = Subscription(group_id, self.max_queue)
+        self._subscribers.setdefault(group_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.group_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.group_id]
+
+    async def publish(self, group_id: int, message: str):
+        self.published += 1
+        for subscription in self._subscribers.get(group_id, ()):
+            subscription.put(message)
+            if subscription.lagging:
+                self.dropped += 1
+            else:
+                self.delivered += 1
+
+    def has_subscribers(self, group_id: int) -> bool:
+        return bool(self._subscribers.get(group_id))
+
+    def stats(self) -> dict:
+        return {
+            "groups": len(self._subscribers),
+            "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+broker: EventBroker = InMemoryEventBroker(max_queue=int(os.getenv("EVENTS_QUEUE_SIZE", "100")))
+
+def get_broker() -> EventBroker:
+    """Returns the broker currently in use."""
+    return broker
+
+def set_broker(new_broker: EventBroker):
+    """Replaces the broker, e.g. with one shared between worker processes."""
+    global broker
+    broker = new_broker
@@ -0,0 +1,142 @@
+"""
+Currency conversion from a local table of exchange rates.
+
+Rates are read once from the CSV file named by FX_RATES_FILE, in the layout
+of the ECB's historical reference rates (eurofxref-hist.csv): a `Date`
+column followed by one column per currency, each holding the units of that
+currency per one unit of the reference currency (FX_REFERENCE_CURRENCY,
+EUR by default). Missing values such as `N/A` are skipped. No network
+access is needed; without a file only same-currency amounts convert.
+
+The rate of a currency on a day is the latest one published on or before
+that day, so weekends and holidays use the previous business day. Lookups
+go through an in-memory cache keyed by (currency, day), and `convert_batch`
+resolves each distinct (currency, day) pair of a batch once before
+converting every amount in a single pass.
+"""
+import bisect
+import csv
+import datetime
+import functools
+import os
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Currency of groups created without one
+DEFAULT_CURRENCY = os.getenv("DEFAULT_CURRENCY", "USD").upper()
+FX_RATES_FILE = os.getenv("FX_RATES_FILE")
+FX_REFERENCE_CURRENCY = os.getenv("FX_REFERENCE_CURRENCY", "EUR").upper()
+# Upper bound for the number of cached (currency, day) rates
+FX_CACHE_SIZE = int(os.getenv("FX_CACHE_SIZE", "65536"))
+
+CURRENCY_CODE = re.compile(r"^[A-Z]{3}$")
+
+class MissingRateError(LookupError):
+    """Raised when no rate is known for a currency on or before a day."""
+
+    def __init__(self, currency: str, day: datetime.date):
+        super().__init__(f"No exchange rate for {currency} on or before {day.isoformat()}")
+        self.currency = currency
+        self.day = day
+
+def normalize_currency(code: str) -> str:
+    """Returns an ISO 4217 style currency code in upper case, or raises ValueError."""
+    code = code.strip().upper()
+    if not CURRENCY_CODE.match(code):
+        raise ValueError("currency must be a three-letter code such as USD")
+    return code
+
+class RateTable:
+    """Daily exchange rates per currency against one reference currency."""
+
+    def __init__(self, rates: Dict[str, Dict[datetime.date, Decimal]], reference: str = FX_REFERENCE_CURRENCY):
+        self.reference = reference
+        # Per currency, the publication days in ascending order and their
+        # rates as exact integer ratios
+        self._days: Dict[str, List[datetime.date]] = {}
+        self._rates: Dict[str, List[Tuple[int, int]]] = {}
+        for currency, by_day in rates.items():
+            days = sorted(by_day)
+            self._days[currency] = days
+            self._rates[currency] = [by_day[day].as_integer_ratio() for day in days]
+        self.rate = functools.lru_cache(maxsize=FX_CACHE_SIZE)(self._lookup)
+
+    @classmethod
+    def from_csv(cls, path: str, reference: str = FX_REFERENCE_CURRENCY) -> "RateTable":
+        """Loads a table in the eurofxref-hist.csv layout."""
+        rates: Dict[str, Dict[datetime.date, Decimal]] = {}
+        with open(path, newline="", encoding="utf-8-sig") as file:
+            reader = csv.reader(file)
+            header = [column.strip() for column in next(reader, [])]
+            currencies = [column.upper() if column else None for column in header[1:]]
+            for row in reader:
+                if not row or not row[0].strip():
+                    continue
+                day = datetime.date.fromisoformat(row[0].strip())
+                for currency, value in zip(currencies, row[1:]):
+                    if currency is None:
+                        continue
+                    try:
+                        rate = Decimal(value.strip())
+                    except InvalidOperation:
+                        continue
+                    if rate > 0:
+                        rates.setdefault(currency, {})[day] = rate
+        return cls(rates, reference=reference)
+
+    def _lookup(self, currency: str, day: datetime.date) -> Tuple[int, int]:
+        """Units of `currency` per reference unit on `day` as (numerator, denominator)."""
+        if currency == self.reference:
+            return (1, 1)
+        days = self._days.get(currency)
+        index = bisect.bisect_right(days, day) - 1 if days else -1
+        if index < 0:
+            raise MissingRateError(currency, day)
+        return self._rates[currency][index]
+
+    def factor(self, from_currency: str, to_currency: str, day: datetime.date) -> Tuple[int, int]:
+        """The exact factor converting `from_currency` into `to_currency` on `day`, as (numerator, denominator)."""
+        if from_currency == to_currency:
+            return (1, 1)
+        to_numerator, to_denominator = self.rate(to_currency, day)
+        from_numerator, from_denominator = self.rate(from_currency, day)
+        return (to_numerator * from_denominator, to_denominator * from_numerator)
+
+    def convert_batch(self, amounts_cents: Sequence[int], currencies: Sequence[str], days: Sequence[datetime.date], to_currency: str) -> List[int]:
+        """
+        Converts amounts in cents from their currencies on the given days into
+        `to_currency`, rounding each half away from zero. Raises
+        MissingRateError for the first pair without a rate.
+        """
+        # Factors are integer ratios, so the per-amount work is integer arithmetic
+        factors: Dict[Tuple[str, datetime.date], Tuple[int, int]] = {
+            (currency, day): self.factor(currency, to_currency, day)
+            for currency, day in set(zip(currencies, days))
+            if currency != to_currency
+        }
+        if not factors:
+            return list(amounts_cents)
+        return [
+            amount_cents if currency == to_currency else _divide_rounded(amount_cents * factors[currency, day][0], factors[currency, day][1])
+            for amount_cents, currency, day in zip(amounts_cents, currencies, days)
+        ]
+
+def _divide_rounded(numerator: int, denominator: int) -> int:
+    """numerator / denominator (> 0) rounded half away from zero, like money.to_cents."""
+    quotient = (2 * abs(numerator) + denominator) // (2 * denominator)
+    return quotient if numerator >= 0 else -quotient
+
+_rates: Optional[RateTable] = None
+
+def get_rates() -> RateTable:
+    """Returns the process-wide rate table, loading FX_RATES_FILE on first use."""
+    global _rates
+    if _rates is None:
+        _rates = RateTable.from_csv(FX_RATES_FILE) if FX_RATES_FILE else RateTable({})
+    return _rates
+
+def set_rates(table: RateTable):
+    """Replaces the process-wide rate table, e.g. after the rates file was updated."""
+    global _rates
+    _rates = table
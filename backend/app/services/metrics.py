@@ -0,0 +1,205 @@
+"""
+Request timing and SQL instrumentation.
+
+Turned on with METRICS_ENABLED=true. `MetricsMiddleware` records the latency
+of every request per route template, and `instrument_engine` hooks the
+SQLAlchemy cursor events to count statements and database time. The
+statements of a request are attributed to it through a context variable,
+which follows the request's work into the threadpool and into
+AsyncSession.run_sync. Statements slower than SLOW_QUERY_MS are logged.
+`render_prometheus` exports everything in the Prometheus text format.
+
+When metrics are off, neither the middleware nor the engine listeners are
+installed, so requests pay nothing.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+
+# Upper bounds of the histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+slow_query_logger = logging.getLogger("app.sql.slow")
+
+class RequestStats:
+    """SQL statements and database time spent by one request."""
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("metrics_request", default=None)
+
+class Histogram:
+    """Cumulative histogram over fixed buckets, as exported by Prometheus."""
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+class MetricsRegistry:
+    """Thread-safe store of the request and SQL metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_latency: Dict[Tuple[str, str, str], Histogram] = {}
+        self.request_statements: Dict[Tuple[str, str], Histogram] = {}
+        self.request_db_seconds: Dict[Tuple[str, str], float] = {}
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.slow_queries = 0
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        with self._lock:
+            latency = self.request_latency.get((method, route, str(status)))
+            if latency is None:
+                latency = self.request_latency[(method, route, str(status))] = Histogram(LATENCY_BUCKETS)
+            latency.observe(seconds)
+            statements = self.request_statements.get((method, route))
+            if statements is None:
+                statements = self.request_statements[(method, route)] = Histogram(STATEMENT_BUCKETS)
+            statements.observe(stats.statements)
+            self.request_db_seconds[(method, route)] = self.request_db_seconds.get((method, route), 0.0) + stats.db_seconds
+
+    def observe_statement(self, seconds: float, slow: bool):
+        with self._lock:
+            self.statements += 1
+            self.db_seconds += seconds
+            if slow:
+                self.slow_queries += 1
+
+    def clear(self):
+        with self._lock:
+            self.request_latency.clear()
+            self.request_statements.clear()
+            self.request_db_seconds.clear()
+            self.statements = 0
+            self.db_seconds = 0.0
+            self.slow_queries = 0
+
+registry = MetricsRegistry()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["metrics_start"] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["metrics_start"]
+    slow = seconds * 1000 >= SLOW_QUERY_MS
+    registry.observe_statement(seconds, slow)
+    stats = _current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += seconds
+    if slow:
+        slow_query_logger.warning("Slow query (%.1f ms): %s", seconds * 1000, " ".join(statement.split())[:1000])
+
+def instrument_engine(engine: Engine):
+    """Counts and times the statements of `engine`, which may be the sync_engine of an async engine."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing each HTTP request and collecting its SQL
+    statistics. Requests are labelled with the route template (e.g.
+    /groups/{group_id}) rather than the raw path, to bound the label set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current_request.reset(token)
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            registry.observe_request(
+                scope["method"], getattr(route, "path", "unmatched"), status, time.perf_counter() - start, stats
+            )
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+def _histogram_lines(name: str, histogram: Histogram, labels: Dict[str, str]) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.bounds, histogram.counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(**labels, le=f'{bound:g}')} {cumulative}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.count}")
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.total:.6f}")
+    lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+    return lines
+
+def render_prometheus() -> str:
+    """Returns all metrics in the Prometheus text exposition format."""
+    with registry._lock:
+        lines = [
+            "# HELP http_request_duration_seconds Latency of HTTP requests by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route, status), histogram in sorted(registry.request_latency.items()):
+            lines += _histogram_lines("http_request_duration_seconds", histogram, {"method": method, "route": route, "status": status})
+        lines += [
+            "# HELP http_request_db_statements SQL statements executed per HTTP request.",
+            "# TYPE http_request_db_statements histogram",
+        ]
+        for (method, route), histogram in sorted(registry.request_statements.items()):
+            lines += _histogram_lines("http_request_db_statements", histogram, {"method": method, "route": route})
+        lines += [
+            "# HELP http_request_db_seconds_total Time spent in SQL statements by route.",
+            "# TYPE http_request_db_seconds_total counter",
+        ]
+        for (method, route), seconds in sorted(registry.request_db_seconds.items()):
+            lines.append(f"http_request_db_seconds_total{_labels(method=method, route=route)} {seconds:.6f}")
+        lines += [
+            "# HELP db_statements_total SQL statements executed, including outside requests.",
+            "# TYPE db_statements_total counter",
+            f"db_statements_total {registry.statements}",
+            "# HELP db_statement_seconds_total Time spent in SQL statements, including outside requests.",
+            "# TYPE db_statement_seconds_total counter",
+            f"db_statement_seconds_total {registry.db_seconds:.6f}",
+            f"# HELP db_slow_queries_total SQL statements slower than {SLOW_QUERY_MS:g} ms.",
+            "# TYPE db_slow_queries_total counter",
+            f"db_slow_queries_total {registry.slow_queries}",
+        ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,55 @@
+"""
+Exact money arithmetic in integer minor units (cents).
+
+Amounts enter and leave the API as decimal numbers but are stored and
+computed as integers, so balances always sum to exactly zero and no epsilon
+handling is needed anywhere downstream.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, Sequence, Union
+
+CENTS_PER_UNIT = 100
+# Largest amount accepted for an expense or split value. Its cents, even
+# after currency conversion and summed over a group, stay far inside the
+# 64-bit INTEGER columns they are stored in.
+MAX_AMOUNT = 10 ** 9
+
+def to_cents(amount: Union[float, int, str, Decimal]) -> int:
+    """Converts a decimal amount to integer cents, rounding half away from zero."""
+    # Going through str() keeps e.g. 0.1 + 0.2 style float noise out of the result
+    value = amount if isinstance(amount, Decimal) else Decimal(str(amount))
+    return int((value * CENTS_PER_UNIT).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+def from_cents(cents: int) -> float:
+    """Converts integer cents back to a decimal amount for API responses."""
+    return cents / CENTS_PER_UNIT
+
+def allocate(total_cents: int, weights: Sequence[int]) -> List[int]:
+    """
+    Splits `total_cents` proportionally to `weights` using the largest
+    remainder method. Every part is rounded down, then the leftover cents go
+    to the parts with the largest remainders, ties going to the earlier part.
+    The result always sums to `total_cents` and is fully deterministic.
+    """
+    if not weights:
+        return []
+    if total_cents < 0:
+        return [-part for part in allocate(-total_cents, weights)]
+    weight_sum = sum(weights)
+    if weight_sum <= 0:
+        raise ValueError("Weights must sum to a positive number")
+
+    parts = [total_cents * weight // weight_sum for weight in weights]
+    remainders = [total_cents * weight % weight_sum for weight in weights]
+    leftover = total_cents - sum(parts)
+    for index in sorted(range(len(weights)), key=lambda i: (-remainders[i], i))[:leftover]:
+        parts[index] += 1
+    return parts
+
+def split_evenly(total_cents: int, member_ids: Iterable[int]) -> Dict[int, int]:
+    """
+    Splits an amount evenly between members. Members are ordered by ID, so
+    the leftover cents of an uneven split always go to the same members.
+    """
+    ordered_ids = sorted(set(member_ids))
+    return dict(zip(ordered_ids, allocate(total_cents, [1] * len(ordered_ids))))
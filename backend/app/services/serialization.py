@@ -0,0 +1,38 @@
+"""
+JSON encoding for the lean response path.
+
+Large listings can be built as plain dicts straight from database rows and
+encoded here instead of being validated into Pydantic models first. orjson
+is used when it is installed; otherwise the standard library encoder is
+used with compact separators.
+"""
+import datetime
+import json
+import os
+from typing import Any
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Serves large listings through the lean path; see FAST_SERIALIZATION in the README
+FAST_SERIALIZATION = os.getenv("FAST_SERIALIZATION", "false").lower() in ("1", "true", "yes")
+
+def _default(value: Any):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(payload: Any) -> bytes:
+    """Encodes plain data (dicts, lists, numbers, strings, datetimes) as compact JSON."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=_default).encode()
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that encodes its content with `dumps`; the content must be plain data."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
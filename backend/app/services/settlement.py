@@ -0,0 +1,108 @@
+"""
+Settlement solvers turning net balances into a list of payments.
+
+Balances are integer cents keyed by member ID: positive balances are owed
+money, negative balances owe money, and all balances sum to zero. Every
+solver returns (from_member_id, to_member_id, amount_cents) tuples.
+"""
+import heapq
+from enum import Enum
+from typing import Dict, List, Tuple
+
+Payment = Tuple[int, int, int]
+
+# The exact solver is exponential in the number of non-zero balances
+MAX_EXACT_MEMBERS = 14
+
+class SettlementMode(str, Enum):
+    greedy = "greedy"
+    minimal = "minimal"
+
+def settle_greedy(balances: Dict[int, int]) -> List[Payment]:
+    """
+    Repeatedly matches the largest debtor with the largest creditor.
+    Both sides are kept in heaps, so this runs in O(n log n) and needs at
+    most n - 1 payments. Ties are broken by member ID for stable output.
+    """
+    debtors = [(balance, member_id) for member_id, balance in balances.items() if balance < 0]
+    creditors = [(-balance, member_id) for member_id, balance in balances.items() if balance > 0]
+    heapq.heapify(debtors)
+    heapq.heapify(creditors)
+
+    payments = []
+    while debtors and creditors:
+        debt, debtor_id = heapq.heappop(debtors)
+        credit, creditor_id = heapq.heappop(creditors)
+        amount = min(-debt, -credit)
+        payments.append((debtor_id, creditor_id, amount))
+
+        # Whichever side is not fully settled goes back with what is left
+        if debt + amount < 0:
+            heapq.heappush(debtors, (debt + amount, debtor_id))
+        if credit + amount < 0:
+            heapq.heappush(creditors, (credit + amount, creditor_id))
+    return payments
+
+def _zero_sum_partition(amounts: List[int]) -> List[List[int]]:
+    """
+    Splits the indexes of `amounts` into the largest possible number of
+    groups that each sum to zero. A zero-sum group of k members settles in
+    k - 1 payments, so this minimizes the total number of payments.
+    Dynamic programming over subsets: O(2^n * n) time, O(2^n) memory.
+    """
+    n = len(amounts)
+    full = (1 << n) - 1
+    subset_sum = [0] * (full + 1)
+    best = [0] * (full + 1)
+    for mask in range(1, full + 1):
+        lowest = mask & -mask
+        subset_sum[mask] = subset_sum[mask ^ lowest] + amounts[lowest.bit_length() - 1]
+        most = 0
+        rest = mask
+        while rest:
+            bit = rest & -rest
+            if best[mask ^ bit] > most:
+                most = best[mask ^ bit]
+            rest ^= bit
+        best[mask] = most + (1 if subset_sum[mask] == 0 else 0)
+
+    # Walk back from the full set, closing a group at every zero-sum subset
+    groups, current, mask = [], [], full
+    while mask:
+        target = best[mask] - (1 if subset_sum[mask] == 0 else 0)
+        if subset_sum[mask] == 0 and current:
+            groups.append(current)
+            current = []
+        rest = mask
+        while rest:
+            bit = rest & -rest
+            if best[mask ^ bit] == target:
+                break
+            rest ^= bit
+        current.append(bit.bit_length() - 1)
+        mask ^= bit
+    if current:
+        groups.append(current)
+    return groups
+
+def settle_minimal(balances: Dict[int, int]) -> List[Payment]:
+    """
+    Finds a settlement with the fewest possible payments by splitting the
+    members into as many independent zero-sum groups as possible and settling
+    each group on its own. Falls back to the greedy solver above
+    MAX_EXACT_MEMBERS non-zero balances.
+    """
+    nonzero = sorted((member_id, balance) for member_id, balance in balances.items() if balance)
+    if len(nonzero) > MAX_EXACT_MEMBERS:
+        return settle_greedy(balances)
+
+    payments = []
+    for group in _zero_sum_partition([balance for _, balance in nonzero]):
+        payments.extend(settle_greedy({nonzero[i][0]: nonzero[i][1] for i in group}))
+    return payments
+
+def settle(balances: Dict[int, int], mode: SettlementMode = SettlementMode.greedy) -> List[Payment]:
+    """Settles the balances with the solver selected by `mode`."""
+    if mode == SettlementMode.minimal:
+        return settle_minimal(balances)
+    return settle_greedy(balances)
@@ -0,0 +1,141 @@
+"""
+Split engine: turns an expense's split into exact per-participant shares.
+
+An expense is split equally, by weights, by percentages or into exact
+amounts. All but exact splits are proportional allocations, which are
+computed for a whole batch of expenses at once with the largest remainder
+method of `app.services.money.allocate`: each share is rounded down and the
+leftover cents go to the largest remainders, ties going to the lowest
+member ID. With NumPy installed the batch is computed as one vectorized
+pass over its (expense, member, weight) triples in int64; without it, or
+for batches whose products of amount and weight sum could overflow int64,
+the same results come from a per-expense loop over Python integers.
+"""
+import enum
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from app.services.money import CENTS_PER_UNIT, allocate, to_cents
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Largest value the vectorized allocation may hold in an int64
+_INT64_MAX = 2 ** 63 - 1
+
+class SplitType(str, enum.Enum):
+    equal = "equal"
+    weights = "weights"
+    percentage = "percentage"
+    exact = "exact"
+
+class Split(NamedTuple):
+    """The split of one expense; `values` are aligned with `member_ids` and unused for equal splits."""
+    amount_cents: int
+    split_type: SplitType
+    member_ids: Sequence[int]
+    values: Optional[Sequence[float]] = None
+
+def _scaled(value: float) -> int:
+    # Whole numbers skip the exact decimal rounding of to_cents, which they do not need
+    if isinstance(value, int) or value.is_integer():
+        return int(value) * CENTS_PER_UNIT
+    return to_cents(value)
+
+def _integer_weights(split: Split) -> Dict[int, int]:
+    """Maps each member to an integer weight, or for exact splits to the share in cents."""
+    if split.split_type == SplitType.equal:
+        return dict.fromkeys(split.member_ids, 1)
+    # Weights and percentages are kept to two decimals, so they scale to integers like amounts
+    return {member_id: _scaled(value) for member_id, value in zip(split.member_ids, split.values)}
+
+def compute_shares(splits: Sequence[Split]) -> List[Dict[int, int]]:
+    """
+    Returns the share in cents of each participant for every split, in input
+    order. Shares always sum to the expense amount. Splits are expected to
+    have been validated (see `ExpenseCreate`).
+    """
+    shares: List[Optional[Dict[int, int]]] = [None] * len(splits)
+    proportional = []
+    for index, split in enumerate(splits):
+        weights = _integer_weights(split)
+        if split.split_type == SplitType.exact:
+            shares[index] = weights
+        else:
+            # Ordered by member ID, so leftover cents always go to the same members
+            proportional.append((index, split.amount_cents, sorted(weights.items())))
+
+    allocations = _allocate_vectorized(proportional) if np is not None else _allocate_loop(proportional)
+    for (index, _, weights), parts in zip(proportional, allocations):
+        shares[index] = {member_id: part for (member_id, _), part in zip(weights, parts)}
+    return shares
+
+def _allocate_loop(batch) -> List[List[int]]:
+    return [allocate(total_cents, [weight for _, weight in weights]) for _, total_cents, weights in batch]
+
+def _group_sums(expense, values, size: int):
+    """Sums `values` per expense exactly; np.bincount would sum them as float64."""
+    sums = np.zeros(size, dtype=np.int64)
+    np.add.at(sums, expense, values)
+    return sums
+
+def _allocate_vectorized(batch) -> List[List[int]]:
+    """Largest remainder allocation of a whole batch with NumPy; matches `_allocate_loop`."""
+    if not batch:
+        return []
+    max_count = max(len(weights) for _, _, weights in batch)
+    max_weight = max((abs(w) for _, _, weights in batch for _, w in weights), default=0)
+    if max_count * max_weight > _INT64_MAX:
+        return _allocate_loop(batch)
+    counts = np.array([len(weights) for _, _, weights in batch], dtype=np.int64)
+    expense = np.repeat(np.arange(len(batch)), counts)
+    weight = np.fromiter((w for _, _, weights in batch for _, w in weights), dtype=np.int64, count=int(counts.sum()))
+    totals = [abs(total_cents) for _, total_cents, _ in batch]
+
+    weight_sums = _group_sums(expense, weight, len(batch))
+    if (weight_sums[counts > 0] <= 0).any():
+        raise ValueError("Weights must sum to a positive number")
+    # Every product of an amount and a weight, and the amount times its
+    # weight sum, must fit in int64
+    if max(totals) * int(weight_sums.max()) > _INT64_MAX:
+        return _allocate_loop(batch)
+    # Negative amounts are allocated on their absolute value and negated, as in allocate()
+    signs = np.array([-1 if total_cents < 0 else 1 for _, total_cents, _ in batch], dtype=np.int64)
+    totals = np.array(totals, dtype=np.int64)
+
+    scaled = totals[expense] * weight
+    sums = weight_sums[expense]
+    parts = scaled // sums
+    remainders = scaled % sums
+    leftover = totals - _group_sums(expense, parts, len(batch))
+
+    # Rank every triple within its expense by descending remainder, then position
+    position = np.arange(len(weight)) - np.repeat(np.cumsum(counts) - counts, counts)
+    order = np.lexsort((position, -remainders, expense))
+    # Sorting keeps every expense in its own index range, so the element that
+    # lands at a given position within that range has this rank
+    rank = np.empty_like(order)
+    rank[order] = position
+    parts += rank < leftover[expense]
+    parts *= signs[expense]
+
+    parts = parts.tolist()
+    ends = np.cumsum(counts).tolist()
+    return [parts[end - count:end] for end, count in zip(ends, counts.tolist())]
+
+def net_deltas(amounts_cents: Sequence[int], payer_ids: Sequence[int], shares: Sequence[Dict[int, int]]) -> Dict[int, int]:
+    """
+    Returns the net balance change of every member over a batch of expenses
+    in a single pass: payers are credited the amounts and participants
+    debited their shares. Expenses without participants change nothing, as
+    in `crud_balance.split_deltas`. This stays a plain loop, since moving
+    the triples into arrays costs more than the accumulation itself.
+    """
+    deltas: Dict[int, int] = {}
+    for amount_cents, payer_id, expense_shares in zip(amounts_cents, payer_ids, shares):
+        if not expense_shares:
+            continue
+        deltas[payer_id] = deltas.get(payer_id, 0) + amount_cents
+        for member_id, share_cents in expense_shares.items():
+            deltas[member_id] = deltas.get(member_id, 0) - share_cents
+    return {member_id: delta for member_id, delta in deltas.items() if delta}
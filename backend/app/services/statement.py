@@ -0,0 +1,166 @@
+"""
+Group statements for accounting exports.
+
+A statement lists a group's whole history, archived and live, oldest first:
+one line per expense with its amounts, the share of every member and every
+member's running balance after it, all in the group's currency. The lines
+are produced by a generator pipeline over the rows of a streaming history
+cursor (see `crud_expense.iter_history_rows`), so memory use stays flat
+however long the history is.
+
+CSV is encoded while the rows come off the cursor. XLSX has to be written
+as a whole zip file and its per-cell formatting is CPU bound, so it is built
+into a temporary file by a process of the export pool, which keeps it off
+the API workers. XLSX needs openpyxl.
+"""
+import csv
+import enum
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.services.money import CENTS_PER_UNIT, from_cents
+
+try:
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+except ImportError:
+    openpyxl = None
+
+# Number of processes formatting XLSX exports
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+# Statement lines encoded per streamed CSV chunk
+CSV_CHUNK_LINES = 500
+
+class ExportFormat(str, enum.Enum):
+    csv = "csv"
+    xlsx = "xlsx"
+
+MEDIA_TYPES = {
+    ExportFormat.csv: "text/csv; charset=utf-8",
+    ExportFormat.xlsx: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# A statement line is a tuple of date, expense_id, description, payer
+# nickname, split_type, currency, original_amount_cents, amount_cents and the
+# lists of share_cents and balance_cents, ordered like the statement's members
+StatementLine = tuple
+
+def group_expenses(rows: Iterable[tuple]) -> Iterator[Tuple[tuple, Dict[int, int]]]:
+    """Folds consecutive (expense, participant share) rows into (expense, {member_id: share_cents}) pairs."""
+    current, shares = None, {}
+    for row in rows:
+        expense, (member_id, share_cents) = row[:8], row[8:]
+        if current is not None and expense[1] != current[1]:
+            yield current, shares
+            shares = {}
+        current = expense
+        if member_id is not None:
+            shares[member_id] = share_cents
+    if current is not None:
+        yield current, shares
+
+def statement_lines(expenses: Iterable[Tuple[tuple, Dict[int, int]]], member_ids: Sequence[int], nicknames: Dict[int, str]) -> Iterator[StatementLine]:
+    """
+    Turns (expense, shares) pairs into statement lines, keeping every
+    member's running balance: the payer is credited the amount and the
+    participants debited their shares, as in `crud_balance.split_deltas`.
+    """
+    balances = dict.fromkeys(member_ids, 0)
+    for (date, expense_id, description, payer_id, split_type, currency, original_cents, amount_cents), shares in expenses:
+        if shares:
+            balances[payer_id] = balances.get(payer_id, 0) + amount_cents
+            for member_id, share_cents in shares.items():
+                balances[member_id] = balances.get(member_id, 0) - share_cents
+        yield (
+            date, expense_id, description, nicknames.get(payer_id, ""), split_type, currency, original_cents, amount_cents,
+            [shares.get(member_id, 0) for member_id in member_ids],
+            [balances[member_id] for member_id in member_ids],
+        )
+
+def header(nicknames: Sequence[str], group_currency: str) -> List[str]:
+    return [
+        "Date", "Expense ID", "Description", "Paid by", "Split", "Currency", "Original amount", f"Amount ({group_currency})",
+        *(f"Share: {nickname}" for nickname in nicknames),
+        *(f"Balance: {nickname}" for nickname in nicknames),
+    ]
+
+def format_cents(cents: int) -> str:
+    """Formats cents as an exact decimal amount such as -12.05."""
+    units, rest = divmod(abs(cents), CENTS_PER_UNIT)
+    return f"{'-' if cents < 0 else ''}{units}.{rest:02d}"
+
+def _csv_cells(line: StatementLine) -> list:
+    date, expense_id, description, payer, split_type, currency, original_cents, amount_cents, shares, balances = line
+    return [
+        date.isoformat() if date else "", expense_id, description, payer, split_type, currency,
+        format_cents(original_cents), format_cents(amount_cents),
+        *map(format_cents, shares), *map(format_cents, balances),
+    ]
+
+def iter_csv(columns: Sequence[str], lines: Iterable[StatementLine]) -> Iterator[bytes]:
+    """Encodes a statement as UTF-8 CSV, yielding a chunk every CSV_CHUNK_LINES lines."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for count, line in enumerate(lines, start=1):
+        writer.writerow(_csv_cells(line))
+        if count % CSV_CHUNK_LINES == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+def write_xlsx(columns: Sequence[str], lines: Iterable[StatementLine], path: str) -> int:
+    """
+    Writes a statement as an XLSX workbook to `path` and returns the number
+    of lines. The workbook is written in openpyxl's write-only mode, which
+    spills rows to disk instead of keeping them in memory.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Statement")
+    sheet.freeze_panes = "A2"
+    bold = Font(bold=True)
+    header_cells = []
+    for title in columns:
+        cell = WriteOnlyCell(sheet, value=title)
+        cell.font = bold
+        header_cells.append(cell)
+    sheet.append(header_cells)
+
+    def amount(cents):
+        cell = WriteOnlyCell(sheet, value=from_cents(cents))
+        cell.number_format = "#,##0.00"
+        return cell
+
+    count = 0
+    for count, line in enumerate(lines, start=1):
+        date, expense_id, description, payer, split_type, currency, original_cents, amount_cents, shares, balances = line
+        date_cell = WriteOnlyCell(sheet, value=date.replace(tzinfo=None) if date else None)
+        date_cell.number_format = "yyyy-mm-dd hh:mm"
+        sheet.append([
+            date_cell, expense_id, description, payer, split_type, currency, amount(original_cents), amount(amount_cents),
+            *map(amount, shares), *map(amount, balances),
+        ])
+    workbook.save(path)
+    return count
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def get_export_pool() -> ProcessPoolExecutor:
+    """Returns the process pool that builds XLSX exports, starting it on first use."""
+    global _pool
+    if _pool is None:
+        # Spawned rather than forked, as the API process runs threads and an event loop
+        _pool = ProcessPoolExecutor(max_workers=EXPORT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def shutdown_export_pool():
+    """Stops the export processes, if any were started."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
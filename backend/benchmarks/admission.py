@@ -0,0 +1,84 @@
+"""
+Measures how far a misbehaving client slows down everyone else.
+
+Seeds a group with a history of expenses, then runs a few threads that poll
+GET /groups/{id}/expenses as fast as they can under one Client-ID, like a
+frontend tab stuck in a loop, while a well-behaved client reads the same
+group's details at a steady pace. This runs once with the admission limits
+off and once with them on, and reports the well-behaved client's latency
+and what happened to the noisy client's requests.
+
+Usage (from the backend directory):
+    python -m benchmarks.admission [--expenses 500] [--noisy-threads 4] [--duration 10]
+"""
+import argparse
+import os
+import threading
+import time
+from collections import Counter
+
+from benchmarks.common import Timer, create_group, make_client, percentile
+from benchmarks.hot_paths import SEED_BATCH
+from benchmarks.bulk_import import make_expenses
+
+def run(client, group_id, args):
+    stop = threading.Event()
+    noisy = Counter()
+
+    def poll():
+        while not stop.is_set():
+            response = client.get(f"/groups/{group_id}/expenses", headers={"Client-ID": "noisy"})
+            noisy[response.status_code] += 1
+
+    threads = [threading.Thread(target=poll) for _ in range(args.noisy_threads)]
+    for thread in threads:
+        thread.start()
+    latencies = []
+    deadline = time.perf_counter() + args.duration
+    try:
+        while time.perf_counter() < deadline:
+            with Timer() as timer:
+                client.get(f"/groups/{group_id}", headers={"Client-ID": "polite"}).raise_for_status()
+            latencies.append(timer.elapsed * 1000)
+            time.sleep(args.interval)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    return latencies, noisy
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--expenses", type=int, default=500)
+    parser.add_argument("--members", type=int, default=10)
+    parser.add_argument("--noisy-threads", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--interval", type=float, default=0.1, help="pause of the well-behaved client between requests, in seconds")
+    args = parser.parse_args()
+
+    # Every read below must build its response
+    os.environ["GROUP_CACHE_TTL_SECONDS"] = "0"
+    os.environ["RATE_LIMIT_ENABLED"] = "true"
+    client = make_client()
+    from app.services import admission
+
+    group_id, member_ids = create_group(client, args.members)
+    for start in range(0, args.expenses, SEED_BATCH):
+        payload = make_expenses(group_id, member_ids, min(SEED_BATCH, args.expenses - start), 3, seed=start)
+        client.post(f"/groups/{group_id}/expenses/bulk", json=payload).raise_for_status()
+
+    limit_for = admission.limit_for
+    print(f"{'limits':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'noisy 200':>10} {'noisy 429':>10} {'noisy 503':>10}")
+    for enabled in (False, True):
+        # The middleware stays installed; without limits it lets everything through
+        admission.limit_for = limit_for if enabled else (lambda method, route: None)
+        admission.clear()
+        latencies, noisy = run(client, group_id, args)
+        print(
+            f"{'on' if enabled else 'off':>7} {percentile(latencies, 0.5):>8.1f} {percentile(latencies, 0.95):>8.1f} "
+            f"{percentile(latencies, 0.99):>8.1f} {noisy[200]:>10} {noisy[429]:>10} {noisy[503]:>10}"
+        )
+    admission.limit_for = limit_for
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Compares expense throughput of the bulk import endpoint against POST /expenses.
+
+Usage (from the backend directory):
+    python -m benchmarks.bulk_import [--expenses N] [--members N] [--participants N]
+"""
+import argparse
+import random
+
+from benchmarks.common import Timer, create_group, make_client
+
+def make_expenses(group_id, member_ids, count, participants, seed=0):
+    """Builds `count` random expense payloads for one group."""
+    rng = random.Random(seed)
+    return [
+        {
+            "description": f"Expense {i}",
+            "amount": round(rng.uniform(1, 200), 2),
+            "group_id": group_id,
+            "paid_by_member_id": rng.choice(member_ids),
+            "participant_member_ids": rng.sample(member_ids, participants),
+        }
+        for i in range(count)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--expenses", type=int, default=2000)
+    parser.add_argument("--members", type=int, default=10)
+    parser.add_argument("--participants", type=int, default=4)
+    args = parser.parse_args()
+
+    client = make_client()
+
+    group_id, member_ids = create_group(client, args.members, name="single")
+    payloads = make_expenses(group_id, member_ids, args.expenses, args.participants)
+    with Timer() as single:
+        for payload in payloads:
+            client.post("/expenses", json=payload).raise_for_status()
+
+    group_id, member_ids = create_group(client, args.members, name="bulk")
+    payloads = make_expenses(group_id, member_ids, args.expenses, args.participants)
+    with Timer() as bulk:
+        client.post(f"/groups/{group_id}/expenses/bulk", json=payloads).raise_for_status()
+
+    print(f"{args.expenses} expenses, {args.members} members, {args.participants} participants each")
+    print(f"POST /expenses       {single.elapsed:8.3f}s  {args.expenses / single.elapsed:10.0f} expenses/s")
+    print(f"POST .../bulk        {bulk.elapsed:8.3f}s  {args.expenses / bulk.elapsed:10.0f} expenses/s")
+    print(f"speedup              {single.elapsed / bulk.elapsed:8.1f}x")
+
+if __name__ == "__main__":
+    main()
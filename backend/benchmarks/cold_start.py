@@ -0,0 +1,74 @@
+"""
+Cold start benchmark for the startup schema check.
+
+Creates a migrated database with a history of expenses, then repeatedly
+measures the work done on startup with a fresh engine each time: the
+`create_all()` call the app used to make, and the revision check made by
+`verify_schema` now. Besides wall-clock time it counts the SQL statements
+issued, since each one is a round trip on a networked database.
+
+Usage (from the backend directory):
+    python -m benchmarks.cold_start [--expenses 10000] [--repeat 20]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+
+db_dir = tempfile.mkdtemp(prefix="splitshare-coldstart-")
+DATABASE_URL = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+os.environ["DATABASE_URL"] = DATABASE_URL
+
+from benchmarks.common import Timer, create_group, make_client
+
+def measure(step, repeat: int):
+    """
+    Runs `step(engine)` against a new engine `repeat` times. Returns the
+    timings in ms and the number of statements issued by one run.
+    """
+    from sqlalchemy import event
+    from app.models.database import create_db_engine
+
+    timings, statements = [], []
+    for _ in range(repeat):
+        engine = create_db_engine(DATABASE_URL)
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        try:
+            with Timer() as timer:
+                step(engine)
+            timings.append(timer.elapsed * 1000)
+        finally:
+            engine.dispose()
+    return timings, len(statements) // repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--expenses", type=int, default=10000)
+    parser.add_argument("--members", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    client = make_client(DATABASE_URL)
+    group_id, member_ids = create_group(client, args.members)
+    client.post(f"/groups/{group_id}/expenses/bulk", json=[
+        {"description": f"e{i}", "amount": 10 + i % 50, "paid_by_member_id": member_ids[i % len(member_ids)],
+         "participant_member_ids": member_ids[:3]}
+        for i in range(args.expenses)
+    ]).raise_for_status()
+    client.__exit__(None, None, None)
+
+    from app import migrations
+    from app.models.database import Base
+
+    def verify(engine):
+        # Include parsing the migration scripts, which a new process has to do once
+        migrations.get_head_revision.cache_clear()
+        migrations.verify_schema(engine)
+
+    print(f"{'startup step':>14} {'median ms':>10} {'max ms':>8} {'statements':>11}")
+    for label, step in (("create_all", lambda engine: Base.metadata.create_all(bind=engine)), ("verify_schema", verify)):
+        timings, statements = measure(step, args.repeat)
+        print(f"{label:>14} {statistics.median(timings):>10.2f} {max(timings):>8.2f} {statements:>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Shared setup for the benchmark scripts.
+
+The benchmarks drive the real FastAPI app in-process against a throwaway
+SQLite database. DATABASE_URL is read when the database module is imported,
+so `make_client` must run before anything from `app` is imported.
+"""
+import datetime
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+def make_client(database_url: str = None):
+    """Points the app at a fresh, migrated database and returns a started TestClient."""
+    if database_url is None:
+        db_dir = tempfile.mkdtemp(prefix="splitshare-bench-")
+        database_url = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    # The benchmarks send far more requests per client than the limits allow
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.migrations import migrate
+    from app.models.database import engine
+
+    migrate(engine)
+    client = TestClient(app)
+    client.__enter__()
+    return client
+
+def create_group(client, members: int, name: str = "Benchmark group"):
+    """Creates a group with the given number of members and returns (group_id, member_ids)."""
+    response = client.post("/groups", json={"name": name, "creator_nickname": "member-0"}, headers={"Client-ID": f"{name}-0"})
+    response.raise_for_status()
+    group = response.json()
+    member_ids = [group["members"][0]["id"]]
+    for i in range(1, members):
+        response = client.post(
+            f"/groups/{group['id']}/join", json={"nickname": f"member-{i}"}, headers={"Client-ID": f"{name}-{i}"}
+        )
+        response.raise_for_status()
+        member_ids.append(response.json()["id"])
+    return group["id"], member_ids
+
+class Timer:
+    """Context manager measuring wall-clock time in seconds."""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+
+def percentile(values, fraction):
+    """Returns the value below which `fraction` of the values fall."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def git_revision() -> str:
+    """Returns the current commit, or "unknown" outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def save_results(path: str, benchmark: str, args, results):
+    """Writes benchmark results with the commit and settings they were measured at as JSON."""
+    document = {
+        "benchmark": benchmark,
+        "commit": git_revision(),
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2)
+
+def load_results(path: str) -> dict:
+    """Reads a file written by `save_results`."""
+    with open(path) as f:
+        return json.load(f)
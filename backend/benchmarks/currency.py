@@ -0,0 +1,125 @@
+"""
+Benchmarks currency conversion on a mixed-currency group.
+
+Writes a synthetic rates file in the eurofxref-hist.csv layout, then
+converts a batch of expenses in several currencies over a year of dates,
+once with a rate lookup per expense and once with `RateTable.convert_batch`,
+which resolves every distinct (currency, day) pair once. Finally the same
+expenses are imported into a group through the bulk endpoint, where the
+conversion happens, and the group's balances are read back.
+
+Usage (from the backend directory):
+    python -m benchmarks.currency [--expenses 10000] [--members 10] [--repeat 3]
+"""
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+from benchmarks.common import Timer, create_group, make_client
+
+CURRENCIES = {"USD": 1.08, "GBP": 0.86, "JPY": 160.0, "CHF": 0.95, "SEK": 11.4}
+
+def write_rates(path, days, seed=0):
+    """Writes a random walk of daily rates against EUR, skipping weekends like the ECB file."""
+    rng = random.Random(seed)
+    rates = dict(CURRENCIES)
+    start = datetime.date.today() - datetime.timedelta(days=days)
+    with open(path, "w") as file:
+        file.write("Date," + ",".join(rates) + ",\n")
+        for offset in range(days + 1):
+            day = start + datetime.timedelta(days=offset)
+            if day.weekday() >= 5:
+                continue
+            rates = {currency: rate * rng.uniform(0.995, 1.005) for currency, rate in rates.items()}
+            file.write(day.isoformat() + "," + ",".join(f"{rate:.4f}" for rate in rates.values()) + ",\n")
+    return start
+
+def make_expenses(group_id, member_ids, count, start, days, seed=0):
+    """Random expense payloads spread over `days` days in the benchmark currencies and EUR."""
+    rng = random.Random(seed)
+    currencies = ["EUR", *CURRENCIES]
+    return [
+        {
+            "description": f"Expense {i}",
+            "amount": round(rng.uniform(1, 200), 2),
+            "currency": rng.choice(currencies),
+            "date": datetime.datetime.combine(start + datetime.timedelta(days=rng.randint(7, days)), datetime.time(12)).isoformat(),
+            "group_id": group_id,
+            "paid_by_member_id": rng.choice(member_ids),
+            "participant_member_ids": rng.sample(member_ids, min(3, len(member_ids))),
+        }
+        for i in range(count)
+    ]
+
+def measure(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--expenses", type=int, default=10000)
+    parser.add_argument("--members", type=int, default=10)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    client = make_client()
+    from app.services import fx
+    from app.services.money import to_cents
+
+    rates_path = os.path.join(tempfile.mkdtemp(prefix="splitshare-fx-"), "eurofxref-hist.csv")
+    start = write_rates(rates_path, args.days)
+    load_ms, table = measure(lambda: fx.RateTable.from_csv(rates_path, reference="EUR"), args.repeat)
+    fx.set_rates(table)
+
+    group_id, member_ids = create_group(client, args.members)
+    payloads = make_expenses(group_id, member_ids, args.expenses, start, args.days)
+    amounts = [to_cents(payload["amount"]) for payload in payloads]
+    currencies = [payload["currency"] for payload in payloads]
+    days = [datetime.datetime.fromisoformat(payload["date"]).date() for payload in payloads]
+
+    def convert_one(amount, currency, day):
+        if currency == "USD":
+            return amount
+        (to_numerator, to_denominator), (from_numerator, from_denominator) = table._lookup("USD", day), table._lookup(currency, day)
+        converted = Decimal(amount * to_numerator * from_denominator) / (to_denominator * from_numerator)
+        return int(converted.quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+    def per_expense():
+        # What converting inside the balance computation would cost: two
+        # uncached lookups and a decimal conversion per row
+        return [convert_one(amount, currency, day) for amount, currency, day in zip(amounts, currencies, days)]
+
+    def cold():
+        # Every (currency, day) pair misses the cache once
+        table.rate.cache_clear()
+        return table.convert_batch(amounts, currencies, days, "USD")
+
+    per_expense_ms, expected = measure(per_expense, args.repeat)
+    cold_ms, converted = measure(cold, args.repeat)
+    warm_ms, warm = measure(lambda: table.convert_batch(amounts, currencies, days, "USD"), args.repeat)
+    assert converted == expected == warm
+
+    with Timer() as imported:
+        client.post(f"/groups/{group_id}/expenses/bulk", json=payloads).raise_for_status()
+    with Timer() as balances:
+        client.get(f"/groups/{group_id}/balances").raise_for_status()
+
+    print(f"{args.expenses} expenses in {len(set(currencies))} currencies over {len(set(days))} days")
+    print(f"load rates file         {load_ms:9.1f} ms")
+    print(f"per-expense lookups     {per_expense_ms:9.1f} ms")
+    print(f"batched, cold cache     {cold_ms:9.1f} ms  {per_expense_ms / cold_ms:5.1f}x")
+    print(f"batched, warm cache     {warm_ms:9.1f} ms  {per_expense_ms / warm_ms:5.1f}x")
+    print(f"bulk import             {imported.elapsed * 1000:9.1f} ms")
+    print(f"GET balances            {balances.elapsed * 1000:9.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Mixed read/write concurrency benchmark for the SQLite engine settings.
+
+Runs reader and writer threads against the CRUD layer for a fixed time,
+once with SQLite's own defaults (rollback journal, synchronous=FULL, no
+busy timeout) and once with the tuned settings from app.models.database,
+and reports throughput, latency percentiles and lock errors.
+
+Usage (from the backend directory):
+    python -m benchmarks.db_concurrency [--readers 8] [--writers 2] [--duration 5]
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import SQLITE_PRAGMAS, create_db_engine
+from app.models.participant import Participant
+from app.models.group import Group, GroupMember
+from app.models.expense import Expense
+from app.crud import crud_expense, crud_group, crud_participant
+from app.migrations import migrate
+from app.schemas import expense as expense_schemas
+from app.schemas import group as group_schemas
+
+def seed(Session, members: int, expenses: int):
+    db = Session()
+    try:
+        creator_id = crud_participant.upsert_participant_id(db, client_id="bench-0")
+        group = crud_group.create_group_with_member(db, group_schemas.GroupCreate(name="Bench", creator_nickname="m0"), creator_id, "m0")
+        member_ids = [group.members[0].id]
+        for i in range(1, members):
+            participant_id = crud_participant.upsert_participant_id(db, client_id=f"bench-{i}")
+            member_ids.append(crud_group.add_member_to_group(db, group.id, participant_id, f"m{i}").id)
+        rng = random.Random(0)
+        crud_expense.create_expenses_bulk(db, group.id, [
+            expense_schemas.ExpenseCreate(
+                description=f"e{i}", amount=rng.randint(100, 10000) / 100, group_id=group.id,
+                paid_by_member_id=rng.choice(member_ids), participant_member_ids=rng.sample(member_ids, 3),
+            )
+            for i in range(expenses)
+        ])
+        db.commit()
+        return group.id, member_ids
+    finally:
+        db.close()
+
+def reader(Session, group_id, deadline, results):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        db = Session()
+        try:
+            crud_group.get_group_members(db, group_id)
+            crud_expense.get_expenses_for_group(db, group_id, limit=50)
+            results["read"].append(time.perf_counter() - start)
+        except OperationalError:
+            results["errors"].append("read")
+        finally:
+            db.close()
+
+def writer(Session, group_id, member_ids, deadline, results, seed_value):
+    rng = random.Random(seed_value)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        db = Session()
+        try:
+            crud_expense.create_expense(db, expense_schemas.ExpenseCreate(
+                description="w", amount=12.34, group_id=group_id,
+                paid_by_member_id=rng.choice(member_ids), participant_member_ids=member_ids[:3],
+            ))
+            db.commit()
+            results["write"].append(time.perf_counter() - start)
+        except OperationalError:
+            db.rollback()
+            results["errors"].append("write")
+        finally:
+            db.close()
+
+def percentile(values, fraction):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+def run(label, sqlite_pragmas, args):
+    path = os.path.join(tempfile.mkdtemp(prefix="splitshare-dbbench-"), "bench.db")
+    engine = create_db_engine(f"sqlite:///{path}", sqlite_pragmas=sqlite_pragmas)
+    migrate(engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    group_id, member_ids = seed(Session, args.members, args.expenses)
+
+    results = {"read": [], "write": [], "errors": []}
+    deadline = time.perf_counter() + args.duration
+    threads = [threading.Thread(target=reader, args=(Session, group_id, deadline, results)) for _ in range(args.readers)]
+    threads += [
+        threading.Thread(target=writer, args=(Session, group_id, member_ids, deadline, results, i))
+        for i in range(args.writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    print(
+        f"{label:>8} {len(results['read']) / args.duration:>8.0f} {percentile(results['read'], 0.99):>9.1f} "
+        f"{len(results['write']) / args.duration:>8.0f} {percentile(results['write'], 0.99):>9.1f} {len(results['errors']):>7}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--members", type=int, default=10)
+    parser.add_argument("--expenses", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'settings':>8} {'reads/s':>8} {'read p99':>9} {'writes/s':>8} {'write p99':>9} {'errors':>7}")
+    run("default", {}, args)
+    run("tuned", SQLITE_PRAGMAS, args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Event stream soak test.
+
+Opens a number of idle `/groups/{id}/events` streams against the in-process
+broker, measures the memory held per connection with tracemalloc, then
+publishes events through the real write endpoints and checks that every
+subscriber received them.
+
+Usage (from the backend directory):
+    python -m benchmarks.event_soak [--subscribers 1000] [--events 10]
+"""
+import argparse
+import asyncio
+import gc
+import tracemalloc
+
+from benchmarks.common import Timer, create_group, make_client
+
+async def consume(stream, received, ready):
+    # The first frame is the retry hint, sent as soon as the stream subscribed
+    await stream.__anext__()
+    ready.release()
+    async for message in stream:
+        if message.startswith("id:"):
+            received.append(message)
+
+async def soak(group_id, member_ids, args):
+    from app.api.events import _event_stream
+    from app.api.expenses import create_expense
+    from app.models.database import Database, SessionLocal
+    from app.schemas import expense as expense_schemas
+    from app.services.events import get_broker
+
+    broker = get_broker()
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+
+    ready = asyncio.Semaphore(0)
+    received = []
+    with Timer() as subscribe_timer:
+        tasks = [asyncio.create_task(consume(_event_stream(group_id), received, ready)) for _ in range(args.subscribers)]
+        for _ in range(args.subscribers):
+            await ready.acquire()
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot()
+    held = sum(stat.size_diff for stat in snapshot.compare_to(baseline, "filename"))
+    tracemalloc.stop()
+
+    print(f"{args.subscribers} subscribers opened in {subscribe_timer.elapsed * 1000:.1f} ms")
+    print(f"{held / 1024:.1f} KiB held, {held / args.subscribers:.0f} bytes per subscriber")
+    print(f"broker: {broker.stats()}")
+
+    # The endpoint coroutine is awaited directly so that it publishes on this
+    # event loop; the TestClient serves requests from a loop in another thread
+    with Timer() as publish_timer:
+        for i in range(args.events):
+            db = Database(SessionLocal())
+            try:
+                await create_expense(expense_schemas.ExpenseCreate(
+                    description=f"soak {i}", amount=10, group_id=group_id,
+                    paid_by_member_id=member_ids[0], participant_member_ids=member_ids,
+                ), db)
+            finally:
+                await db.close()
+    expected = args.subscribers * args.events
+    # Give the subscriber tasks up to five seconds to drain their queues
+    for _ in range(500):
+        if len(received) >= expected:
+            break
+        await asyncio.sleep(0.01)
+
+    print(f"{args.events} events published in {publish_timer.elapsed * 1000:.1f} ms, "
+          f"{len(received)}/{expected} delivered")
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    print(f"after disconnect: {broker.stats()}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=10)
+    parser.add_argument("--members", type=int, default=4)
+    args = parser.parse_args()
+
+    client = make_client()
+    group_id, member_ids = create_group(client, args.members, name="Soak group")
+    asyncio.run(soak(group_id, member_ids, args))
+
+if __name__ == "__main__":
+    main()
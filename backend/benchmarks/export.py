@@ -0,0 +1,92 @@
+"""
+Measures time and memory of the group statement export.
+
+Seeds groups of increasing size and exports each as CSV and XLSX through
+GET /groups/{id}/export. For CSV, the peak Python memory allocated while
+the statement is generated and encoded is traced, next to the peak of loading the same
+history through GET /groups/{id}/expenses; a flat CSV peak across sizes
+shows the export does not hold the history in memory. XLSX is built by
+the export worker processes, whose peak resident size is read from /proc
+where available.
+
+Usage (from the backend directory):
+    python -m benchmarks.export [--sizes 10000 100000] [--members 10] [--participants 4]
+"""
+import argparse
+import os
+import tracemalloc
+
+from benchmarks.bulk_import import make_expenses
+from benchmarks.common import Timer, create_group, make_client
+from benchmarks.hot_paths import SEED_BATCH
+
+def seed(client, expenses, members, participants):
+    group_id, member_ids = create_group(client, members, name=f"export-{expenses}")
+    for start in range(0, expenses, SEED_BATCH):
+        payload = make_expenses(group_id, member_ids, min(SEED_BATCH, expenses - start), participants, seed=start)
+        client.post(f"/groups/{group_id}/expenses/bulk", json=payload).raise_for_status()
+    return group_id
+
+def download(client, url, **params):
+    """Reads a response chunk by chunk and returns its size in bytes."""
+    size = 0
+    with client.stream("GET", url, params=params) as response:
+        response.raise_for_status()
+        for chunk in response.iter_bytes():
+            size += len(chunk)
+    return size
+
+def traced_peak(fn):
+    """Peak Python memory in bytes allocated while running `fn`."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def worker_peak_rss():
+    """Largest peak resident size in bytes among the export worker processes, or None."""
+    from app.services import statement
+    peaks = []
+    for pid in (statement._pool._processes if statement._pool else {}):
+        try:
+            with open(f"/proc/{pid}/status") as status:
+                peaks += [int(line.split()[1]) * 1024 for line in status if line.startswith("VmHWM:")]
+        except OSError:
+            pass
+    return max(peaks) if peaks else None
+
+def mb(size):
+    return f"{size / 1024 / 1024:8.1f}" if size is not None else "     n/a"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--members", type=int, default=10)
+    parser.add_argument("--participants", type=int, default=4)
+    args = parser.parse_args()
+
+    # Every read below must build its response
+    os.environ["GROUP_CACHE_TTL_SECONDS"] = "0"
+    client = make_client()
+    from app.api import exports
+
+    print(f"{'expenses':>9} {'csv s':>7} {'csv MB':>8} {'csv peak MB':>12} {'json peak MB':>13} {'xlsx s':>7} {'xlsx MB':>8} {'worker MB':>10}")
+    for size in args.sizes:
+        group_id = seed(client, size, args.members, args.participants)
+        url = f"/groups/{group_id}/export"
+        with Timer() as csv_timer:
+            csv_bytes = download(client, url, format="csv")
+        # The test client buffers whole response bodies, so the pipeline is traced on its own
+        csv_peak = traced_peak(lambda: sum(len(chunk) for chunk in exports.stream_statement_csv(group_id)))
+        json_peak = traced_peak(lambda: client.get(f"/groups/{group_id}/expenses").raise_for_status())
+        with Timer() as xlsx_timer:
+            xlsx_bytes = download(client, url, format="xlsx")
+        print(
+            f"{size:>9} {csv_timer.elapsed:>7.2f} {mb(csv_bytes)} {mb(csv_peak):>12} {mb(json_peak):>13} "
+            f"{xlsx_timer.elapsed:>7.2f} {mb(xlsx_bytes)} {mb(worker_peak_rss()):>10}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Latency and throughput of the API's hot paths.
+
+Fills a fresh SQLite database with synthetic groups, then drives the real
+app in-process and reports latency percentiles and throughput for
+POST /expenses, GET /groups/{id}/expenses, GET /groups/{id}/balances,
+GET /groups and GET /me/summary. The response cache is disabled unless
+--cache is passed, so every read reaches the database. Results can be saved
+as JSON and compared against an earlier run to spot regressions across
+commits.
+
+Usage (from the backend directory):
+    python -m benchmarks.hot_paths [--groups 10] [--members 10] [--expenses 1000] [--participants 4]
+        [--iterations 200] [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import os
+import random
+
+from benchmarks.bulk_import import make_expenses
+from benchmarks.common import Timer, create_group, load_results, make_client, percentile, save_results
+
+# Rows per bulk import request while seeding, below MAX_IMPORT_ROWS
+SEED_BATCH = 5000
+
+def seed(client, args):
+    """Creates the synthetic groups; every group shares the same participants."""
+    groups = []
+    for g in range(args.groups):
+        group_id, member_ids = create_group(client, args.members, name="hot")
+        for start in range(0, args.expenses, SEED_BATCH):
+            payload = make_expenses(group_id, member_ids, min(SEED_BATCH, args.expenses - start), args.participants, seed=g * 1000 + start)
+            client.post(f"/groups/{group_id}/expenses/bulk", json=payload).raise_for_status()
+        groups.append((group_id, member_ids))
+    return groups
+
+def summarize(timings):
+    total = sum(timings)
+    return {
+        "requests": len(timings),
+        "rps": len(timings) / total if total else 0.0,
+        "p50_ms": percentile(timings, 0.5) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+        "p99_ms": percentile(timings, 0.99) * 1000,
+        "max_ms": max(timings) * 1000,
+    }
+
+def run(client, groups, args):
+    rng = random.Random(0)
+    participants = min(args.participants, args.members)
+    endpoints = {
+        "POST /expenses": lambda group_id, member_ids: client.post("/expenses", json={
+            "description": "hot path", "amount": round(rng.uniform(1, 200), 2), "group_id": group_id,
+            "paid_by_member_id": rng.choice(member_ids), "participant_member_ids": rng.sample(member_ids, participants),
+        }),
+        "GET /groups/{id}/expenses": lambda group_id, member_ids: client.get(f"/groups/{group_id}/expenses", params={"limit": args.page_size}),
+        "GET /groups/{id}/balances": lambda group_id, member_ids: client.get(f"/groups/{group_id}/balances"),
+        "GET /groups": lambda group_id, member_ids: client.get("/groups", headers={"Client-ID": "hot-0"}),
+        "GET /me/summary": lambda group_id, member_ids: client.get("/me/summary", headers={"Client-ID": "hot-0"}),
+    }
+    results = {}
+    for name, request in endpoints.items():
+        timings = []
+        for i in range(args.iterations):
+            group_id, member_ids = groups[i % len(groups)]
+            with Timer() as timer:
+                response = request(group_id, member_ids)
+            response.raise_for_status()
+            timings.append(timer.elapsed)
+        results[name] = summarize(timings)
+    return results
+
+def print_results(results, baseline=None):
+    header = f"{'endpoint':>26} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    print(header + (f" {'p50 vs base':>12}" if baseline else ""))
+    for name, result in results.items():
+        line = f"{name:>26} {result['rps']:>8.1f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f}"
+        previous = (baseline or {}).get(name)
+        if previous:
+            line += f" {(result['p50_ms'] / previous['p50_ms'] - 1) * 100:>+11.1f}%"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--groups", type=int, default=10)
+    parser.add_argument("--members", type=int, default=10)
+    parser.add_argument("--expenses", type=int, default=1000, help="Expenses per group.")
+    parser.add_argument("--participants", type=int, default=4, help="Participants per expense.")
+    parser.add_argument("--iterations", type=int, default=200, help="Requests per endpoint.")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--cache", action="store_true", help="Keep the response cache enabled.")
+    parser.add_argument("--output", help="Save the results to this JSON file.")
+    parser.add_argument("--compare", help="Compare against results saved by an earlier run.")
+    args = parser.parse_args()
+
+    if not args.cache:
+        os.environ["GROUP_CACHE_TTL_SECONDS"] = "0"
+    client = make_client()
+    with Timer() as seeding:
+        groups = seed(client, args)
+    print(f"Seeded {args.groups} group(s) with {args.expenses} expense(s) each in {seeding.elapsed:.1f} s")
+
+    results = run(client, groups, args)
+    baseline = None
+    if args.compare:
+        previous = load_results(args.compare)
+        print(f"Comparing with commit {previous['commit']} ({previous['created_at']})")
+        baseline = previous["results"]
+    print_results(results, baseline)
+    if args.output:
+        save_results(args.output, "hot_paths", args, results)
+        print(f"Saved results to {args.output}")
+
+if __name__ == "__main__":
+    main()
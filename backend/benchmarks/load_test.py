@@ -0,0 +1,132 @@
+"""
+Load test comparing the sync and async database paths.
+
+Starts the API with uvicorn once per mode (DATABASE_ASYNC off and on), each
+against its own fresh SQLite database, seeds a group and then drives a mix
+of reads and writes with many concurrent clients. The response cache is
+disabled so every request reaches the database.
+
+Usage (from the backend directory):
+    python -m benchmarks.load_test [--concurrency 64] [--duration 10] [--modes sync async]
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(mode: str, port: int) -> subprocess.Popen:
+    db_dir = tempfile.mkdtemp(prefix=f"splitshare-load-{mode}-")
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(db_dir, 'load.db')}",
+        DATABASE_ASYNC="true" if mode == "async" else "false",
+        GROUP_CACHE_TTL_SECONDS="0",
+        RATE_LIMIT_ENABLED="false",
+    )
+    subprocess.run([sys.executable, "-m", "app.cli", "migrate"], env=env, check=True, stdout=subprocess.DEVNULL)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+
+async def wait_until_ready(client: httpx.AsyncClient):
+    for _ in range(100):
+        try:
+            await client.get("/")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("Server did not start")
+
+async def seed(client: httpx.AsyncClient, members: int, expenses: int):
+    """Creates one group with members and a history of expenses."""
+    response = await client.post("/groups", json={"name": "Load", "creator_nickname": "m0"}, headers={"Client-ID": "load-0"})
+    group = response.json()
+    member_ids = [group["members"][0]["id"]]
+    for i in range(1, members):
+        response = await client.post(f"/groups/{group['id']}/join", json={"nickname": f"m{i}"}, headers={"Client-ID": f"load-{i}"})
+        member_ids.append(response.json()["id"])
+    rng = random.Random(0)
+    payload = [
+        {"description": f"e{i}", "amount": rng.randint(100, 10000) / 100, "paid_by_member_id": rng.choice(member_ids),
+         "participant_member_ids": rng.sample(member_ids, min(3, members))}
+        for i in range(expenses)
+    ]
+    await client.post(f"/groups/{group['id']}/expenses/bulk", json=payload)
+    return group["id"], member_ids
+
+async def worker(client, group_id, member_ids, deadline, latencies, errors, rng):
+    while time.perf_counter() < deadline:
+        roll = rng.random()
+        start = time.perf_counter()
+        if roll < 0.45:
+            response = await client.get(f"/groups/{group_id}/balances")
+        elif roll < 0.9:
+            response = await client.get(f"/groups/{group_id}/expenses", params={"limit": 50})
+        else:
+            response = await client.post("/expenses", json={
+                "description": "load", "amount": 12.34, "group_id": group_id,
+                "paid_by_member_id": rng.choice(member_ids), "participant_member_ids": member_ids[:3],
+            })
+        latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors.append(response.status_code)
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+async def run_mode(mode: str, args) -> dict:
+    port = free_port()
+    server = start_server(mode, port)
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            await wait_until_ready(client)
+            group_id, member_ids = await seed(client, args.members, args.expenses)
+            latencies, errors = [], []
+            deadline = time.perf_counter() + args.duration
+            await asyncio.gather(*(
+                worker(client, group_id, member_ids, deadline, latencies, errors, random.Random(i))
+                for i in range(args.concurrency)
+            ))
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "rps": len(latencies) / args.duration,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "errors": len(errors),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--members", type=int, default=10)
+    parser.add_argument("--expenses", type=int, default=1000)
+    parser.add_argument("--modes", nargs="+", choices=["sync", "async"], default=["sync", "async"])
+    args = parser.parse_args()
+
+    print(f"{'mode':>6} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for mode in args.modes:
+        result = asyncio.run(run_mode(mode, args))
+        print(f"{result['mode']:>6} {result['requests']:>9} {result['rps']:>8.1f} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['errors']:>7}")
+
+if __name__ == "__main__":
+    main()
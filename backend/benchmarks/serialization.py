@@ -0,0 +1,73 @@
+"""
+Compares the two ways of serializing a group's expense listing.
+
+The default path loads Expense objects and validates them into the Pydantic
+response models before encoding; the lean path (FAST_SERIALIZATION=true)
+builds dicts straight from row tuples and encodes them with orjson when it
+is installed. Both are timed including the database queries.
+
+Usage (from the backend directory):
+    python -m benchmarks.serialization [--sizes 100 1000 10000] [--repeat 5]
+"""
+import argparse
+import json
+from typing import List
+
+from benchmarks.bulk_import import make_expenses
+from benchmarks.common import Timer, create_group, make_client
+
+def measure(Session, serialize, group_id, repeat):
+    """Returns (best time in ms, body) over `repeat` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        db = Session()
+        try:
+            with Timer() as timer:
+                body = serialize(db, group_id)
+        finally:
+            db.close()
+        best = min(best, timer.elapsed)
+    return best * 1000, body
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--members", type=int, default=10)
+    parser.add_argument("--participants", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    client = make_client()
+    from pydantic import TypeAdapter
+    from app.crud import crud_expense
+    from app.models.database import SessionLocal
+    from app.schemas import expense as expense_schemas
+    from app.services import serialization
+
+    adapter = TypeAdapter(List[expense_schemas.Expense])
+
+    def validated(db, group_id):
+        expenses = crud_expense.get_expenses_for_group(db, group_id=group_id)
+        return adapter.dump_json(adapter.validate_python(expenses, from_attributes=True))
+
+    def lean(db, group_id):
+        return serialization.dumps(crud_expense.get_expense_rows_for_group(db, group_id=group_id))
+
+    print(f"encoder for the lean path: {'orjson' if serialization.orjson is not None else 'json'}")
+    print(f"{'expenses':>9} {'path':>10} {'ms':>10} {'KiB':>8}")
+    for size in args.sizes:
+        group_id, member_ids = create_group(client, args.members, name=f"serialization-{size}")
+        client.post(
+            f"/groups/{group_id}/expenses/bulk", json=make_expenses(group_id, member_ids, size, args.participants)
+        ).raise_for_status()
+
+        validated_ms, validated_body = measure(SessionLocal, validated, group_id, args.repeat)
+        lean_ms, lean_body = measure(SessionLocal, lean, group_id, args.repeat)
+        # Both paths must describe the same expenses
+        assert [expense["id"] for expense in json.loads(validated_body)] == [expense["id"] for expense in json.loads(lean_body)]
+        print(f"{size:>9} {'validated':>10} {validated_ms:>10.1f} {len(validated_body) / 1024:>8.1f}")
+        print(f"{size:>9} {'lean':>10} {lean_ms:>10.1f} {len(lean_body) / 1024:>8.1f}")
+        print(f"{'':>9} {'speedup':>10} {validated_ms / lean_ms:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmarks the settlement solvers on random balances.
+
+Compares the original quadratic matching loop with the heap-based greedy
+solver, and the exact minimal-transaction solver where it applies. The
+"report" row times the whole body of get_group_balances on top of the
+greedy solver: reading the ledger balances, settling and building the
+response models.
+
+Usage (from the backend directory):
+    python -m benchmarks.settlement [--sizes 10 100 1000] [--repeat N] [--output results.json]
+"""
+import argparse
+import os
+import random
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.api.events import build_balance_report
+from app.services.settlement import MAX_EXACT_MEMBERS, settle_greedy, settle_minimal
+from benchmarks.common import save_results
+
+def legacy_settle(balances):
+    """The matching loop as it was in get_group_balances, kept as a baseline."""
+    debtors = {mid: bal for mid, bal in balances.items() if bal < 0}
+    creditors = {mid: bal for mid, bal in balances.items() if bal > 0}
+    payments = []
+    while debtors and creditors:
+        debtor_id, debt = max(debtors.items(), key=lambda item: item[1])
+        creditor_id, credit = max(creditors.items(), key=lambda item: item[1])
+        amount = min(-debt, credit)
+        payments.append((debtor_id, creditor_id, amount))
+        debtors[debtor_id] += amount
+        creditors[creditor_id] -= amount
+        if debtors[debtor_id] == 0:
+            del debtors[debtor_id]
+        if creditors[creditor_id] == 0:
+            del creditors[creditor_id]
+    return payments
+
+def random_balances(members, seed=0):
+    """Random integer-cent balances that sum to zero."""
+    rng = random.Random(seed)
+    values = [rng.randint(-50000, 50000) for _ in range(members - 1)]
+    values.append(-sum(values))
+    return dict(enumerate(values, start=1))
+
+def measure(solver, balances, repeat):
+    """Returns (best time in ms, number of payments) over `repeat` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payments = solver(balances)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, len(payments)
+
+def report(balances):
+    """Runs the balance endpoint's report building on ledger rows holding `balances`."""
+    members = [SimpleNamespace(id=member_id, nickname=f"m{member_id}", balance_cents=balance) for member_id, balance in balances.items()]
+    return build_balance_report(members).transactions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Save the results to this JSON file.")
+    args = parser.parse_args()
+
+    solvers = [("legacy", legacy_settle), ("greedy", settle_greedy), ("minimal", settle_minimal), ("report", report)]
+    results = []
+    print(f"{'members':>8} {'solver':>8} {'ms':>10} {'payments':>9}")
+    for size in args.sizes:
+        balances = random_balances(size)
+        for name, solver in solvers:
+            if name == "minimal" and size > MAX_EXACT_MEMBERS:
+                print(f"{size:>8} {name:>8}    skipped (above {MAX_EXACT_MEMBERS} members it falls back to greedy)")
+                continue
+            elapsed, payments = measure(solver, balances, args.repeat)
+            results.append({"members": size, "solver": name, "ms": elapsed, "payments": payments})
+            print(f"{size:>8} {name:>8} {elapsed:>10.3f} {payments:>9}")
+    if args.output:
+        save_results(args.output, "settlement", args, results)
+
+if __name__ == "__main__":
+    main()
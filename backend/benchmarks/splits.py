@@ -0,0 +1,81 @@
+"""
+Benchmarks the split engine on a batch of random expenses.
+
+Compares the per-expense loop with the vectorized NumPy pass, both for the
+largest remainder allocation alone and for computing the shares of a batch
+end to end, and times the ledger deltas over the batch's (expense, member,
+share) triples. The default batch has 100k expense-participant rows.
+
+Usage (from the backend directory):
+    python -m benchmarks.splits [--rows 100000] [--participants 4] [--repeat 3]
+"""
+import argparse
+import random
+import time
+
+from app.services import splits
+
+def random_splits(rows, participants, members, seed=0):
+    """Random weighted, percentage and equal splits with `rows` participant rows in total."""
+    rng = random.Random(seed)
+    batch = []
+    for _ in range(rows // participants):
+        member_ids = rng.sample(range(1, members + 1), participants)
+        amount_cents = rng.randint(100, 100000)
+        split_type = rng.choice([splits.SplitType.equal, splits.SplitType.weights, splits.SplitType.percentage])
+        if split_type == splits.SplitType.equal:
+            values = None
+        elif split_type == splits.SplitType.weights:
+            values = [rng.randint(1, 5) for _ in member_ids]
+        else:
+            values = [100 / participants] * (participants - 1)
+            values.append(round(100 - sum(round(value, 2) for value in values), 2))
+        batch.append(splits.Split(amount_cents, split_type, member_ids, values))
+    return batch
+
+def measure(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+def run(batch, repeat):
+    weights = [(i, split.amount_cents, sorted(splits._integer_weights(split).items())) for i, split in enumerate(batch)]
+    allocate = splits._allocate_vectorized if splits.np is not None else splits._allocate_loop
+    allocate_ms, _ = measure(lambda: allocate(weights), repeat)
+    shares_ms, shares = measure(lambda: splits.compute_shares(batch), repeat)
+    amounts = [split.amount_cents for split in batch]
+    payers = [split.member_ids[0] for split in batch]
+    deltas_ms, deltas = measure(lambda: splits.net_deltas(amounts, payers, shares), repeat)
+    return allocate_ms, shares_ms, deltas_ms, shares, deltas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--participants", type=int, default=4)
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if splits.np is None:
+        raise SystemExit("NumPy is not installed; only the loop would be measured.")
+    batch = random_splits(args.rows, args.participants, args.members)
+    print(f"{len(batch)} expenses, {len(batch) * args.participants} participant rows")
+
+    vectorized = run(batch, args.repeat)
+    numpy, splits.np = splits.np, None
+    try:
+        loop = run(batch, args.repeat)
+    finally:
+        splits.np = numpy
+    # Both engines must produce identical shares and deltas
+    assert vectorized[3:] == loop[3:]
+
+    print(f"{'engine':>11} {'allocate ms':>12} {'shares ms':>10} {'deltas ms':>10}")
+    for name, result in (("loop", loop), ("vectorized", vectorized)):
+        print(f"{name:>11} {result[0]:>12.1f} {result[1]:>10.1f} {result[2]:>10.1f}")
+
+if __name__ == "__main__":
+    main()
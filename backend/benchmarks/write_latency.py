@@ -0,0 +1,71 @@
+"""
+Write latency benchmark.
+
+Drives the write endpoints in-process (creating groups, joining them,
+creating and deleting expenses) and reports p50/p99 latency and the number
+of commits per request for each endpoint. Run it with SQLITE_SYNCHRONOUS=FULL
+to include an fsync in every commit.
+
+Usage (from the backend directory):
+    python -m benchmarks.write_latency [--iterations 500]
+"""
+import argparse
+
+from benchmarks.common import Timer, make_client
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--participants", type=int, default=4)
+    args = parser.parse_args()
+
+    client = make_client()
+    from sqlalchemy import event
+    from app.models.database import engine
+
+    commits = []
+    event.listen(engine, "commit", lambda connection: commits.append(1))
+    timings = {"create group": [], "join group": [], "create expense": [], "delete expense": []}
+    # The first request of every client also creates its participant
+    for j in range(args.participants):
+        client.get("/groups", headers={"Client-ID": f"write-{j}"}).raise_for_status()
+    commits.clear()
+    for i in range(args.iterations):
+        with Timer() as timer:
+            response = client.post("/groups", json={"name": f"g{i}", "creator_nickname": "m0"}, headers={"Client-ID": "write-0"})
+        timings["create group"].append(timer.elapsed)
+        response.raise_for_status()
+        group = response.json()
+        member_ids = [group["members"][0]["id"]]
+
+        for j in range(1, args.participants):
+            with Timer() as timer:
+                response = client.post(f"/groups/{group['id']}/join", json={"nickname": f"m{j}"}, headers={"Client-ID": f"write-{j}"})
+            timings["join group"].append(timer.elapsed)
+            response.raise_for_status()
+            member_ids.append(response.json()["id"])
+
+        with Timer() as timer:
+            response = client.post("/expenses", json={
+                "description": "write", "amount": 12.34, "group_id": group["id"],
+                "paid_by_member_id": member_ids[0], "participant_member_ids": member_ids,
+            })
+        timings["create expense"].append(timer.elapsed)
+        response.raise_for_status()
+
+        with Timer() as timer:
+            client.delete(f"/expenses/{response.json()['id']}").raise_for_status()
+        timings["delete expense"].append(timer.elapsed)
+
+    requests = sum(len(values) for values in timings.values())
+    print(f"{'endpoint':>15} {'requests':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for label, values in timings.items():
+        print(f"{label:>15} {len(values):>9} {percentile(values, 0.5):>8.2f} {percentile(values, 0.99):>8.2f}")
+    print(f"{len(commits) / requests:.2f} commits per request")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Shared fixtures: the real app against a throwaway, migrated SQLite database.
+
+DATABASE_URL is read when the database module is imported, so it is set
+before anything from `app` is imported.
+"""
+import contextlib
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='splitshare-test-'), 'test.db')}"
+# Every read must reach the database, and no request may be throttled
+os.environ["GROUP_CACHE_TTL_SECONDS"] = "0"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.main import app
+from app.migrations import migrate
+from app.models.database import async_engine, engine
+
+# The engines whose statements count_statements sees: the one serving
+# requests, which is the async engine with DATABASE_ASYNC=true, and the sync
+# engine that tests query directly
+ENGINES = [engine] + ([async_engine.sync_engine] if async_engine is not None else [])
+
+@pytest.fixture(scope="session")
+def client():
+    migrate(engine)
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+def make_group(client):
+    """Creates a group with `members` members and returns (group_id, member_ids)."""
+    count = 0
+
+    def make_group(members=3):
+        nonlocal count
+        count += 1
+        name = f"test-{os.urandom(4).hex()}-{count}"
+        response = client.post("/groups", json={"name": name, "creator_nickname": "member-0"}, headers={"Client-ID": f"{name}-0"})
+        response.raise_for_status()
+        group = response.json()
+        member_ids = [group["members"][0]["id"]]
+        for i in range(1, members):
+            response = client.post(f"/groups/{group['id']}/join", json={"nickname": f"member-{i}"}, headers={"Client-ID": f"{name}-{i}"})
+            response.raise_for_status()
+            member_ids.append(response.json()["id"])
+        return group["id"], member_ids
+    return make_group
+
+@pytest.fixture
+def add_expenses(client):
+    """Imports `count` expenses into a group, paid in turn by its members and shared by all of them."""
+    def add_expenses(group_id, member_ids, count):
+        payload = [
+            {
+                "description": f"Expense {i}",
+                "amount": 10 + i % 7,
+                "group_id": group_id,
+                "paid_by_member_id": member_ids[i % len(member_ids)],
+                "participant_member_ids": member_ids,
+            }
+            for i in range(count)
+        ]
+        client.post(f"/groups/{group_id}/expenses/bulk", json=payload).raise_for_status()
+    return add_expenses
+
+@pytest.fixture
+def count_statements():
+    """Context manager collecting the (statement, parameters) pairs executed inside it."""
+    @contextlib.contextmanager
+    def count_statements():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        for listened in ENGINES:
+            event.listen(listened, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            for listened in ENGINES:
+                event.remove(listened, "before_cursor_execute", before_cursor_execute)
+    return count_statements
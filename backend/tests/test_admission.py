@@ -0,0 +1,96 @@
+"""
+The admission middleware: per-client token buckets and the in-flight cap
+of expensive routes, on a small app with the same route templates.
+"""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.services import admission
+
+def make_app():
+    app = FastAPI()
+
+    @app.get("/groups/{group_id}/balances")
+    def balances(group_id: int):
+        return {"in_flight": admission.expensive.in_flight}
+
+    @app.get("/groups/{group_id}/export")
+    def export(group_id: int):
+        return StreamingResponse(iter([b"a,b\n"]), media_type="text/csv")
+
+    @app.get("/groups/{group_id}/expenses")
+    def expenses(group_id: int):
+        return []
+
+    app.add_middleware(admission.AdmissionMiddleware)
+    return app
+
+@pytest.fixture
+def limiter(monkeypatch):
+    admission.clear()
+    monkeypatch.setattr(admission, "expensive", admission.ConcurrencyLimiter(1))
+    yield admission
+    admission.clear()
+
+def test_client_over_its_limit_gets_429_with_retry_after(limiter, monkeypatch):
+    monkeypatch.setattr(admission, "RATE_LIMIT_EXPENSIVE_BURST", 2)
+    client = TestClient(make_app())
+    statuses = [client.get("/groups/1/balances", headers={"Client-ID": "a"}).status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    response = client.get("/groups/1/balances", headers={"Client-ID": "a"})
+    assert response.headers["Retry-After"] == "1"
+    # Other clients have their own bucket
+    assert client.get("/groups/1/balances", headers={"Client-ID": "b"}).status_code == 200
+    assert {"method": "GET", "route": "/groups/{group_id}/balances", "reason": "rate_limited", "count": 2} in admission.stats()["rejections"]
+
+def test_full_cap_sheds_expensive_routes_but_not_exports(limiter, monkeypatch):
+    monkeypatch.setattr(admission, "expensive", admission.ConcurrencyLimiter(0))
+    client = TestClient(make_app())
+    response = client.get("/groups/1/balances", headers={"Client-ID": "a"})
+    assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+    assert client.get("/groups/1/export", headers={"Client-ID": "a"}).status_code == 200
+
+def test_slot_is_released_once_the_headers_are_sent(limiter):
+    """A slow streamed body must not hold a slot, or it would shed every other expensive request."""
+    async def scenario():
+        headers_sent = asyncio.Event()
+        finish_body = asyncio.Event()
+        in_flight = {}
+
+        async def slow_stream(scope, receive, send):
+            in_flight["before headers"] = admission.expensive.in_flight
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            in_flight["after headers"] = admission.expensive.in_flight
+            headers_sent.set()
+            await finish_body.wait()
+            await send({"type": "http.response.body", "body": b"done"})
+
+        middleware = admission.AdmissionMiddleware(slow_stream)
+        # The middleware finds the route template through scope["app"]
+        scope = {
+            "type": "http", "method": "GET", "path": "/groups/1/expenses", "root_path": "", "query_string": b"",
+            "headers": [(b"client-id", b"a")], "client": ("127.0.0.1", 1), "app": make_app(),
+        }
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        task = asyncio.create_task(middleware(scope, receive, send))
+        await headers_sent.wait()
+        in_flight["while streaming"] = admission.expensive.in_flight
+        finish_body.set()
+        await task
+        in_flight["after"] = admission.expensive.in_flight
+        return in_flight, sent
+
+    in_flight, sent = asyncio.run(scenario())
+    assert in_flight == {"before headers": 1, "after headers": 0, "while streaming": 0, "after": 0}
+    assert [message["type"] for message in sent] == ["http.response.start", "http.response.body"]
@@ -0,0 +1,35 @@
+"""
+Events published to a group's stream carry the group's change sequence, so
+a client can catch up with `/changes` from the last event it received.
+"""
+import json
+
+import pytest
+
+from app.services import events
+
+def test_event_version_is_the_change_sequence(client, make_group, add_expenses):
+    group_id, member_ids = make_group(members=2)
+    broker = events.get_broker()
+    subscription = broker.subscribe(group_id)
+    try:
+        add_expenses(group_id, member_ids, 3)
+        message = subscription.queue.get_nowait()
+    finally:
+        broker.unsubscribe(subscription)
+
+    event_id = int(message.split("\n", 1)[0].removeprefix("id: "))
+    data = json.loads(message.rsplit("data: ", 1)[1])
+    changes = client.get(f"/groups/{group_id}/changes").json()
+    assert data["type"] == "expenses-imported"
+    assert event_id == data["version"] == changes["version"]
+    caught_up = client.get(f"/groups/{group_id}/changes", params={"since": event_id}).json()
+    assert caught_up["expenses"] == [] and caught_up["members"] == []
+
+def test_incomplete_broker_fails_when_instantiated():
+    class SubscribeOnly(events.EventBroker):
+        def subscribe(self, group_id):
+            return events.Subscription(group_id, 1)
+
+    with pytest.raises(TypeError):
+        SubscribeOnly()
@@ -0,0 +1,45 @@
+"""
+Amounts that cannot be stored as cents are rejected with 422 before they
+are converted.
+"""
+import pytest
+
+@pytest.mark.parametrize("amount", ["NaN", "Infinity", "-Infinity", 1e300, 1e10, 0, -5])
+def test_create_expense_rejects_invalid_amounts(client, make_group, amount):
+    group_id, member_ids = make_group(members=2)
+    response = client.post("/expenses", json={
+        "description": "Dinner", "amount": amount, "group_id": group_id,
+        "paid_by_member_id": member_ids[0], "participant_member_ids": member_ids,
+    })
+    assert response.status_code == 422, response.text
+
+@pytest.mark.parametrize("value", ["NaN", 1e300, -1])
+def test_create_expense_rejects_invalid_split_values(client, make_group, value):
+    group_id, member_ids = make_group(members=2)
+    response = client.post("/expenses", json={
+        "description": "Dinner", "amount": 10, "group_id": group_id, "paid_by_member_id": member_ids[0],
+        "participant_member_ids": member_ids, "split_type": "weights", "split_values": [1, value],
+    })
+    assert response.status_code == 422, response.text
+
+def test_import_reports_invalid_amounts_per_row(client, make_group):
+    group_id, member_ids = make_group(members=2)
+    participants = ";".join(map(str, member_ids))
+    body = (
+        "description,amount,paid_by_member_id,participant_member_ids\n"
+        f"Fine,12.50,{member_ids[0]},{participants}\n"
+        f"Broken,NaN,{member_ids[0]},{participants}\n"
+        f"Huge,1e300,{member_ids[0]},{participants}\n"
+    )
+    response = client.post(f"/groups/{group_id}/expenses/bulk", content=body, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 422, response.text
+    assert [error["row"] for error in response.json()["errors"]] == [2, 3]
+
+def test_create_expense_accepts_the_largest_amount(client, make_group):
+    group_id, member_ids = make_group(members=2)
+    response = client.post("/expenses", json={
+        "description": "House", "amount": 1e9, "group_id": group_id,
+        "paid_by_member_id": member_ids[0], "participant_member_ids": member_ids,
+    })
+    assert response.status_code == 200, response.text
+    assert response.json()["amount"] == 1e9
@@ -0,0 +1,100 @@
+"""
+Keyset pagination of the expense listings: cursors carry the (date, id)
+key of the last expense of a page, so paging continues when that expense
+is gone.
+"""
+import datetime
+
+import pytest
+
+from app.services import serialization
+
+def add_dated_expenses(client, group_id, member_ids, count):
+    # Several expenses share each date, so the id breaks the ties
+    payload = [
+        {
+            "description": f"Expense {i}",
+            "amount": 10,
+            "date": datetime.datetime(2024, 1, 1 + i // 3, 12).isoformat(),
+            "group_id": group_id,
+            "paid_by_member_id": member_ids[0],
+            "participant_member_ids": member_ids,
+        }
+        for i in range(count)
+    ]
+    client.post(f"/groups/{group_id}/expenses/bulk", json=payload).raise_for_status()
+
+def read_pages(client, path, limit, on_page=None, max_pages=100):
+    ids, cursor = [], None
+    for _ in range(max_pages):
+        response = client.get(path, params={"limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        ids += [expense["id"] for expense in page]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return ids
+        if on_page is not None:
+            on_page(page)
+    raise AssertionError(f"paging did not end after {max_pages} pages: {ids[:10]}")
+
+@pytest.fixture(params=[False, True], ids=["orm", "fast"])
+def serialization_path(request, monkeypatch):
+    monkeypatch.setattr(serialization, "FAST_SERIALIZATION", request.param)
+
+def test_pages_cover_the_listing_in_order(client, make_group, serialization_path):
+    group_id, member_ids = make_group(members=2)
+    add_dated_expenses(client, group_id, member_ids, 20)
+    everything = [expense["id"] for expense in client.get(f"/groups/{group_id}/expenses").json()]
+    assert read_pages(client, f"/groups/{group_id}/expenses", limit=4) == everything
+
+def test_paging_continues_after_the_last_expense_of_a_page_is_deleted(client, make_group, serialization_path):
+    group_id, member_ids = make_group(members=2)
+    add_dated_expenses(client, group_id, member_ids, 12)
+    everything = [expense["id"] for expense in client.get(f"/groups/{group_id}/expenses").json()]
+    deleted = []
+
+    def delete_last(page):
+        client.delete(f"/expenses/{page[-1]['id']}").raise_for_status()
+        deleted.append(page[-1]["id"])
+
+    ids = read_pages(client, f"/groups/{group_id}/expenses", limit=5, on_page=delete_last)
+    assert ids == everything and len(deleted) == 2
+
+def test_paging_continues_after_settle_up_archives_the_anchor(client, make_group):
+    group_id, member_ids = make_group(members=2)
+    add_dated_expenses(client, group_id, member_ids, 9)
+    response = client.get(f"/groups/{group_id}/expenses", params={"limit": 4})
+    cursor = response.headers["X-Next-Cursor"]
+    client.post(f"/groups/{group_id}/settle-up").raise_for_status()
+
+    response = client.get(f"/groups/{group_id}/expenses", params={"limit": 4, "cursor": cursor})
+    assert response.status_code == 200 and response.json() == []
+    archived = read_pages(client, f"/groups/{group_id}/archive", limit=4)
+    assert len(archived) == len(set(archived)) == 9
+
+def add_undated_expenses(client, group_id, member_ids, count):
+    for i in range(count):
+        client.post("/expenses", json={
+            "description": f"Undated {i}", "amount": 10, "group_id": group_id,
+            "paid_by_member_id": member_ids[0], "participant_member_ids": member_ids,
+        }).raise_for_status()
+
+def test_undated_expenses_page_to_the_end(client, make_group, serialization_path):
+    group_id, member_ids = make_group(members=2)
+    add_undated_expenses(client, group_id, member_ids, 3)
+    everything = [expense["id"] for expense in client.get(f"/groups/{group_id}/expenses").json()]
+    assert read_pages(client, f"/groups/{group_id}/expenses", limit=1) == everything
+
+def test_undated_archived_expenses_page_to_the_end(client, make_group):
+    group_id, member_ids = make_group(members=2)
+    add_undated_expenses(client, group_id, member_ids, 3)
+    client.post(f"/groups/{group_id}/settle-up").raise_for_status()
+    everything = [expense["id"] for expense in client.get(f"/groups/{group_id}/archive").json()]
+    assert len(everything) == 3
+    assert read_pages(client, f"/groups/{group_id}/archive", limit=1) == everything
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "MTIz", "WyJub3QgYSBkYXRlIiwgMV0="])
+def test_invalid_cursor_is_rejected(client, make_group, cursor):
+    group_id, _ = make_group(members=1)
+    assert client.get(f"/groups/{group_id}/expenses", params={"limit": 2, "cursor": cursor}).status_code == 400
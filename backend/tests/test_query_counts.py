@@ -0,0 +1,26 @@
+"""
+The group reads load expenses, payers, participants and members in a fixed
+number of statements, however many expenses the group has.
+"""
+import pytest
+
+@pytest.mark.parametrize("path", ["/groups/{group_id}/expenses", "/groups/{group_id}/balances", "/groups/{group_id}"])
+def test_statement_count_does_not_grow_with_expenses(client, make_group, add_expenses, count_statements, path):
+    counts = []
+    for expenses in (5, 200):
+        group_id, member_ids = make_group(members=4)
+        add_expenses(group_id, member_ids, expenses)
+        with count_statements() as statements:
+            response = client.get(path.format(group_id=group_id))
+        response.raise_for_status()
+        counts.append(len(statements))
+    assert 0 < counts[0] == counts[1], counts
+
+def test_expense_listing_includes_payers_and_participants(client, make_group, add_expenses):
+    group_id, member_ids = make_group(members=3)
+    add_expenses(group_id, member_ids, 6)
+    expenses = client.get(f"/groups/{group_id}/expenses").json()
+    assert len(expenses) == 6
+    for expense in expenses:
+        assert expense["payer"]["id"] == expense["paid_by_member_id"]
+        assert sorted(member["id"] for member in expense["participants"]) == sorted(member_ids)
@@ -0,0 +1,59 @@
+"""
+The hot group queries search the indexes added for them instead of
+scanning whole tables (checked with SQLite's EXPLAIN QUERY PLAN).
+"""
+from sqlalchemy.orm import Session
+
+from app.crud import crud_balance
+from app.models import expense as expense_model
+from app.models.database import engine
+
+def query_plans(statements):
+    """The EXPLAIN QUERY PLAN details of each (statement, parameters) pair, one list per statement."""
+    with engine.connect() as connection:
+        return [
+            [row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+            for statement, parameters in statements
+            if statement.lstrip().upper().startswith("SELECT")
+        ]
+
+def assert_no_table_scans(plans):
+    for plan in plans:
+        assert not any(detail.startswith("SCAN") for detail in plan), plan
+
+def test_expense_listing_searches_group_date_index(client, make_group, add_expenses, count_statements):
+    group_id, member_ids = make_group(members=3)
+    add_expenses(group_id, member_ids, 50)
+    for path in (f"/groups/{group_id}/expenses", f"/groups/{group_id}/expenses?limit=10"):
+        with count_statements() as statements:
+            client.get(path).raise_for_status()
+        plans = query_plans(statements)
+        assert_no_table_scans(plans)
+        listing = [plan for plan in plans if any("ix_expenses_group_id_date" in detail for detail in plan)]
+        assert listing, plans
+        # The index also provides the newest-first order
+        assert not any("TEMP B-TREE FOR ORDER BY" in detail for detail in listing[0]), listing[0]
+
+def test_balances_search_indexes(client, make_group, add_expenses, count_statements):
+    group_id, member_ids = make_group(members=3)
+    add_expenses(group_id, member_ids, 50)
+    with count_statements() as statements:
+        client.get(f"/groups/{group_id}/balances").raise_for_status()
+    assert_no_table_scans(query_plans(statements))
+
+    # The rebuild from history used by reconcile aggregates over the group's expenses
+    with count_statements() as statements, Session(engine) as session:
+        crud_balance.compute_balances_from_history(session, group_id)
+    plans = query_plans(statements)
+    assert_no_table_scans(plans)
+    assert any("USING INDEX ix_expenses_group_id_date" in detail or "USING COVERING INDEX ix_expenses_group_id_date" in detail
+               for plan in plans for detail in plan), plans
+
+def test_participant_lookup_by_member_searches_member_index(client, make_group, add_expenses, count_statements):
+    group_id, member_ids = make_group(members=3)
+    add_expenses(group_id, member_ids, 10)
+    table = expense_model.expense_participants_table
+    with count_statements() as statements, Session(engine) as session:
+        session.query(table.c.expense_id).filter(table.c.member_id == member_ids[1]).all()
+    (plan,) = query_plans(statements)
+    assert any(detail.startswith("SEARCH expense_participants USING") and "ix_expense_participants_member_id" in detail for detail in plan), plan
@@ -0,0 +1,50 @@
+"""
+The vectorized allocation of the split engine must give the shares of the
+per-expense loop, including for amounts and split values at the limits
+that validation lets through.
+"""
+import random
+
+import pytest
+
+from app.services import splits
+from app.services.money import CENTS_PER_UNIT, MAX_AMOUNT
+
+pytest.importorskip("numpy")
+
+MAX_CENTS = MAX_AMOUNT * CENTS_PER_UNIT
+
+def batch_of(amounts_and_weights):
+    return [
+        (index, amount_cents, sorted(enumerate(weights, start=1)))
+        for index, (amount_cents, weights) in enumerate(amounts_and_weights)
+    ]
+
+def assert_paths_agree(batch):
+    vectorized = splits._allocate_vectorized(batch)
+    assert vectorized == splits._allocate_loop(batch)
+    for (_, amount_cents, _), parts in zip(batch, vectorized):
+        assert sum(parts) == amount_cents
+
+def test_random_batches_match_the_loop():
+    rng = random.Random(7)
+    batch = batch_of(
+        (rng.randint(1, 10 ** 6), [rng.randint(0, 10 ** 4) for _ in range(rng.randint(1, 12))] + [1])
+        for _ in range(500)
+    )
+    assert_paths_agree(batch)
+
+@pytest.mark.parametrize("amount_cents, weights", [
+    (MAX_CENTS, [MAX_CENTS, CENTS_PER_UNIT]),
+    (MAX_CENTS, [MAX_CENTS] * 20),
+    (MAX_CENTS - 1, [MAX_CENTS, MAX_CENTS - 1, 1]),
+    (2 ** 53 + 1, [3, 7]),
+    (1, [MAX_CENTS, MAX_CENTS]),
+])
+def test_values_at_the_validation_limits_match_the_loop(amount_cents, weights):
+    # Alongside small expenses, so the fallback covers the whole batch
+    assert_paths_agree(batch_of([(1000, [1, 2]), (amount_cents, weights), (-amount_cents, weights)]))
+
+def test_compute_shares_at_the_limits():
+    split = splits.Split(MAX_CENTS, splits.SplitType.weights, [1, 2], [MAX_AMOUNT, 1])
+    assert splits.compute_shares([split]) == [{1: MAX_CENTS - 100, 2: 100}]
@@ -41,6 +41,33 @@ function GroupPage() {
     fetchData();
   }, [fetchData]);
 
+  // Other members' changes are pushed over the group's event stream, which
+  // carries the updated balances; only the changed list is re-fetched.
+  useEffect(() => {
+    const source = new EventSource(`${api.defaults.baseURL}/groups/${groupId}/events`);
+    const onChange = async (event) => {
+      const payload = JSON.parse(event.data);
+      setBalances(payload.balances);
+      try {
+        if (payload.type === 'member-joined') {
+          const groupRes = await api.get(`/groups/${groupId}`);
+          setGroup(groupRes.data);
+        } else {
+          const expensesRes = await api.get(`/groups/${groupId}/expenses`);
+          setExpenses(expensesRes.data);
+        }
+      } catch (err) {
+        console.error(err);
+      }
+    };
+    ['expense-created', 'expense-deleted', 'expenses-imported', 'member-joined', 'settled-up'].forEach((type) =>
+      source.addEventListener(type, onChange)
+    );
+    // Events were dropped while this client lagged behind; reload everything
+    source.addEventListener('lagging', fetchData);
+    return () => source.close();
+  }, [groupId, fetchData]);
+
   if (loading) return <div>Loading group...</div>;
   if (error) return <div className="error">{error}</div>;
   if (!group) return <div>Group not found.</div>;
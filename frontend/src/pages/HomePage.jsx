@@ -22,7 +22,7 @@ function HomePage() {
     if (!clientId) return;
     try {
       setLoading(true);
-      const response = await api.get('/groups');
+      const response = await api.get('/groups', { params: { summary: true } });
       setGroups(response.data);
     } catch (err) {
       console.error('Failed to fetch groups', err);
@@ -95,6 +95,12 @@ function HomePage() {
                 <Link to={`/group/${group.id}`} style={{ textDecoration: 'none' }}>
                   <div className="card" style={{padding: '1rem'}}>
                     {group.name}
+                    {group.summary && (
+                      <div style={{ fontSize: '0.85rem', color: '#666', marginTop: '0.25rem' }}>
+                        {group.summary.expense_count} expenses &middot; {group.summary.total_spent.toFixed(2)} spent &middot;
+                        your balance {group.summary.my_balance.toFixed(2)}
+                      </div>
+                    )}
                   </div>
                 </Link>
               </li>